@@ -0,0 +1,70 @@
+"""Benchmark to compare one-shot ``typst.compile`` and shared compiler session.
+
+This translates e2e fixtures into Typst source once, and compiles them repeatedly.
+
+Usage:
+
+.. code:: console
+
+   $ python benchmarks/compile_session.py --number 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import time
+from pathlib import Path
+
+import typst
+from docutils.core import publish_string
+
+from rst2typst.package import install_package, package_dir
+from rst2typst.pdf import get_compiler
+from rst2typst.writer import Writer
+
+ROOT = Path(__file__).parent.parent
+FIXTURES = sorted((ROOT / "e2e" / "fixtures").glob("*.rst"))
+
+
+def translate(source: Path) -> bytes:
+    with contextlib.redirect_stdout(io.StringIO()):
+        return publish_string(
+            source.read_text(),
+            source_path=str(source),
+            writer=Writer(),
+            settings_overrides={"report_level": 5},
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--number", type=int, default=10)
+    args = parser.parse_args()
+
+    install_package(package_dir, "rst2typst")
+    sources = [translate(path) for path in FIXTURES]
+    root = os.getcwd()
+
+    start = time.perf_counter()
+    for _ in range(args.number):
+        for src in sources:
+            typst.compile(src, root=root)
+    oneshot = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(args.number):
+        for src in sources:
+            get_compiler((), root).compile(input=src, format="pdf")
+    session = time.perf_counter() - start
+
+    count = args.number * len(sources)
+    print(f"documents:      {len(sources)} x {args.number}")
+    print(f"typst.compile:  {oneshot / count * 1e3:.1f} ms/doc")
+    print(f"shared session: {session / count * 1e3:.1f} ms/doc")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Micro-benchmark for translation of nested-list-heavy documents.
+
+Usage:
+
+.. code:: console
+
+   $ python benchmarks/nested_lists.py --depth 8 --items 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import timeit
+
+from docutils.core import publish_doctree
+
+from rst2typst.writer import HanglingIndent, TypstTranslator, Writer
+
+
+def build_source(depth: int, items: int) -> str:
+    """Build reStructuredText that has nested bullet/enumerated lists in admonitions."""
+
+    def _list(level: int) -> list[str]:
+        marker = "- " if level % 2 == 0 else "#. "
+        indent = " " * (level * 3)
+        lines = []
+        for idx in range(items):
+            lines.append(f"{indent}{marker:<3}Item {level}-{idx} has text")
+            lines.append(f"{indent}   and continuation line.")
+            lines.append("")
+            if level + 1 < depth and idx == items - 1:
+                lines += _list(level + 1)
+        return lines
+
+    body = "\n".join(f"   {line}" if line else "" for line in _list(0))
+    return "\n\n".join(f".. note::\n\n{body}" for _ in range(items))
+
+
+def bench_indent(depth: int, number: int) -> float:
+    """Measure time to read prefix/indent of deeply pushed indent."""
+    hi = HanglingIndent()
+    for _ in range(depth):
+        hi.push("- ")
+
+    def _run():
+        hi.prefix  # noqa: B018
+        hi.indent  # noqa: B018
+
+    return timeit.timeit(_run, number=number)
+
+
+def bench_translate(source: str, number: int) -> float:
+    """Measure time to walk doctree by translator."""
+    document = publish_doctree(
+        source, settings_spec=Writer(), settings_overrides={"report_level": 5}
+    )
+
+    def _run():
+        document.walkabout(TypstTranslator(document))
+
+    return timeit.timeit(_run, number=number)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--depth", type=int, default=8)
+    parser.add_argument("--items", type=int, default=4)
+    parser.add_argument("--number", type=int, default=20)
+    args = parser.parse_args()
+
+    source = build_source(args.depth, args.items)
+    indent_time = bench_indent(args.depth, args.number * 10_000)
+    translate_time = bench_translate(source, args.number)
+    print(f"indent lookup: {indent_time / (args.number * 10_000) * 1e9:.1f} ns/op")
+    print(f"translate:     {translate_time / args.number * 1e3:.3f} ms/doc")
+
+
+if __name__ == "__main__":
+    main()
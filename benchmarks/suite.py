@@ -0,0 +1,365 @@
+"""Benchmark suite to measure each phase of conversion.
+
+This measures time and peak memory of these phases for each corpus.
+
+* ``parse``: Parsing source by docutils (without transforms).
+* ``transform:<name>``: Each transform of rst2typst, and all transforms of docutils as ``transform:docutils``.
+* ``translate``: Walking doctree by ``TypstTranslator``.
+* ``render``: Rendering imports and template.
+* ``compile``: Compiling Typst source into PDF (only with ``--compile``).
+
+Corpora are documents of ``docs/spec`` and synthetic documents that are scaled by ``--scale``.
+Time is minimum of ``--repeat`` runs, and peak memory is measured by another run with ``tracemalloc``.
+
+Usage:
+
+.. code:: console
+
+   $ python benchmarks/suite.py --scale 10 --save baseline.json
+   $ python benchmarks/suite.py --scale 10 --compare baseline.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+
+from docutils import io as docutils_io
+from docutils.core import Publisher
+
+from rst2typst import transforms
+from rst2typst.writer import Writer
+
+ROOT = Path(__file__).parent.parent
+SPEC_DIR = ROOT / "docs" / "spec"
+
+# Values under them are ignored on finding regressions, because they are mostly noise.
+NOISE_FLOOR = {"time": 1e-3, "peak": 64 * 1024}
+
+RST2TYPST_TRANSFORMS = {
+    getattr(transforms, name)
+    for name in dir(transforms)
+    if isinstance(getattr(transforms, name), type)
+    and getattr(transforms, name).__module__ == transforms.__name__
+}
+
+
+# ================
+# Synthetic corpus
+# ================
+def build_plain(scale: int) -> str:
+    """Long plain text with inline markups."""
+    paragraph = (
+        "Lorem ipsum dolor sit amet, *consectetur* adipiscing elit, "
+        "sed do **eiusmod** tempor incididunt ut ``labore`` et dolore magna aliqua.\n"
+    )
+    sections = []
+    for idx in range(scale * 10):
+        sections.append(f"Section {idx}\n{'=' * 20}\n\n" + (paragraph + "\n") * 20)
+    return "\n".join(sections)
+
+
+def build_lists(scale: int, depth: int = 6) -> str:
+    """Deep nested bullet and enumerated lists."""
+
+    def _list(level: int) -> list[str]:
+        marker = "- " if level % 2 == 0 else "#. "
+        indent = " " * (level * 3)
+        lines = []
+        for idx in range(4):
+            lines.append(f"{indent}{marker:<3}Item {level}-{idx} has text")
+            lines.append(f"{indent}   and continuation line.")
+            lines.append("")
+            if level + 1 < depth and idx == 3:
+                lines += _list(level + 1)
+        return lines
+
+    return "\n".join("\n".join(_list(0)) for _ in range(scale * 10))
+
+
+def build_tables(scale: int, rows: int = 50, cols: int = 12) -> str:
+    """Wide and tall list-tables."""
+    lines = []
+    for idx in range(scale):
+        lines += [f".. list-table:: Table {idx}", "   :header-rows: 1", ""]
+        for row in range(rows):
+            for col in range(cols):
+                marker = "* -" if col == 0 else "  -"
+                lines.append(f"   {marker} Cell {row}-{col}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def build_math(scale: int) -> str:
+    """Many inline and block math."""
+    chunks = []
+    for idx in range(scale * 20):
+        chunks.append(
+            f"Inline :math:`\\alpha_{{{idx}}} + \\frac{{x}}{{y}}` in text.\n\n"
+            f".. math::\n\n   \\sum_{{i=0}}^{{{idx}}} i^2 = \\int_0^1 f(x) dx\n"
+        )
+    return "\n".join(chunks)
+
+
+def build_footnotes(scale: int) -> str:
+    """Many footnote references and footnotes."""
+    count = scale * 50
+    refs = "\n\n".join(f"Paragraph with footnote [#f{idx}]_." for idx in range(count))
+    notes = "\n".join(f".. [#f{idx}] Footnote {idx}." for idx in range(count))
+    return f"{refs}\n\n{notes}\n"
+
+
+def build_admonitions(scale: int) -> str:
+    """Many admonitions with nested contents."""
+    kinds = ["note", "tip", "warning", "danger", "important", "hint"]
+    chunks = []
+    for idx in range(scale * 30):
+        kind = kinds[idx % len(kinds)]
+        chunks.append(
+            f".. {kind}::\n\n   Admonition {idx} has *text*.\n\n   - Item\n   - Item\n"
+        )
+    return "\n".join(chunks)
+
+
+SYNTHETIC: dict[str, Callable[[int], str]] = {
+    "plain": build_plain,
+    "lists": build_lists,
+    "tables": build_tables,
+    "math": build_math,
+    "footnotes": build_footnotes,
+    "admonitions": build_admonitions,
+}
+
+
+def collect_corpora(names: list[str] | None, scale: int) -> dict[str, list[str]]:
+    """Collect sources of each corpus."""
+    corpora = {"spec": [p.read_text() for p in sorted(SPEC_DIR.glob("**/*.rst.txt"))]}
+    for name, build in SYNTHETIC.items():
+        corpora[name] = [build(scale)]
+    if names:
+        corpora = {k: v for k, v in corpora.items() if k in names}
+    return corpora
+
+
+# ===========
+# Measurement
+# ===========
+class Recorder:
+    """Accumulator of time and peak memory for each phase."""
+
+    def __init__(self, trace_memory: bool = False):
+        self.trace_memory = trace_memory
+        self.times: dict[str, float] = {}
+        self.peaks: dict[str, int] = {}
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        yield
+        elapsed = time.perf_counter() - start
+        self.times[name] = self.times.get(name, 0) + elapsed
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] - base
+            self.peaks[name] = max(self.peaks.get(name, 0), peak)
+
+
+def run_phases(source: str, recorder: Recorder, compile_pdf: bool = False):
+    """Convert source with measuring each phase."""
+    writer = Writer()
+    publisher = Publisher(
+        writer=writer,
+        source_class=docutils_io.StringInput,
+        destination_class=docutils_io.StringOutput,
+    )
+    publisher.set_components("standalone", "restructuredtext", "null")
+    publisher.process_programmatic_settings(
+        None, {"report_level": 5, "warning_stream": False}, None
+    )
+    publisher.set_source(source, None)
+    publisher.set_destination(None, None)
+
+    with recorder.phase("parse"):
+        document = publisher.reader.read(
+            publisher.source, publisher.parser, publisher.settings
+        )
+
+    # Apply transforms one by one (as same as ``Transformer.apply_transforms``).
+    transformer = document.transformer
+    transformer.populate_from_components(
+        (
+            publisher.source,
+            publisher.reader,
+            publisher.reader.parser,
+            publisher.writer,
+            publisher.destination,
+        )
+    )
+    document.reporter.attach_observer(document.note_transform_message)
+    while transformer.transforms:
+        if not transformer.sorted:
+            transformer.transforms.sort()
+            transformer.transforms.reverse()
+            transformer.sorted = 1
+        priority, transform_class, pending, kwargs = transformer.transforms.pop()
+        name = (
+            transform_class.__name__
+            if transform_class in RST2TYPST_TRANSFORMS
+            else "docutils"
+        )
+        with recorder.phase(f"transform:{name}"):
+            transform_class(document, startnode=pending).apply(**kwargs)
+        transformer.applied.append((priority, transform_class, pending, kwargs))
+
+    writer.document = document
+    with contextlib.redirect_stdout(io.StringIO()):
+        with recorder.phase("translate"):
+            visitor = writer.build_translator()
+            document.walkabout(visitor)
+        with recorder.phase("render"):
+            writer.parts["body"] = "".join(visitor.body)
+            writer.parts["imports"] = writer.render_imports(visitor)
+            output = Path(document.settings.template).read_text().format(**writer.parts)
+
+    if compile_pdf:
+        from rst2typst.pdf import get_compiler
+
+        with recorder.phase("compile"):
+            get_compiler((), os.getcwd()).compile(input=output.encode(), format="pdf")
+
+
+def measure(sources: list[str], repeat: int, compile_pdf: bool) -> dict[str, dict]:
+    """Measure phases for corpus.
+
+    :returns: Minimum time and peak memory of each phase.
+    """
+    results: dict[str, dict] = {}
+    for _ in range(repeat):
+        recorder = Recorder()
+        for source in sources:
+            run_phases(source, recorder, compile_pdf)
+        for name, value in recorder.times.items():
+            entry = results.setdefault(name, {"time": value})
+            entry["time"] = min(entry["time"], value)
+
+    recorder = Recorder(trace_memory=True)
+    tracemalloc.start()
+    try:
+        for source in sources:
+            run_phases(source, recorder, compile_pdf)
+    finally:
+        tracemalloc.stop()
+    for name, value in recorder.peaks.items():
+        results.setdefault(name, {"time": 0.0})["peak"] = value
+    return results
+
+
+# =========
+# Reporting
+# =========
+def print_results(results: dict[str, dict[str, dict]], baseline: dict | None = None):
+    header = f"{'corpus':<12} {'phase':<32} {'time (ms)':>10} {'peak (KiB)':>11}"
+    if baseline:
+        header += f" {'time ratio':>11} {'peak ratio':>11}"
+    print(header)
+    print("-" * len(header))
+    for corpus, phases in results.items():
+        for name, entry in phases.items():
+            line = f"{corpus:<12} {name:<32} {entry['time'] * 1e3:>10.2f} {entry.get('peak', 0) / 1024:>11.1f}"
+            base = (baseline or {}).get(corpus, {}).get(name)
+            if base:
+                line += f" {_ratio(entry['time'], base['time']):>11}"
+                line += f" {_ratio(entry.get('peak', 0), base.get('peak', 0)):>11}"
+            print(line)
+
+
+def _ratio(value: float, base: float) -> str:
+    return f"{value / base:.2f}x" if base else "-"
+
+
+def find_regressions(
+    results: dict[str, dict[str, dict]], baseline: dict, threshold: float
+) -> list[str]:
+    """Find phases that are slower (or use more memory) than baseline over threshold."""
+    found = []
+    for corpus, phases in results.items():
+        for name, entry in phases.items():
+            base = baseline.get(corpus, {}).get(name)
+            if not base:
+                continue
+            for key in ("time", "peak"):
+                if entry.get(key, 0) < NOISE_FLOOR[key]:
+                    continue
+                if base.get(key) and entry[key] > base[key] * (1 + threshold):
+                    found.append(
+                        f"{corpus} {name} {key}: {_ratio(entry[key], base[key])}"
+                    )
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--corpus",
+        action="append",
+        choices=["spec", *SYNTHETIC],
+        help="Corpus to measure (default: all).",
+    )
+    parser.add_argument("--scale", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--compile", action="store_true", help="Measure compile too.")
+    parser.add_argument("--save", type=Path, help="Write results into JSON file.")
+    parser.add_argument("--compare", type=Path, help="Compare with baseline JSON file.")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="Allowed ratio of regression from baseline (default: 0.1).",
+    )
+    args = parser.parse_args()
+
+    if args.compile:
+        from rst2typst.package import install_package, package_dir
+
+        install_package(package_dir, "rst2typst")
+
+    results = {
+        name: measure(sources, args.repeat, args.compile)
+        for name, sources in collect_corpora(args.corpus, args.scale).items()
+    }
+    baseline = None
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+    print_results(results, baseline)
+
+    if args.save:
+        data = {
+            "meta": {
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "scale": args.scale,
+                "repeat": args.repeat,
+            },
+            "results": results,
+        }
+        args.save.write_text(json.dumps(data, indent=2))
+    if baseline:
+        regressions = find_regressions(results, baseline, args.threshold)
+        if regressions:
+            print("\nRegressions:", *regressions, sep="\n  ", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
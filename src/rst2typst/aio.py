@@ -0,0 +1,226 @@
+"""Asynchronous API for applications that run on asyncio.
+
+Parsing and translating, and compiling are run in executors (thread pools by default),
+so that they do not block event loop.
+
+.. code:: python
+
+   from rst2typst.aio import Converter
+
+   async with Converter(max_concurrency=4) as converter:
+       code = await converter.to_typst(source)
+       pdf = await converter.to_pdf(source)
+
+* Count of conversions that run at same time is limited by ``max_concurrency``.
+  Other conversions wait before submitting work into executors.
+* When task of conversion is cancelled, work that is not started is discarded,
+  and compiling does not start after translating.
+  Work that is running in executor is not interrupted, but its result is discarded.
+* Compiler of Typst cannot compile concurrently, so that each thread has own compiler
+  (see :func:`rst2typst.pdf.get_compiler`). Fonts are shared by them.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import TYPE_CHECKING
+
+from docutils.core import publish_string
+
+from .writer import Writer
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from typing import Any
+
+    from typing_extensions import Self
+
+    from .pdf import CompileOptions
+
+DEFAULT_CONCURRENCY = 4
+
+
+def translate_typst(
+    source: str, source_path: str | None, settings_overrides: dict[str, Any]
+) -> str:
+    """Convert reStructuredText into Typst code. This is called in executor."""
+    return publish_string(
+        source,
+        source_path=source_path,
+        writer=Writer(),
+        settings_overrides=settings_overrides | {"output_encoding": "unicode"},
+    )
+
+
+def translate_pdf(
+    source: str, source_path: str | None, settings_overrides: dict[str, Any]
+) -> tuple[str, CompileOptions]:
+    """Convert reStructuredText into Typst code for PDF. This is called in executor.
+
+    :returns: Typst code and options to compile it.
+    """
+    # NOTE: PDF writer is imported lazily, because it requires ``typst``.
+    from .pdf import SourceWriter
+
+    writer = SourceWriter()
+    code = publish_string(
+        source,
+        source_path=source_path,
+        writer=writer,
+        settings_overrides=settings_overrides | {"output_encoding": "unicode"},
+    )
+    return code, writer.options
+
+
+def compile_pdf(code: str, options: CompileOptions) -> bytes:
+    """Compile Typst code into PDF. This is called in executor."""
+    from . import pdf
+
+    pdf.prepare_package(options)
+    return pdf.compile_pdf(code, options)
+
+
+class Converter:
+    """Converter that runs conversions in executors.
+
+    :param max_concurrency: Max count of conversions that run at same time.
+    :param translate_executor: Executor for parsing and translating.
+    :param compile_executor: Executor for compiling PDF.
+    :param processes: Create process pools instead of thread pools for executors that are not given.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_CONCURRENCY,
+        *,
+        translate_executor: Executor | None = None,
+        compile_executor: Executor | None = None,
+        processes: bool = False,
+    ):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be positive")
+        self.max_concurrency = max_concurrency
+        self._owned: list[Executor] = []
+        self.translate_executor = translate_executor or self._create(processes)
+        self.compile_executor = compile_executor or self._create(processes)
+        # Semaphores are bound to event loop, so that they are created for each loop.
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+
+    def _create(self, processes: bool) -> Executor:
+        executor: Executor
+        if processes:
+            executor = ProcessPoolExecutor(max_workers=self.max_concurrency)
+        else:
+            executor = ThreadPoolExecutor(
+                max_workers=self.max_concurrency, thread_name_prefix="rst2typst"
+            )
+        self._owned.append(executor)
+        return executor
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    async def _run(self, executor: Executor, func: Callable, *args):
+        # NOTE: Cancelling future of event loop cancels future of executor too,
+        # so that work is discarded when it is not started.
+        return await asyncio.get_running_loop().run_in_executor(executor, func, *args)
+
+    async def to_typst(
+        self,
+        source: str,
+        *,
+        source_path: str | None = None,
+        settings_overrides: dict[str, Any] | None = None,
+    ) -> str:
+        """Convert reStructuredText into Typst code.
+
+        :param source: Source text.
+        :param source_path: Path of source to resolve relative paths (for example, includes).
+        :param settings_overrides: Settings of docutils and writer.
+        """
+        async with self._semaphore():
+            return await self._run(
+                self.translate_executor,
+                translate_typst,
+                source,
+                source_path,
+                settings_overrides or {},
+            )
+
+    async def to_pdf(
+        self,
+        source: str,
+        *,
+        source_path: str | None = None,
+        settings_overrides: dict[str, Any] | None = None,
+    ) -> bytes:
+        """Convert reStructuredText into PDF.
+
+        Parameters are same as :meth:`to_typst`, and settings of PDF writer are accepted.
+        """
+        async with self._semaphore():
+            code, options = await self._run(
+                self.translate_executor,
+                translate_pdf,
+                source,
+                source_path,
+                settings_overrides or {},
+            )
+            return await self._run(self.compile_executor, compile_pdf, code, options)
+
+    def close(self):
+        """Shut down executors that converter created, and discard pending work of them."""
+        for executor in self._owned:
+            executor.shutdown(wait=False, cancel_futures=True)
+        self._owned.clear()
+
+    async def __aenter__(self) -> Self:
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.close()
+
+
+_default: Converter | None = None
+
+
+def get_converter() -> Converter:
+    """Retrieve converter shared in the process (it is used by module-level functions)."""
+    global _default
+    if _default is None:
+        _default = Converter()
+    return _default
+
+
+async def convert_to_typst(
+    source: str,
+    *,
+    source_path: str | None = None,
+    settings_overrides: dict[str, Any] | None = None,
+    converter: Converter | None = None,
+) -> str:
+    """Convert reStructuredText into Typst code (see :meth:`Converter.to_typst`)."""
+    return await (converter or get_converter()).to_typst(
+        source, source_path=source_path, settings_overrides=settings_overrides
+    )
+
+
+async def convert_to_pdf(
+    source: str,
+    *,
+    source_path: str | None = None,
+    settings_overrides: dict[str, Any] | None = None,
+    converter: Converter | None = None,
+) -> bytes:
+    """Convert reStructuredText into PDF (see :meth:`Converter.to_pdf`)."""
+    return await (converter or get_converter()).to_pdf(
+        source, source_path=source_path, settings_overrides=settings_overrides
+    )
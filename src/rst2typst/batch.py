@@ -0,0 +1,395 @@
+"""Batch conversion for many source files.
+
+This module converts many reStructuredText files at once across workers.
+Workers are processes or threads:
+
+* Each worker process imports docutils and writer only once, and it converts multiple files.
+* Worker threads share imported modules, installed package and loaded fonts.
+  Typst compiler releases GIL while compiling, so that threads compile PDF concurrently.
+  Each thread has own compiler (see :func:`rst2typst.pdf.get_compiler`).
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import glob
+import importlib
+import io
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+import traceback
+from concurrent.futures import (
+    BrokenExecutor,
+    Executor,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+)
+from dataclasses import dataclass
+from pathlib import Path
+
+from docutils import ApplicationError, utils
+from docutils.core import Publisher
+from docutils.utils import DependencyList
+
+from .cache import build_key, settings_items, stat_files
+from .core import publish_cmdline
+
+WRITERS: dict[str, tuple[str, str]] = {
+    "typst": ("rst2typst.writer", ".typ"),
+    "pdf": ("rst2typst.pdf", ".pdf"),
+}
+"""Module path and suffix of output for each writer name."""
+
+EXECUTORS: dict[str, str] = {
+    "typst": "processes",
+    "pdf": "threads",
+}
+"""Default kind of workers for each writer name.
+
+Translation holds GIL, but compiling PDF (that is most of the time) does not.
+"""
+
+SOURCE_SUFFIX = ".rst"
+
+STAMPS_NAME = ".rst2typst-batch.json"
+"""Name of file in output directory to store stamps of outputs."""
+
+_GLOB_MAGIC = re.compile(r"[*?[]")
+
+
+@dataclass(frozen=True)
+class Job:
+    """Pair of source and destination to convert."""
+
+    source: Path
+    destination: Path
+
+    def is_up_to_date(self, key: str, stamp: dict | None) -> bool:
+        """Check that destination was written from current inputs.
+
+        :param key: Key of writer and settings (see :func:`settings_key`).
+        :param stamp: Stamp that was recorded when destination was written.
+                      It has key and size and modified time of source and its dependencies.
+        """
+        if not stamp or stamp.get("key") != key or not self.destination.exists():
+            return False
+        return stat_files(stamp["inputs"]) == stamp["inputs"]
+
+
+@dataclass(frozen=True)
+class Result:
+    """Result of a job."""
+
+    job: Job
+    error: str | None = None
+    skipped: bool = False
+    elapsed: float = 0.0
+    """Wall time of conversion in seconds."""
+    inputs: dict[str, list[int]] | None = None
+    """Size and modified time of source and its dependencies that conversion read."""
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def _expand(item: str) -> tuple[Path, list[Path]]:
+    """Expand an input item into base directory and source files."""
+    if _GLOB_MAGIC.search(item):
+        base = Path(_GLOB_MAGIC.split(item, maxsplit=1)[0])
+        if not base.is_dir():
+            base = base.parent
+        sources = [Path(p) for p in glob.glob(item, recursive=True)]
+        return base, sorted(p for p in sources if p.is_file())
+    path = Path(item)
+    if path.is_dir():
+        return path, sorted(path.rglob(f"*{SOURCE_SUFFIX}"))
+    return path.parent, [path]
+
+
+def collect_jobs(inputs: list[str], out_dir: Path, suffix: str) -> list[Job]:
+    """Build jobs from inputs.
+
+    :param inputs: Source files, directories or glob patterns.
+    :param out_dir: Directory to write outputs.
+                    Outputs keep relative paths from directory (or non-magic part of glob).
+    :param suffix: Suffix of output files.
+    """
+    jobs: dict[Path, Job] = {}
+    for item in inputs:
+        base, sources = _expand(item)
+        for source in sources:
+            dest = out_dir / source.relative_to(base).with_suffix(suffix)
+            jobs.setdefault(source.resolve(), Job(source, dest))
+    return list(jobs.values())
+
+
+def settings_key(writer_name: str, options: list[str]) -> str:
+    """Compute key of writer and settings that affect outputs.
+
+    It is computed as same as key of conversion cache without source,
+    so that it changes by options, template and current directory.
+    """
+    writer = importlib.import_module(WRITERS[writer_name][0]).Writer()
+    publisher = Publisher(writer=writer)
+    publisher.set_components("standalone", "restructuredtext", "pseudoxml")
+    publisher.process_command_line(options)
+    settings = publisher.settings
+    items = writer.cache_key_items(settings) | {
+        "cwd": os.getcwd(),
+        "settings": settings_items(settings),
+        "options": options,
+    }
+    return build_key(b"", items)
+
+
+def load_stamps(out_dir: Path) -> dict[str, dict]:
+    """Load stamps of outputs that were written by previous runs."""
+    try:
+        return json.loads((out_dir / STAMPS_NAME).read_text())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_stamps(out_dir: Path, stamps: dict[str, dict]):
+    """Write stamps of outputs atomically."""
+    out_dir.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=out_dir, prefix=f"{STAMPS_NAME}-")
+    with os.fdopen(fd, "w") as fp:
+        json.dump(stamps, fp, indent=2, sort_keys=True)
+    os.replace(tmp, out_dir / STAMPS_NAME)
+
+
+def conversion_errors(writer_name: str) -> tuple[type[Exception], ...]:
+    """Retrieve types of errors that mean source cannot be converted by writer.
+
+    Messages of them are enough to fix sources. Other errors are bugs,
+    so that their tracebacks are reported.
+    """
+    # Translator raises NotImplementedError for unsupported nodes.
+    errors: tuple[type[Exception], ...] = (
+        ApplicationError,
+        OSError,
+        UnicodeError,
+        NotImplementedError,
+    )
+    if writer_name == "pdf":
+        import typst
+
+        errors += (typst.TypstError,)
+    return errors
+
+
+def convert(
+    job: Job, writer_name: str, options: list[str], capture_output: bool = True
+) -> Result:
+    """Convert a source file by writer.
+
+    This is called in worker process or thread. System messages of docutils are captured,
+    and they are used as error message when conversion is failed.
+
+    :param capture_output: Capture stdout and stderr too.
+                           This replaces them in the process, so that it is not for threads.
+    """
+    start = time.perf_counter()
+    module = importlib.import_module(WRITERS[writer_name][0])
+    job.destination.parent.mkdir(parents=True, exist_ok=True)
+    messages = io.StringIO()
+    dependencies = DependencyList()
+    error = None
+    try:
+        with contextlib.ExitStack() as stack:
+            if capture_output:
+                stack.enter_context(contextlib.redirect_stdout(messages))
+                stack.enter_context(contextlib.redirect_stderr(messages))
+            publish_cmdline(
+                writer=module.Writer(),
+                argv=[*options, str(job.source), str(job.destination)],
+                settings_overrides={
+                    "warning_stream": messages,
+                    "traceback": True,
+                    "record_dependencies": dependencies,
+                },
+            )
+    except SystemExit as err:
+        if err.code:
+            error = messages.getvalue().strip() or f"exit {err.code}"
+    except utils.SystemMessage as err:
+        error = messages.getvalue().strip() or str(err)
+    except conversion_errors(writer_name) as err:
+        error = "\n".join(
+            filter(None, [messages.getvalue().strip(), f"{type(err).__name__}: {err}"])
+        )
+    except Exception:  # noqa: BLE001
+        # Failure of a document must not abort other documents.
+        error = "\n".join(
+            filter(None, [messages.getvalue().strip(), traceback.format_exc().strip()])
+        )
+    inputs = None
+    if error is None:
+        inputs = stat_files([str(job.source), *dependencies.list])
+    return Result(job, error=error, elapsed=time.perf_counter() - start, inputs=inputs)
+
+
+def prepare(writer_name: str, options: list[str]):
+    """Load resources that worker threads share, before they start.
+
+    For PDF, local package is installed and fonts are loaded only once,
+    instead of checking them by all threads at same time.
+    """
+    if writer_name != "pdf":
+        return
+    from . import pdf
+
+    writer = pdf.Writer()
+    publisher = Publisher(writer=writer)
+    publisher.set_components("standalone", "restructuredtext", "pseudoxml")
+    publisher.process_command_line(options)
+    settings = publisher.settings
+    if not settings.embed_package:
+        pdf.prepare_package(
+            pdf.CompileOptions(force_install_package=settings.force_install_package)
+        )
+    pdf.get_fonts(tuple(writer.resolve_font_paths(settings)))
+
+
+def run(
+    jobs: list[Job],
+    writer_name: str,
+    options: list[str],
+    max_workers: int | None = None,
+    force: bool = False,
+    executor: str | None = None,
+    stamps: dict[str, dict] | None = None,
+):
+    """Run jobs across workers, and yield results as they are completed.
+
+    :param executor: Kind of workers (``processes`` or ``threads``).
+                     Default is decided by writer (see :data:`EXECUTORS`).
+    :param stamps: Stamps of outputs that were written by previous runs (see :func:`load_stamps`).
+                   Jobs that have outputs from current inputs are skipped,
+                   and stamps are updated by results.
+    """
+    if stamps is None:
+        stamps = {}
+    key = settings_key(writer_name, options)
+    pending = []
+    for job in jobs:
+        if not force and job.is_up_to_date(key, stamps.get(str(job.destination))):
+            yield Result(job, skipped=True)
+        else:
+            pending.append(job)
+    if not pending:
+        return
+    pool: Executor
+    threads = (executor or EXECUTORS[writer_name]) == "threads"
+    if threads:
+        prepare(writer_name, options)
+        pool = ThreadPoolExecutor(max_workers, thread_name_prefix="rst2typst")
+    else:
+        pool = ProcessPoolExecutor(max_workers=max_workers)
+    with pool:
+        futures = {
+            pool.submit(convert, job, writer_name, options, not threads): job
+            for job in pending
+        }
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except BrokenExecutor as err:
+                # Worker process is terminated abruptly (for example, killed by OOM killer).
+                result = Result(futures[future], error=f"{type(err).__name__}: {err}")
+            destination = str(result.job.destination)
+            if result.ok:
+                stamps[destination] = {"key": key, "inputs": result.inputs}
+            else:
+                stamps.pop(destination, None)
+            yield result
+
+
+def positive_int(value: str) -> int:
+    """Convert option value into integer that is 1 or more (type of argparse)."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: {value!r}") from None
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be 1 or more: {value}")
+    return number
+
+
+def build_parser(prog: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Convert many reStructuredText files at once.",
+        epilog="Options after '--' are passed to writer for each file.",
+    )
+    parser.add_argument(
+        "inputs", nargs="+", help="Source files, directories or glob patterns."
+    )
+    parser.add_argument(
+        "-o", "--out-dir", required=True, type=Path, help="Directory to write outputs."
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=positive_int,
+        default=os.cpu_count(),
+        help="Number of workers (default: number of CPUs).",
+    )
+    parser.add_argument(
+        "--executor",
+        choices=["processes", "threads"],
+        help="Kind of workers (default: threads for PDF, processes for others).",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Convert all sources even if outputs are up to date.",
+    )
+    return parser
+
+
+def main(argv: list[str], writer_name: str, prog: str = "rst2typst-batch") -> int:
+    """Entrypoint of batch mode.
+
+    :returns: Exit status. It is ``1`` when any file is failed.
+    """
+    options: list[str] = []
+    if "--" in argv:
+        idx = argv.index("--")
+        argv, options = argv[:idx], argv[idx + 1 :]
+    args = build_parser(prog).parse_args(argv)
+    jobs = collect_jobs(args.inputs, args.out_dir, WRITERS[writer_name][1])
+
+    start = time.perf_counter()
+    counts = {"converted": 0, "skipped": 0, "failed": 0}
+    stamps = load_stamps(args.out_dir)
+    results = run(
+        jobs, writer_name, options, args.jobs, args.force, args.executor, stamps
+    )
+    for result in results:
+        if result.skipped:
+            counts["skipped"] += 1
+            print(f"SKIPPED: {result.job.source}", file=sys.stderr)
+        elif result.ok:
+            counts["converted"] += 1
+            print(
+                f"OK: {result.job.source} -> {result.job.destination}"
+                f" ({result.elapsed:.2f}s)",
+                file=sys.stderr,
+            )
+        else:
+            counts["failed"] += 1
+            print(f"FAILED: {result.job.source}\n{result.error}", file=sys.stderr)
+    if counts["converted"] or counts["failed"]:
+        save_stamps(args.out_dir, stamps)
+    summary = ", ".join(f"{v} {k}" for k, v in counts.items())
+    print(f"{summary} in {time.perf_counter() - start:.2f}s", file=sys.stderr)
+    return 1 if counts["failed"] else 0
@@ -0,0 +1,208 @@
+"""Content-addressed cache of conversion results.
+
+Entries are stored as files named by digest of inputs of conversion.
+When inputs are not changed, stored output is used without parsing, translating and compiling.
+
+* Writing entry is atomic (it writes temporary file and renames it),
+  so that multiple processes can share same cache directory.
+* Entry records size and modified time of files that conversion read
+  (for example, included files and images).
+  When they are changed, entry is treated as missing.
+* Entries are evicted by least-recently-used order when total size is over the limit.
+  Total size is checked on sampled writes, because it scans whole directory.
+  Reading entry updates its modified time to mark as used.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import random
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from .package import get_version, hash_package, package_dir
+
+if TYPE_CHECKING:
+    from collections.abc import Iterable
+    from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_SIZE = 512 * 1024 * 1024
+"""Default limit of total size of cache entries (512 MiB)."""
+
+EVICT_INTERVAL = 32
+"""Average count of writes between checks of total size."""
+
+SETTINGS = (
+    "auto_id_prefix",
+    "character_level_inline_markup",
+    "datestamp",
+    "docinfo_xform",
+    "doctitle_xform",
+    "file_insertion_enabled",
+    "footnote_backlinks",
+    "generator",
+    "id_prefix",
+    "input_encoding",
+    "input_encoding_error_handler",
+    "language_code",
+    "line_length_limit",
+    "pep_base_url",
+    "pep_file_url_template",
+    "pep_references",
+    "raw_enabled",
+    "report_level",
+    "rfc_base_url",
+    "rfc_references",
+    "sectnum_xform",
+    "sectsubtitle_xform",
+    "smart_quotes",
+    "smartquotes_locales",
+    "source_link",
+    "source_url",
+    "strip_classes",
+    "strip_comments",
+    "strip_elements_with_classes",
+    "syntax_highlight",
+    "tab_width",
+    "title",
+    "toc_backlinks",
+    "trim_footnote_reference_space",
+)
+"""Settings of docutils (reader, parser and transforms) that affect output."""
+
+
+def settings_items(settings) -> dict[str, Any]:
+    """Collect values of docutils settings that affect output, as parts of cache key."""
+    return {name: getattr(settings, name, None) for name in SETTINGS}
+
+
+def stat_files(paths: Iterable[str]) -> dict[str, list[int]]:
+    """Collect size and modified time of files. Missing files are recorded as ``[-1, -1]``."""
+    stats = {}
+    for path in paths:
+        try:
+            st = os.stat(path)
+            stats[path] = [st.st_size, st.st_mtime_ns]
+        except OSError:
+            stats[path] = [-1, -1]
+    return stats
+
+
+def build_key(source: bytes, items: dict[str, Any]) -> str:
+    """Compute cache key of conversion.
+
+    :param source: Bytes of source document.
+    :param items: Values that affect output (for example, writer settings).
+                  It must be serializable as JSON.
+    """
+    digest = hashlib.sha256()
+    header = {
+        "version": get_version(),
+        "package": hash_package(package_dir),
+        "items": items,
+    }
+    digest.update(json.dumps(header, sort_keys=True, default=str).encode())
+    digest.update(b"\0")
+    digest.update(source)
+    return digest.hexdigest()
+
+
+class ConversionCache:
+    """On-disk store of conversion outputs.
+
+    Entry is JSON line of metadata and bytes of output.
+
+    :param evict_interval: Average count of writes between checks of total size.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str,
+        max_size: int = DEFAULT_MAX_SIZE,
+        evict_interval: int = EVICT_INTERVAL,
+    ):
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.evict_interval = evict_interval
+
+    def _entry_path(self, key: str) -> Path:
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> tuple[bytes, list[str]] | None:
+        """Retrieve stored output and dependencies.
+
+        It returns ``None`` when entry does not exist or dependencies are changed.
+        """
+        path = self._entry_path(key)
+        try:
+            with path.open("rb") as fp:
+                meta = json.loads(fp.readline())
+                data = fp.read()
+            os.utime(path)
+        except FileNotFoundError:
+            logger.debug("Cache miss: %s", key)
+            return None
+        except ValueError:
+            logger.debug("Cache entry is broken: %s", key)
+            return None
+        dependencies = meta["dependencies"]
+        if stat_files(dependencies) != dependencies:
+            logger.debug("Cache entry is outdated: %s", key)
+            return None
+        logger.debug("Cache hit: %s", key)
+        return data, list(dependencies)
+
+    def put(self, key: str, data: bytes, dependencies: Iterable[str] = ()):
+        """Store output, and evict old entries if total size is over the limit.
+
+        :param dependencies: Paths of files that conversion read except source.
+        """
+        path = self._entry_path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"dependencies": stat_files(os.path.abspath(p) for p in dependencies)}
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as fp:
+                fp.write(json.dumps(meta).encode() + b"\n")
+                fp.write(data)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+        if random.randrange(self.evict_interval) == 0:
+            self.evict()
+
+    def entries(self) -> list[tuple[Path, os.stat_result]]:
+        """List all entries with stat results."""
+        entries = []
+        if not self.directory.exists():
+            return entries
+        for shard in os.scandir(self.directory):
+            if not shard.is_dir():
+                continue
+            for entry in os.scandir(shard.path):
+                if entry.name.startswith(".tmp-"):
+                    continue
+                try:
+                    entries.append((Path(entry.path), entry.stat()))
+                except FileNotFoundError:
+                    continue
+        return entries
+
+    def evict(self):
+        """Remove least-recently-used entries until total size is under the limit."""
+        entries = self.entries()
+        total = sum(st.st_size for _, st in entries)
+        if total <= self.max_size:
+            return
+        for path, st in sorted(entries, key=lambda e: e[1].st_mtime):
+            path.unlink(missing_ok=True)
+            total -= st.st_size
+            if total <= self.max_size:
+                break
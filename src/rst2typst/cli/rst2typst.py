@@ -1,8 +1,7 @@
 """CLI Entrypoint (rst2typst)."""
 
-from docutils.core import publish_cmdline
-
 from .. import Writer
+from ..core import publish_cmdline
 
 
 def main():
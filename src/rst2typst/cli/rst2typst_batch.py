@@ -0,0 +1,9 @@
+"""CLI Entrypoint (rst2typst-batch)."""
+
+import sys
+
+from ..batch import main as batch_main
+
+
+def main():
+    sys.exit(batch_main(sys.argv[1:], "typst", prog="rst2typst-batch"))
@@ -0,0 +1,9 @@
+"""CLI Entrypoint (rst2typst-serve)."""
+
+import sys
+
+from ..server import main as server_main
+
+
+def main():
+    sys.exit(server_main(sys.argv[1:], prog="rst2typst-serve"))
@@ -1,7 +1,6 @@
 """CLI Entrypoint (rst2typstpdf)."""
 
-from docutils.core import publish_cmdline
-
+from ..core import publish_cmdline
 from ..pdf import Writer
 
 
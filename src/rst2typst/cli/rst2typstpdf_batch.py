@@ -0,0 +1,9 @@
+"""CLI Entrypoint (rst2typstpdf-batch)."""
+
+import sys
+
+from ..batch import main as batch_main
+
+
+def main():
+    sys.exit(batch_main(sys.argv[1:], "pdf", prog="rst2typstpdf-batch"))
@@ -0,0 +1,222 @@
+"""Publishing helpers on top of ``docutils.core``."""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from docutils.core import Publisher
+
+from . import timings
+from .cache import DEFAULT_MAX_SIZE, ConversionCache, build_key, settings_items
+
+if TYPE_CHECKING:
+    from typing import Any
+
+    from .writer import Writer
+
+WATCH_INTERVAL = 0.3
+"""Interval in seconds to poll changes of files on watch mode."""
+
+
+def _setup_publisher(
+    writer: Writer,
+    argv: list[str] | None,
+    settings_overrides: dict[str, Any] | None = None,
+) -> Publisher:
+    publisher = Publisher(writer=writer)
+    publisher.set_components("standalone", "restructuredtext", "pseudoxml")
+    publisher.process_command_line(argv)
+    # NOTE: They are set after parsing, because parser processes its defaults as options
+    # (for example, path of ``warning_stream`` is made absolute).
+    for name, value in (settings_overrides or {}).items():
+        setattr(publisher.settings, name, value)
+    publisher.set_io()
+    return publisher
+
+
+def publish_cmdline(
+    writer: Writer,
+    argv: list[str] | None = None,
+    settings_overrides: dict[str, Any] | None = None,
+):
+    """Set up and run publisher for command-line-based file I/O.
+
+    This works as same as :func:`docutils.core.publish_cmdline`,
+    and it uses conversion cache when ``--cache-dir`` is set.
+    On cache hit, it writes stored output into destination without parsing source.
+    When ``--timings`` is set, it measures parsing and transforms in addition to phases of writer.
+    When ``--watch`` is set, it publishes again each time when inputs are changed.
+
+    :param settings_overrides: Settings that override options in ``argv``
+                               (for example, stream object for ``warning_stream``).
+    """
+    publisher = _setup_publisher(writer, argv, settings_overrides)
+    if publisher.settings.watch:
+        return watch(writer, argv, publisher, settings_overrides=settings_overrides)
+    return _publish(writer, publisher)
+
+
+def _publish(writer: Writer, publisher: Publisher):
+    settings = publisher.settings
+    recorded = timings.get_timings(settings)
+    if recorded is None:
+        return _publish_with_cache(writer, publisher)
+
+    import tracemalloc
+
+    trace = settings.timings_memory and not tracemalloc.is_tracing()
+    if trace:
+        tracemalloc.start()
+    _instrument(publisher)
+    try:
+        return _publish_with_cache(writer, publisher)
+    finally:
+        if trace:
+            tracemalloc.stop()
+        report_timings(settings, recorded)
+
+
+def _instrument(publisher: Publisher):
+    """Wrap parsing and transforms of publisher to measure them."""
+    settings = publisher.settings
+    read = publisher.reader.read
+    apply_transforms = publisher.apply_transforms
+
+    def _read(*args, **kwargs):
+        with timings.phase(settings, "parse"):
+            return read(*args, **kwargs)
+
+    def _apply_transforms():
+        with timings.phase(settings, "transforms"):
+            return apply_transforms()
+
+    publisher.reader.read = _read
+    publisher.apply_transforms = _apply_transforms
+
+
+def report_timings(settings, recorded: timings.Timings):
+    """Print summary of timings into stderr, or write them into JSON file."""
+    if not settings.timings:
+        return
+    if settings.timings == "summary":
+        print(recorded.summary(), file=sys.stderr)
+        return
+    data = {"source": settings._source, "phases": recorded.as_dicts()}
+    Path(settings.timings).write_text(json.dumps(data, indent=2))
+
+
+def _publish_with_cache(writer: Writer, publisher: Publisher):
+    settings = publisher.settings
+    source_path = settings._source
+    if not settings.cache_dir or settings.stream_output or source_path in (None, "-"):
+        return publisher.publish(enable_exit_status=True)
+
+    with timings.phase(settings, "cache"):
+        cache = ConversionCache(
+            settings.cache_dir, settings.cache_max_size or DEFAULT_MAX_SIZE
+        )
+        items = writer.cache_key_items(settings) | {
+            "source": os.path.abspath(source_path),
+            "cwd": os.getcwd(),
+            "settings": settings_items(settings),
+        }
+        key = build_key(Path(source_path).read_bytes(), items)
+        entry = cache.get(key)
+    if entry is not None:
+        data, dependencies = entry
+        settings.record_dependencies.add(*dependencies)
+        return publisher.destination.write(data)
+
+    output = publisher.publish(enable_exit_status=True)
+    data = writer.output
+    if isinstance(data, str):
+        data = data.encode(
+            settings.output_encoding, settings.output_encoding_error_handler
+        )
+    if data is not None:
+        cache.put(key, data, settings.record_dependencies.list)
+    return output
+
+
+def snapshot(paths: list[str | Path]) -> dict[str, int]:
+    """Collect modified times of files.
+
+    Directories are walked recursively, and paths that cannot be read are recorded as ``-1``.
+    """
+    mtimes: dict[str, int] = {}
+    for path in paths:
+        path = str(path)
+        if os.path.isdir(path):
+            mtimes[path] = os.stat(path).st_mtime_ns
+            for root, dirs, files in os.walk(path):
+                for name in dirs + files:
+                    child = os.path.join(root, name)
+                    try:
+                        mtimes[child] = os.stat(child).st_mtime_ns
+                    except OSError:
+                        continue
+            continue
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            # Path may be invalid for file system (for example, too long name).
+            mtimes[path] = -1
+    return mtimes
+
+
+def watch(
+    writer: Writer,
+    argv: list[str] | None = None,
+    publisher: Publisher | None = None,
+    interval: float = WATCH_INTERVAL,
+    max_builds: int | None = None,
+    settings_overrides: dict[str, Any] | None = None,
+):
+    """Publish document, and publish it again each time when inputs are changed.
+
+    Inputs are source, files that are recorded as dependencies (for example, included files)
+    and paths from :meth:`Writer.watch_paths <rst2typst.writer.Writer.watch_paths>`.
+    Process keeps imported modules, compilers and caches between builds.
+
+    :param max_builds: Count of builds to stop watching. It watches forever when it is ``None``.
+    """
+    builds = 0
+    dependencies: set[str] = set()
+    try:
+        while True:
+            if publisher is None:
+                publisher = _setup_publisher(writer, argv, settings_overrides)
+            settings = publisher.settings
+            if settings._source in (None, "-"):
+                sys.exit("Watch mode requires path of source file.")
+            try:
+                _publish(writer, publisher)
+                print(f"Built: {settings._source}", file=sys.stderr)
+            except SystemExit as err:
+                print(f"Failed (exit {err.code}): {settings._source}", file=sys.stderr)
+            builds += 1
+            if max_builds is not None and builds >= max_builds:
+                return
+
+            dependencies.update(settings.record_dependencies.list)
+            paths = [settings._source, *sorted(dependencies)]
+            paths += writer.watch_paths(settings)
+            current = latest = snapshot(paths)
+            while latest == current:
+                time.sleep(interval)
+                latest = snapshot(paths)
+            writer.invalidate(
+                {
+                    p
+                    for p in latest.keys() | current.keys()
+                    if latest.get(p) != current.get(p)
+                }
+            )
+            publisher = None
+    except KeyboardInterrupt:
+        return
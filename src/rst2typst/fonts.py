@@ -0,0 +1,73 @@
+"""Font helpers for PDF generation.
+
+This module provides two features.
+
+* Process-wide font set of Typst, that is shared by compilers of threads.
+* Signature of font files in custom font directories (for cache key).
+
+.. note::
+
+   There is no persistent index of fonts across processes.
+   typst-py scans font directories by itself and cannot load font book that is built outside of it,
+   so that each process parses system fonts and fonts in ``font_paths`` once.
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import typst
+
+logger = logging.getLogger(__name__)
+
+FONT_SUFFIXES = {".ttf", ".otf", ".ttc", ".otc"}
+"""Suffixes of files that are treated as font."""
+
+
+@functools.lru_cache(maxsize=8)
+def get_fonts(font_paths: tuple[str, ...] = ()) -> typst.Fonts:
+    """Retrieve font set of Typst shared in the process.
+
+    It includes system fonts, embedded fonts of Typst and fonts in ``font_paths``.
+
+    :param font_paths: Directories where custom fonts are stored.
+    """
+    import typst
+
+    return typst.Fonts(True, True, font_paths=list(font_paths))
+
+
+def _list_font_files(directory: Path) -> dict[str, os.stat_result]:
+    files = {}
+    for root, _, names in os.walk(directory, followlinks=True):
+        for name in names:
+            path = Path(root) / name
+            if path.suffix.lower() not in FONT_SUFFIXES:
+                continue
+            try:
+                files[path.relative_to(directory).as_posix()] = path.stat()
+            except OSError:
+                continue
+    return files
+
+
+def stamp_fonts(directories: list[str]) -> str:
+    """Compute signature of font files in directories from their size and modified time.
+
+    It does not read files, so that it is cheap to check whether fonts are changed.
+    """
+    stamps = {
+        directory: [
+            (relpath, st.st_size, st.st_mtime_ns)
+            for relpath, st in sorted(_list_font_files(Path(directory)).items())
+        ]
+        for directory in directories
+    }
+    return hashlib.sha256(json.dumps(stamps).encode()).hexdigest()
@@ -0,0 +1,214 @@
+"""Preprocessing of raster images for PDF.
+
+When ``--optimize-images`` is set, images are downscaled to fit rendered width
+at target DPI and recompressed by Pillow before compiling.
+Derivatives are stored into directory named by digest of content of original and parameters,
+so that repeat builds reuse them without decoding originals.
+Digests are also stored for path, modified time and size of originals,
+so that unchanged originals are not read.
+
+* Directory of derivatives must be under current directory,
+  because Typst compiler reads files only under its root (current directory).
+* Formats other than PNG and JPEG (for example, SVG and GIF) are not changed.
+* DPI of downscaled images is scaled too, so that their natural size is kept
+  (for images that have no explicit width).
+* This requires Pillow (``rst2typst[images]``).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import TYPE_CHECKING, ClassVar
+
+from docutils import nodes
+
+from .transforms import NodeTransform
+
+if TYPE_CHECKING:
+    from typing import Any
+
+DEFAULT_DPI = 150
+DEFAULT_CACHE_DIR = ".rst2typst-images"
+
+TEXT_WIDTH = 453.5
+"""Width of text area of default Typst page (A4 with default margins) in points."""
+
+FONT_SIZE = 11.0
+"""Default font size of Typst in points (for ``em``)."""
+
+JPEG_QUALITY = 85
+
+NATURAL_DPI = 72.0
+"""DPI that Typst assumes for images without DPI metadata."""
+
+_FORMATS = {"JPEG": ".jpg", "PNG": ".png"}
+_LENGTH = re.compile(r"^\s*([0-9.]+)\s*(%|pt|px|mm|cm|in|em)?\s*$")
+_POINTS = {"pt": 1.0, "px": 0.75, "mm": 72 / 25.4, "cm": 72 / 2.54, "in": 72.0}
+
+
+def width_in_points(width: str | None) -> float:
+    """Compute rendered width of image in points from ``width`` option.
+
+    Unknown or missing value is regarded as full width of text area.
+    """
+    match = _LENGTH.match(width or "")
+    if not match:
+        return TEXT_WIDTH
+    value, unit = float(match.group(1)), match.group(2) or "px"
+    if unit == "%":
+        return TEXT_WIDTH * value / 100
+    if unit == "em":
+        return FONT_SIZE * value
+    return value * _POINTS[unit]
+
+
+class ImageCache:
+    """Store of derivatives of images.
+
+    :param directory: Directory to store derivatives.
+    :param dpi: Resolution of derivatives for rendered width.
+    """
+
+    def __init__(self, directory: str | Path, dpi: int = DEFAULT_DPI):
+        self.directory = Path(directory)
+        self.dpi = dpi
+
+    def prepare(self, path: Path, width: str | None = None) -> Path | None:
+        """Retrieve derivative of image, or create it when it does not exist.
+
+        :param path: Path of original image.
+        :param width: ``width`` option of image.
+        :returns: Path of derivative. It is ``None`` when image is not target of optimization.
+        """
+        pixels = max(1, round(width_in_points(width) / 72 * self.dpi))
+        digest = self._digest(path)
+        # Derivatives of same image for different widths are stored side by side.
+        for suffix in _FORMATS.values():
+            found = self.directory / digest[:2] / f"{digest}-{pixels}{suffix}"
+            if found.exists():
+                return found
+        marker = self.directory / digest[:2] / f"{digest}-{pixels}.skip"
+        if marker.exists():
+            return None
+        return self._create(path, digest, pixels, marker)
+
+    def _digest(self, path: Path) -> str:
+        """Retrieve digest of content of image.
+
+        Digest is stored for path, modified time and size of image,
+        so that image is hashed only when it is changed.
+        """
+        st = path.stat()
+        stamp = f"{path.resolve()}\0{st.st_mtime_ns}\0{st.st_size}"
+        key = hashlib.sha256(stamp.encode()).hexdigest()
+        stamp_path = self.directory / "stamps" / key[:2] / key
+        try:
+            return stamp_path.read_text()
+        except FileNotFoundError:
+            pass
+        digest = hashlib.sha256(path.read_bytes()).hexdigest()
+        stamp_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=stamp_path.parent)
+        with os.fdopen(fd, "w") as fp:
+            fp.write(digest)
+        os.replace(tmp, stamp_path)
+        return digest
+
+    def _create(
+        self, path: Path, digest: str, pixels: int, marker: Path
+    ) -> Path | None:
+        from PIL import Image, ImageOps
+
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        with Image.open(path) as image:
+            suffix = _FORMATS.get(image.format or "")
+            if suffix is None or getattr(image, "is_animated", False):
+                marker.touch()
+                return None
+            format = image.format
+            dpi = image.info.get("dpi") or (NATURAL_DPI, NATURAL_DPI)
+            image = ImageOps.exif_transpose(image)
+            resized = image.width > pixels
+            if resized:
+                ratio = pixels / image.width
+                height = max(1, round(image.height * ratio))
+                image = image.resize((pixels, height), Image.Resampling.LANCZOS)
+                dpi = (dpi[0] * ratio, dpi[1] * ratio)
+            options: dict[str, Any] = {"optimize": True, "dpi": dpi}
+            if format == "JPEG":
+                if image.mode not in ("RGB", "L", "CMYK"):
+                    image = image.convert("RGB")
+                options |= {"quality": JPEG_QUALITY, "progressive": True}
+            dest = marker.with_suffix(suffix)
+            fd, tmp = tempfile.mkstemp(dir=dest.parent, suffix=suffix)
+            os.close(fd)
+            try:
+                image.save(tmp, format=format, **options)
+                if not resized and os.path.getsize(tmp) >= path.stat().st_size:
+                    # Recompressed image is not smaller, so original is used as it is.
+                    Path(tmp).write_bytes(path.read_bytes())
+                os.chmod(tmp, 0o644)
+                os.replace(tmp, dest)
+            except BaseException:
+                Path(tmp).unlink(missing_ok=True)
+                raise
+        return dest
+
+
+class OptimizeImages(NodeTransform):
+    """Replace URIs of local raster images by derivatives.
+
+    Original URI is kept as ``original_uri`` attribute to record dependencies.
+    """
+
+    default_priority = 700
+    handlers: ClassVar[dict[type[nodes.Node], str]] = {nodes.image: "collect_image"}
+
+    def __init__(self, document, startnode=None):
+        super().__init__(document, startnode)
+        self._images: list[nodes.image] = []
+
+    def collect_image(self, node: nodes.image):
+        if "://" not in node["uri"]:
+            self._images.append(node)
+
+    def finalize(self):
+        settings = self.document.settings
+        if not getattr(settings, "optimize_images", False) or not self._images:
+            return
+        try:
+            import PIL  # noqa: F401
+        except ImportError:
+            self.document.reporter.warning(
+                "Pillow is required for --optimize-images (pip install 'rst2typst[images]')."
+            )
+            return
+        cwd = Path.cwd()
+        cache = ImageCache(
+            settings.image_cache_dir or DEFAULT_CACHE_DIR,
+            settings.image_dpi or DEFAULT_DPI,
+        )
+        for node in self._images:
+            uri = node["uri"]
+            path = Path(uri)
+            if not path.is_file():
+                continue
+            try:
+                derivative = cache.prepare(path, node.get("width"))
+            except OSError as err:
+                self.document.reporter.warning(f"Cannot optimize image {uri}: {err}")
+                continue
+            if derivative is None:
+                continue
+            relpath = os.path.relpath(derivative.resolve(), cwd)
+            if relpath.startswith(os.pardir):
+                self.document.reporter.warning(
+                    f"Cache directory of images must be under current directory: {derivative}"
+                )
+                return
+            node["original_uri"] = uri
+            node["uri"] = relpath.replace(os.sep, "/")
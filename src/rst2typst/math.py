@@ -0,0 +1,453 @@
+"""Native converter from LaTeX math to Typst math.
+
+It converts common subset of LaTeX math (symbols, scripts, fractions, roots,
+fonts, accents and text) at translation time,
+so that Typst does not run ``@preview/mitex`` for each formula on compile.
+When source has constructs that it does not support (for example, environments and macros),
+:func:`latex_to_typst` returns ``None`` and translator falls back to mitex.
+
+Results are cached in the process by LaTeX source.
+Names of symbols follow Typst 0.14 (minimum version of ``typst`` extra).
+"""
+
+from __future__ import annotations
+
+import functools
+import re
+
+CACHE_SIZE = 8192
+"""Max count of formulas in cache of :func:`latex_to_typst`."""
+
+SYMBOLS = {
+    # Greek letters
+    **{
+        name: name
+        for name in (
+            *("alpha", "beta", "gamma", "delta", "zeta", "eta", "theta", "iota"),
+            *("kappa", "lambda", "mu", "nu", "xi", "pi", "rho", "sigma", "tau"),
+            *("upsilon", "chi", "psi", "omega"),
+            *("Gamma", "Delta", "Theta", "Lambda", "Xi", "Pi", "Sigma"),
+            *("Upsilon", "Phi", "Psi", "Omega"),
+        )
+    },
+    "epsilon": "epsilon.alt",
+    "varepsilon": "epsilon",
+    "vartheta": "theta.alt",
+    "varkappa": "kappa.alt",
+    "varpi": "pi.alt",
+    "varrho": "rho.alt",
+    "varsigma": "sigma.alt",
+    "phi": "phi.alt",
+    "varphi": "phi",
+    # Binary operators
+    "pm": "plus.minus",
+    "mp": "minus.plus",
+    "times": "times",
+    "div": "div",
+    "cdot": "dot.op",
+    "ast": "ast",
+    "star": "star",
+    "circ": "compose",
+    "bullet": "bullet",
+    "cup": "union",
+    "cap": "inter",
+    "setminus": "without",
+    "oplus": "plus.o",
+    "ominus": "minus.o",
+    "otimes": "times.o",
+    "odot": "dot.o",
+    "wedge": "and",
+    "land": "and",
+    "vee": "or",
+    "lor": "or",
+    "neg": "not",
+    "lnot": "not",
+    # Relations
+    "leq": "lt.eq",
+    "le": "lt.eq",
+    "geq": "gt.eq",
+    "ge": "gt.eq",
+    "neq": "eq.not",
+    "ne": "eq.not",
+    "approx": "approx",
+    "equiv": "equiv",
+    "sim": "tilde.op",
+    "simeq": "tilde.eq",
+    "cong": "tilde.equiv",
+    "propto": "prop",
+    "ll": "lt.double",
+    "gg": "gt.double",
+    "subset": "subset",
+    "subseteq": "subset.eq",
+    "supset": "supset",
+    "supseteq": "supset.eq",
+    "in": "in",
+    "notin": "in.not",
+    "ni": "in.rev",
+    "perp": "perp",
+    "parallel": "parallel",
+    "mid": "divides",
+    "models": "models",
+    "vdash": "tack.r",
+    # Arrows
+    "to": "arrow.r",
+    "rightarrow": "arrow.r",
+    "leftarrow": "arrow.l",
+    "gets": "arrow.l",
+    "leftrightarrow": "arrow.l.r",
+    "Rightarrow": "arrow.r.double",
+    "Leftarrow": "arrow.l.double",
+    "Leftrightarrow": "arrow.l.r.double",
+    "longrightarrow": "arrow.r.long",
+    "implies": "arrow.r.double.long",
+    "iff": "arrow.l.r.double.long",
+    "mapsto": "arrow.r.bar",
+    "uparrow": "arrow.t",
+    "downarrow": "arrow.b",
+    # Big operators
+    "sum": "sum",
+    "prod": "product",
+    "coprod": "product.co",
+    "int": "integral",
+    "iint": "integral.double",
+    "iiint": "integral.triple",
+    "oint": "integral.cont",
+    "bigcup": "union.big",
+    "bigcap": "inter.big",
+    # Others
+    "infty": "infinity",
+    "partial": "partial",
+    "nabla": "nabla",
+    "forall": "forall",
+    "exists": "exists",
+    "emptyset": "emptyset",
+    "varnothing": "emptyset",
+    "hbar": "planck",
+    "ell": "ell",
+    "Re": "Re",
+    "Im": "Im",
+    "aleph": "aleph",
+    "angle": "angle",
+    "triangle": "triangle.t",
+    "ldots": "dots.h",
+    "dots": "dots.h",
+    "cdots": "dots.c",
+    "vdots": "dots.v",
+    "ddots": "dots.down",
+    "prime": "prime",
+    "degree": "degree",
+    "langle": "chevron.l",
+    "rangle": "chevron.r",
+    "lfloor": "floor.l",
+    "rfloor": "floor.r",
+    "lceil": "ceil.l",
+    "rceil": "ceil.r",
+    "vert": "bar.v",
+    "Vert": "bar.v.double",
+    "|": "bar.v.double",
+    "lbrace": "\\{",
+    "rbrace": "\\}",
+    # Spaces
+    ",": "thin",
+    ":": "med",
+    ";": "thick",
+    " ": "thin",
+    "!": "",
+    "quad": "quad",
+    "qquad": "wide",
+    # Escaped characters
+    "{": "\\{",
+    "}": "\\}",
+    "%": "\\%",
+    "_": "\\_",
+    "#": "\\#",
+    "$": "\\$",
+    "&": "\\&",
+}
+"""Commands that are converted into Typst symbols."""
+
+OPERATORS = frozenset(
+    {
+        *("arccos", "arcsin", "arctan", "arg", "cos", "cosh", "cot", "coth"),
+        *("csc", "deg", "det", "dim", "exp", "gcd", "hom", "inf", "ker", "lg"),
+        *("lim", "liminf", "limsup", "ln", "log", "max", "min", "Pr", "sec"),
+        *("sin", "sinh", "sup", "tan", "tanh"),
+    }
+)
+"""Commands of operator names that Typst has as same name."""
+
+FUNCTIONS = {
+    # Fonts
+    "mathbf": "bold",
+    "boldsymbol": "bold",
+    "mathit": "italic",
+    "mathbb": "bb",
+    "mathcal": "cal",
+    "mathfrak": "frak",
+    "mathsf": "sans",
+    "mathrm": "upright",
+    # Accents
+    "hat": "hat",
+    "widehat": "hat",
+    "tilde": "tilde",
+    "widetilde": "tilde",
+    "bar": "macron",
+    "overline": "overline",
+    "underline": "underline",
+    "vec": "arrow",
+    "dot": "dot",
+    "ddot": "dot.double",
+    "breve": "breve",
+    "acute": "acute",
+    "grave": "grave",
+    "check": "caron",
+}
+"""Commands that take one argument and are converted into Typst functions."""
+
+TEXTS = frozenset({"text", "textrm", "mbox", "operatorname"})
+"""Commands that take text argument."""
+
+_TOKEN = re.compile(
+    r"\\(?P<command>[a-zA-Z]+|.)"
+    r"|(?P<space>\s+)"
+    r"|(?P<number>\d+(?:\.\d+)?)"
+    r"|(?P<letter>[a-zA-Z])"
+    r"|(?P<char>.)",
+    re.DOTALL,
+)
+
+# Characters that are written as same in Typst math.
+_CHARS = frozenset("+-=<>()[],.;:!|*'?")
+# Characters that must be escaped in arguments of function calls.
+_ARG_ESCAPES = {",": "\\,", ";": "\\;", ":": "\\:"}
+_PAIRS = {"(": ")", "[": "]"}
+
+
+class Unsupported(Exception):
+    """Source has constructs that converter does not support."""
+
+
+class _Parser:
+    def __init__(self, source: str):
+        self.source = source
+        # Kind, value and span of tokens except spaces.
+        self.tokens = [
+            (m.lastgroup, m.group(m.lastgroup), m.span())
+            for m in _TOKEN.finditer(source)
+            if m.lastgroup != "space"
+        ]
+        self.pos = 0
+
+    def peek(self) -> tuple[str | None, str]:
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos][:2]  # type: ignore[return-value]
+        return None, ""
+
+    def next(self) -> tuple[str, str]:
+        if self.pos >= len(self.tokens):
+            raise Unsupported("Unexpected end")
+        kind, value, _ = self.tokens[self.pos]
+        self.pos += 1
+        return kind, value  # type: ignore[return-value]
+
+    def parse(self) -> str:
+        result = self.expression(in_group=False)
+        if self.pos < len(self.tokens):
+            raise Unsupported("Unbalanced braces")
+        return result
+
+    def expression(self, in_group: bool, in_call: bool = False) -> str:
+        """Parse atoms until end of source or closing brace of group."""
+        return " ".join(self.atoms(in_group, in_call))
+
+    def atoms(self, in_group: bool, in_call: bool) -> list[str]:
+        atoms: list[str] = []
+        while True:
+            kind, value = self.peek()
+            if kind is None:
+                if in_group:
+                    raise Unsupported("Unclosed group")
+                break
+            if kind == "char" and value == "}":
+                if not in_group:
+                    raise Unsupported("Unbalanced braces")
+                self.pos += 1
+                break
+            if kind == "char" and value == "'" and atoms:
+                self.pos += 1
+                atoms[-1] += "'"
+                continue
+            atom = self.atom(in_call)
+            if atom:
+                atoms.append(atom)
+        return atoms
+
+    def atom(self, in_call: bool) -> str:
+        """Parse primary with scripts."""
+        kind, value = self.peek()
+        grouped = False
+        if kind == "char" and value == "{":
+            self.pos += 1
+            atoms = self.atoms(in_group=True, in_call=in_call)
+            base, grouped = " ".join(atoms), len(atoms) > 1
+        else:
+            base = self.primary(in_call)
+        while True:
+            kind, value = self.peek()
+            if kind != "char" or value not in "^_":
+                return base
+            if not base:
+                raise Unsupported("Script without base")
+            if grouped:
+                # LaTeX attaches scripts to whole group,
+                # but Typst has no invisible group for base.
+                raise Unsupported("Scripts of group")
+            self.pos += 1
+            base += f"{value}({_balanced(self.argument())})"
+
+    def argument(self) -> str:
+        """Parse argument of command or script (group or single token)."""
+        kind, value = self.peek()
+        if kind == "char" and value == "{":
+            self.pos += 1
+            return self.expression(in_group=True, in_call=True)
+        if kind == "char" and value in "^_}":
+            raise Unsupported("Missing argument")
+        if kind == "number" and len(value) > 1:
+            self.split_number()
+        return self.primary(in_call=True)
+
+    def split_number(self):
+        """Split first digit from number token.
+
+        Argument without braces is single character in LaTeX
+        (for example, ``\\frac12`` is ``\\frac{1}{2}`` and ``x^23`` is ``x^{2}3``).
+        """
+        _, value, (start, _) = self.tokens[self.pos]
+        rest = [
+            (
+                m.lastgroup,
+                m.group(m.lastgroup),
+                (start + 1 + m.start(), start + 1 + m.end()),
+            )
+            for m in _TOKEN.finditer(value[1:])
+        ]
+        self.tokens[self.pos : self.pos + 1] = [
+            ("number", value[0], (start, start + 1)),
+            *rest,
+        ]
+
+    def text_argument(self) -> str:
+        """Read raw text of group for text commands."""
+        kind, value = self.next()
+        if kind != "char" or value != "{":
+            raise Unsupported("Text command requires group")
+        start = self.tokens[self.pos - 1][2][1]
+        depth = 1
+        while depth:
+            kind, value = self.next()
+            if kind == "char":
+                depth += {"{": 1, "}": -1}.get(value, 0)
+        text = self.source[start : self.tokens[self.pos - 1][2][0]]
+        if "\\" in text:
+            raise Unsupported("Commands in text")
+        return text
+
+    def primary(self, in_call: bool) -> str:
+        kind, value = self.next()
+        if kind in ("number", "letter"):
+            return value
+        if kind == "char":
+            if value == "{":
+                return self.expression(in_group=True, in_call=in_call)
+            if value == "/":
+                return "slash"
+            if value == "~":
+                return "space"
+            if value in _CHARS:
+                return _ARG_ESCAPES.get(value, value) if in_call else value
+            raise Unsupported(f"Character {value!r}")
+        return self.command(value, in_call)
+
+    def command(self, name: str, in_call: bool) -> str:
+        if name in SYMBOLS:
+            return SYMBOLS[name]
+        if name in OPERATORS:
+            return name
+        if name in FUNCTIONS:
+            return f"{FUNCTIONS[name]}({_balanced(self.argument())})"
+        if name in TEXTS:
+            text = _quote(self.text_argument())
+            return f"op({text})" if name == "operatorname" else text
+        if name in ("frac", "dfrac", "tfrac"):
+            numerator = _balanced(self.argument())
+            denominator = _balanced(self.argument())
+            return f"frac({numerator}, {denominator})"
+        if name == "sqrt":
+            kind, value = self.peek()
+            if kind == "char" and value == "[":
+                self.pos += 1
+                index = self.until("]")
+                return f"root({index}, {_balanced(self.argument())})"
+            return f"sqrt({_balanced(self.argument())})"
+        if name in ("left", "right", "big", "Big", "bigg", "Bigg"):
+            kind, value = self.next()
+            if kind == "char" and value == ".":
+                return ""
+            if kind == "char" and value in "()[]|":
+                return _ARG_ESCAPES.get(value, value) if in_call else value
+            if kind == "command":
+                return self.command(value, in_call)
+            raise Unsupported(f"Delimiter {value!r}")
+        raise Unsupported(f"Command \\{name}")
+
+    def until(self, closing: str) -> str:
+        """Parse atoms until closing character (for optional argument)."""
+        atoms = []
+        while True:
+            kind, value = self.peek()
+            if kind == "char" and value == closing:
+                self.pos += 1
+                return _balanced(" ".join(atoms))
+            if kind is None:
+                raise Unsupported(f"Missing {closing!r}")
+            atoms.append(self.atom(in_call=True))
+
+
+def _quote(text: str) -> str:
+    return '"' + text.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _balanced(code: str) -> str:
+    """Check that delimiters are balanced, because argument is wrapped by call."""
+    stack: list[str] = []
+    escaped = False
+    quoted = False
+    for char in code:
+        if escaped:
+            escaped = False
+        elif char == "\\":
+            escaped = True
+        elif char == '"':
+            quoted = not quoted
+        elif quoted:
+            continue
+        elif char in _PAIRS:
+            stack.append(_PAIRS[char])
+        elif char in ")]" and (not stack or stack.pop() != char):
+            raise Unsupported("Unbalanced delimiters in argument")
+    if stack:
+        raise Unsupported("Unbalanced delimiters in argument")
+    return code
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
+def latex_to_typst(source: str) -> str | None:
+    """Convert LaTeX math into Typst math markup (without ``$``).
+
+    :returns: Converted markup, or ``None`` when source is not supported.
+    """
+    try:
+        return _Parser(source).parse()
+    except Unsupported:
+        return None
@@ -0,0 +1,107 @@
+"""Memoization of translated sections.
+
+Translator stores Typst code of each top-level section with key computed from
+structure of section subtree and translator state.
+When same section is translated again in the process (for example, on watch mode),
+stored code is spliced into body without walking the subtree.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from docutils import nodes
+
+if TYPE_CHECKING:
+    from typing import Any
+
+    from .package import PackageRegistry
+
+DEFAULT_MAX_ENTRIES = 4096
+"""Default limit of count of sections in cache."""
+
+
+def structural_hash(node: nodes.Node, items: dict[str, Any] | None = None) -> str:
+    """Compute digest of subtree.
+
+    It updates digest by tag name, sorted attributes, count of children
+    and text of all nodes in subtree (preorder).
+
+    :param node: Root of subtree.
+    :param items: Additional values that affect output (for example, translator state).
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if items:
+        digest.update(repr(sorted(items.items())).encode())
+    stack: list[nodes.Node] = [node]
+    while stack:
+        current = stack.pop()
+        if isinstance(current, nodes.Text):
+            digest.update(b"\0#text\0")
+            digest.update(current.encode("utf-8", "surrogatepass"))
+            continue
+        assert isinstance(current, nodes.Element)
+        digest.update(b"\0")
+        digest.update(current.tagname.encode())
+        digest.update(repr(sorted(current.attributes.items())).encode())
+        digest.update(len(current.children).to_bytes(4, "little"))
+        stack.extend(reversed(current.children))
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class Entry:
+    """Translated section."""
+
+    code: str
+    packages: PackageRegistry
+    dependencies: tuple[str, ...] = ()
+    math_variables: tuple[tuple[str, str], ...] = ()
+    """Variables of math that are referred in section (on ``--dedupe-math``)."""
+
+
+class SectionCache:
+    """Bounded store of translated sections by least-recently-used order.
+
+    It can be shared by threads that translate documents concurrently.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, Entry] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Entry | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key: str, entry: Entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+
+section_cache = SectionCache()
+"""Cache shared in the process."""
@@ -2,26 +2,54 @@
 
 .. note:: In this module, "Package" means Typst package.
 
-This module provides two features.
+This module provides three features.
 
 * Package registry to manage packages and to render import statements.
 * Helper functions to install files as local package.
+* Helper functions to embed definitions of package into generated code.
 """
 
 from __future__ import annotations
 
+import contextlib
+import functools
+import hashlib
+import itertools
+import json
 import logging
+import os
+import re
 import shutil
+import tempfile
 from dataclasses import dataclass
-from importlib import metadata
 from pathlib import Path
+from stat import S_ISREG
+from typing import TYPE_CHECKING
 
-import platformdirs
+if TYPE_CHECKING:
+    from collections.abc import Iterable
 
 logger = logging.getLogger(__name__)
 
 package_dir = Path(__file__).parent / "package"
 
+_VERSION = re.compile(r'^version\s*=\s*"([^"]+)"', re.MULTILINE)
+
+
+@functools.cache
+def get_version() -> str:
+    """Retrieve version of rst2typst.
+
+    It is read from manifest of bundled Typst package that is released with same version,
+    because :func:`importlib.metadata.version` imports many modules and scans installed distributions.
+    """
+    matched = _VERSION.search((package_dir / "typst.toml").read_text())
+    if matched:
+        return matched[1]
+    from importlib import metadata
+
+    return metadata.version("rst2typst")
+
 
 def build_install_path(name: str, version: str | None = None) -> Path:
     """Retrieve path object of package Typst local package.
@@ -33,18 +61,95 @@ def build_install_path(name: str, version: str | None = None) -> Path:
     :param version: Version of package.
     """
 
+    import platformdirs
+
     if version is None:
-        version = metadata.version(name)
+        if name == "rst2typst":
+            version = get_version()
+        else:
+            from importlib import metadata
+
+            version = metadata.version(name)
     base_dir = platformdirs.user_data_path("typst", appauthor=False, roaming=True)
     target = Path(f"packages/local/{name}/{version}")
     return base_dir / target
 
 
+MANIFEST_NAME = ".rst2typst-manifest.json"
+"""Filename of manifest that is stored in installed package directory."""
+
+
+@functools.cache
+def build_manifest(source: Path) -> dict[str, str]:
+    """Compute digests for each file in package directory.
+
+    :param source: Source directory of Typst package.
+    :returns: Mapping of relative POSIX path and SHA-256 digest of file.
+    """
+    return {
+        path.relative_to(source).as_posix(): hashlib.sha256(
+            path.read_bytes()
+        ).hexdigest()
+        for path in sorted(source.rglob("*"))
+        if path.is_file() and path.name != MANIFEST_NAME
+    }
+
+
+@functools.cache
+def hash_package(source: Path) -> str:
+    """Compute digest of all files in package directory.
+
+    :param source: Source directory of Typst package.
+    """
+    manifest = json.dumps(build_manifest(source), sort_keys=True)
+    return hashlib.sha256(manifest.encode()).hexdigest()
+
+
+@functools.cache
+def stamp_package(source: Path) -> str:
+    """Compute signature of package directory from size and modified time of files.
+
+    It does not read files, and it is computed once per process,
+    so that checking installed package costs only reading its manifest.
+
+    :param source: Source directory of Typst package.
+    """
+    stamps = [
+        (path.relative_to(source).as_posix(), stat.st_size, stat.st_mtime_ns)
+        for path in sorted(source.rglob("*"))
+        if path.name != MANIFEST_NAME and S_ISREG((stat := path.stat()).st_mode)
+    ]
+    return hashlib.sha256(json.dumps(stamps).encode()).hexdigest()
+
+
+def read_manifest(dest: Path) -> dict:
+    """Read manifest of installed package. It returns empty dict when it is not found."""
+    try:
+        return json.loads((dest / MANIFEST_NAME).read_text())
+    except (FileNotFoundError, NotADirectoryError, json.JSONDecodeError):
+        return {}
+
+
+def _write_manifest(dest: Path, manifest: dict):
+    fd, tmp = tempfile.mkstemp(prefix=f".{MANIFEST_NAME}-", dir=dest)
+    with os.fdopen(fd, "w") as fp:
+        json.dump(manifest, fp, indent=2)
+    os.chmod(tmp, 0o644)
+    os.replace(tmp, dest / MANIFEST_NAME)
+
+
 def install_package(
     source: Path, name: str, version: str | None = None, *, force: bool = False
 ):
     """Copy package directory as Typst local package.
 
+    Installed package has manifest that has stamp (size and modified time)
+    and digests of source files.
+    When stamp of source package is same as manifest, this does nothing except reading manifest.
+    When digest of source package is same as manifest, this only updates stamp.
+    Otherwise, this stages new package directory next to destination and swaps them.
+    Unchanged files are linked from current install, and only changed files are copied.
+
     Ref
     ---
 
@@ -55,17 +160,206 @@ def install_package(
     :param version: The version of local package.
     :param force: Flag to override package.
     """
-    logger.debug("Installing '%s' Typst package into local from %s.", name, str(source))
     dest = build_install_path(name, version)
-    dest.parent.mkdir(exist_ok=True, parents=True)
-    if not dest.exists():
-        pass
-    elif force:
-        shutil.rmtree(dest)
-    else:
+    stamp = stamp_package(source)
+    installed = {} if force else read_manifest(dest)
+    if installed.get("stamp") == stamp:
         logger.info("Package is already installed.")
         return
-    shutil.copytree(source, dest)
+    digest = hash_package(source)
+    if installed.get("digest") == digest:
+        _write_manifest(dest, {**installed, "stamp": stamp})
+        logger.info("Package is already installed.")
+        return
+
+    logger.debug("Installing '%s' Typst package into local from %s.", name, str(source))
+    manifest = build_manifest(source)
+    dest.parent.mkdir(exist_ok=True, parents=True)
+    staging = Path(tempfile.mkdtemp(prefix=f".{dest.name}-", dir=dest.parent))
+    staging.chmod(0o755)
+    try:
+        installed_files = installed.get("files", {})
+        for relpath, file_digest in manifest.items():
+            target = staging / relpath
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if installed_files.get(relpath) == file_digest:
+                try:
+                    os.link(dest / relpath, target)
+                    continue
+                except OSError:
+                    pass
+            shutil.copy2(source / relpath, target)
+        _swap_directory(
+            staging,
+            dest,
+            {
+                "digest": digest,
+                "stamp": stamp,
+                "files": manifest,
+                "previous": os.readlink(dest) if dest.is_symlink() else None,
+            },
+        )
+    except BaseException:
+        shutil.rmtree(staging, ignore_errors=True)
+        raise
+
+
+def _swap_directory(staging: Path, dest: Path, manifest: dict):
+    """Write manifest into staging directory, and point destination to it.
+
+    Destination is symbolic link to directory next to it, and link is replaced atomically,
+    so that other processes always find complete package.
+    Directory that destination pointed to is kept for processes that are reading it,
+    and other directories are removed (see :func:`_remove_outdated`).
+    When symbolic link is not available (for example, on Windows without privilege),
+    destination is replaced by renaming directories.
+    """
+    link = staging.with_name(f"{staging.name}.link")
+    try:
+        os.symlink(staging.name, link, target_is_directory=True)
+    except OSError:
+        _write_manifest(staging, manifest)
+        return _rename_directory(staging, dest, manifest["digest"])
+    # Manifest is written after link, so that other processes do not remove staging
+    # while it is being swapped.
+    _write_manifest(staging, manifest)
+    trash = None
+    if dest.exists() and not dest.is_symlink():
+        # Directory that is installed by older version of rst2typst.
+        trash = Path(tempfile.mkdtemp(prefix=f".{dest.name}-old-", dir=dest.parent))
+        with contextlib.suppress(FileNotFoundError):
+            os.replace(dest, trash / dest.name)
+    try:
+        os.replace(link, dest)
+    except OSError:
+        link.unlink()
+        raise
+    finally:
+        if trash:
+            shutil.rmtree(trash, ignore_errors=True)
+    _remove_outdated(dest)
+
+
+def _remove_outdated(dest: Path):
+    """Remove directories next to destination except current and previous ones.
+
+    They are directories that were replaced by newer installs,
+    or staged by other processes that lost concurrent installs.
+    Directories that are being staged (they have no manifest yet)
+    or being swapped (they have pending link) are kept.
+    """
+    try:
+        current = os.readlink(dest)
+    except OSError:
+        return
+    keep = {current, read_manifest(dest).get("previous")}
+    for path in dest.parent.glob(f".{dest.name}-*"):
+        if path.name in keep or path.is_symlink() or not read_manifest(path):
+            continue
+        if os.path.lexists(path.with_name(f"{path.name}.link")):
+            continue
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def _rename_directory(staging: Path, dest: Path, digest: str):
+    """Replace destination by staging directory.
+
+    When other process installed same package concurrently, it keeps that.
+    """
+    trash = None
+    if dest.exists():
+        trash = Path(tempfile.mkdtemp(prefix=f".{dest.name}-old-", dir=dest.parent))
+        with contextlib.suppress(FileNotFoundError):
+            os.replace(dest, trash / dest.name)
+    try:
+        os.rename(staging, dest)
+    except OSError:
+        if read_manifest(dest).get("digest") != digest:
+            raise
+        logger.debug("Package is installed by other process.")
+        shutil.rmtree(staging, ignore_errors=True)
+    finally:
+        if trash:
+            shutil.rmtree(trash, ignore_errors=True)
+
+
+_TOPLEVEL = re.compile(r"^(?:#|/\*\*)", re.MULTILINE)
+_LET = re.compile(r"#let\s+([A-Za-z_][\w-]*)")
+_IDENT = re.compile(r"[A-Za-z_][\w-]*")
+
+
+def _toplevel(text: str) -> set[int]:
+    return {m.start() for m in _TOPLEVEL.finditer(text)}
+
+
+@functools.cache
+def collect_definitions(source: Path) -> dict[str, str]:
+    """Collect top-level ``#let`` definitions from Typst files in package directory.
+
+    Definition is the code from ``#let`` to next top-level statement or doc-comment.
+    Top-level statements must start at head of line (as files of bundled package do).
+
+    :param source: Source directory of Typst package.
+    :returns: Mapping of name and code of definitions, in order of files and lines.
+    """
+    definitions = {}
+    for path in sorted(source.glob("*.typ")):
+        text = path.read_text()
+        starts = [*sorted(_toplevel(text)), len(text)]
+        for start, end in itertools.pairwise(starts):
+            matched = _LET.match(text, start)
+            if matched:
+                definitions[matched[1]] = text[start:end].strip()
+    return definitions
+
+
+def resolve_definitions(source: Path, names: Iterable[str]) -> list[str]:
+    """Resolve names of definitions that are required to use ``names``.
+
+    :param source: Source directory of Typst package.
+    :param names: Names of entrypoints.
+    :returns: Names in order that dependencies are ahead of dependents.
+    """
+    definitions = collect_definitions(source)
+    resolved: list[str] = []
+
+    def _visit(name: str, visiting: set[str]):
+        if name in resolved or name in visiting:
+            return
+        visiting.add(name)
+        for ident in _IDENT.findall(definitions[name]):
+            if ident != name and ident in definitions:
+                _visit(ident, visiting)
+        resolved.append(name)
+
+    for name in sorted(names):
+        if name not in definitions:
+            raise ValueError(f"'{name}' is not defined in package.")
+        _visit(name, set())
+    return resolved
+
+
+def build_embedded_code(source: Path, entrypoints: Iterable[Entrypoint]) -> str:
+    """Render definitions used by entrypoints as Typst code instead of import statement.
+
+    :param source: Source directory of Typst package.
+    :param entrypoints: Entrypoints to embed.
+                        ``*`` means all definitions of ``lib.typ`` (that is entrypoint of package).
+    """
+    names, aliases = set(), []
+    for entrypoint in entrypoints:
+        if entrypoint.name == "*":
+            lib = (source / "lib.typ").read_text()
+            names |= {m[1] for m in _LET.finditer(lib) if m.start() in _toplevel(lib)}
+            continue
+        names.add(entrypoint.name)
+        if entrypoint.alias:
+            aliases.append(f"#let {entrypoint.alias} = {entrypoint.name}")
+    definitions = collect_definitions(source)
+    return "\n".join(
+        [definitions[name] for name in resolve_definitions(source, names)]
+        + sorted(aliases)
+    )
 
 
 @dataclass(frozen=True)
@@ -103,11 +397,18 @@ class PackageRegistry(dict[str, set[Entrypoint]]):
             self[name] = set()
         self[name].add(entrypoint)
 
+    def merge(self, other: PackageRegistry):
+        """Add all packages and entrypoints of other registry."""
+        for name, entrypoints in other.items():
+            self.setdefault(name, set())
+            for entrypoint in entrypoints:
+                self.add(name, entrypoint)
+
     @property
     def code(self) -> str:
         """As Typst code."""
         lines = []
         for name, entrypoints in self.items():
-            value = ", ".join([e.code for e in entrypoints])
+            value = ", ".join(sorted(e.code for e in entrypoints))
             lines.append(f'#import "{name}": {value}')
         return "\n".join(lines)
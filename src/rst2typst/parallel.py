@@ -0,0 +1,165 @@
+"""Parallel translation of top-level sections.
+
+Top-level sections are translated in worker processes before walking whole document.
+Translator splices their code in order of document, so that output is same as serial translation.
+
+* Transforms (for example, remapping footnotes) are applied to whole document before it,
+  so that labels and references are resolved across sections.
+* Top-level sections always start from initial state of translator
+  (section level is ``0`` and there are no indents),
+  so that worker translates section by new translator.
+* On platforms that support ``fork``, workers inherit document from main process,
+  and only indexes of sections are sent to them.
+  Otherwise (or when process has other threads, because forking them is unsafe),
+  sections are copied without document and sent to workers.
+"""
+
+from __future__ import annotations
+
+import optparse
+import threading
+from itertools import repeat
+from typing import TYPE_CHECKING
+
+from docutils import nodes, utils
+
+from .memo import Entry, section_cache, structural_hash
+
+if TYPE_CHECKING:
+    from .writer import TypstTranslator
+
+
+_shared: tuple[type[TypstTranslator], list[nodes.section]] | None = None
+"""Translator class and sections that forked worker inherited (it is set only in worker)."""
+
+
+def _inherit(translator_class: type[TypstTranslator], sections: list[nodes.section]):
+    """Keep translator class and sections. This is initializer of forked worker."""
+    global _shared
+    _shared = (translator_class, sections)
+
+
+def _translate_shared(index: int) -> Entry:
+    """Translate section inherited from main process. This is called in forked worker."""
+    assert _shared is not None
+    translator_class, sections = _shared
+    section = sections[index]
+    document = section.document
+    assert document is not None
+    # Settings are copy of main process, so they can be changed.
+    document.settings.memoize_sections = False
+    document.settings.record_dependencies = utils.DependencyList()
+    visitor = translator_class(document)
+    section.walkabout(visitor)
+    return Entry(
+        "".join(visitor.body),
+        visitor.packages,
+        tuple(document.settings.record_dependencies.list),
+        tuple(visitor.math_variables.items()),
+    )
+
+
+def _picklable_settings(settings: optparse.Values) -> dict:
+    """Pick settings that can be sent to worker process."""
+    import pickle
+
+    values = {}
+    for key, value in vars(settings).items():
+        try:
+            pickle.dumps(value)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            continue
+        values[key] = value
+    return values | {"memoize_sections": False, "parallel_sections": 0}
+
+
+def _detach(section: nodes.section) -> nodes.section:
+    """Copy section without references to document, to send it to worker process."""
+    part = section.deepcopy()
+    for node in part.findall():
+        node._document = None
+    return part
+
+
+def translate_section(
+    translator_class: type[TypstTranslator], settings: dict, section: nodes.section
+) -> Entry:
+    """Translate section in new document. This is called in worker process."""
+    values = optparse.Values(settings)
+    values.record_dependencies = utils.DependencyList()
+    document = utils.new_document(settings.get("_source") or "<section>", values)
+    document.append(section)
+    visitor = translator_class(document)
+    section.walkabout(visitor)
+    return Entry(
+        "".join(visitor.body),
+        visitor.packages,
+        tuple(values.record_dependencies.list),
+        tuple(visitor.math_variables.items()),
+    )
+
+
+def prepare_sections(
+    visitor: TypstTranslator, max_workers: int
+) -> dict[nodes.section, Entry]:
+    """Translate top-level sections of document in worker processes.
+
+    When ``--memoize-sections`` is set, cached sections are not sent to workers
+    and translated sections are stored into cache.
+
+    :param visitor: Translator that walks document after it. It must not start walking yet.
+    :param max_workers: Count of worker processes.
+    :returns: Translated code of each section.
+    """
+    document = visitor.document
+    memoize = getattr(document.settings, "memoize_sections", False)
+    items = visitor.memo_key_items() if memoize else None
+    prepared: dict[nodes.section, Entry] = {}
+    pending: list[tuple[nodes.section, str | None]] = []
+    for node in document.children:
+        if not isinstance(node, nodes.section):
+            continue
+        key = structural_hash(node, items) if memoize else None
+        entry = section_cache.get(key) if key else None
+        if entry is not None:
+            prepared[node] = entry
+        else:
+            pending.append((node, key))
+    if len(pending) < 2:
+        return prepared
+
+    # NOTE: They are imported only for parallel translation to keep startup fast.
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    sections = [node for node, _ in pending]
+    chunksize = max(1, len(sections) // (max_workers * 4))
+    methods = multiprocessing.get_all_start_methods()
+    if "fork" in methods and threading.active_count() == 1:
+        # Sections are passed by fork (they are not pickled).
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_inherit,
+            initargs=(type(visitor), sections),
+        )
+        args: tuple = (_translate_shared, range(len(sections)))
+    else:
+        settings = _picklable_settings(document.settings)
+        method = "forkserver" if "forkserver" in methods else "spawn"
+        executor = ProcessPoolExecutor(
+            max_workers=max_workers, mp_context=multiprocessing.get_context(method)
+        )
+        args = (
+            translate_section,
+            repeat(type(visitor)),
+            repeat(settings),
+            [_detach(node) for node in sections],
+        )
+    with executor:
+        entries = executor.map(*args, chunksize=chunksize)
+        for (node, key), entry in zip(pending, entries):
+            prepared[node] = entry
+            if key:
+                section_cache.put(key, entry)
+    return prepared
@@ -1,17 +1,96 @@
 """PDF handler."""
 
+from __future__ import annotations
+
+import functools
 import os
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
-import typst
-from docutils.frontend import validate_boolean, validate_comma_separated_list
+from docutils.frontend import (
+    validate_boolean,
+    validate_comma_separated_list,
+    validate_nonnegative_int,
+)
 
+from . import timings, transforms
+from .fonts import get_fonts, stamp_fonts
+from .images import DEFAULT_CACHE_DIR, DEFAULT_DPI, OptimizeImages
 from .package import install_package, package_dir
 from .writer import Writer as BaseWriter
 
+if TYPE_CHECKING:
+    from typing import ClassVar
+
+
+def get_compiler(font_paths: tuple[str, ...] = (), root: str | None = None):
+    """Retrieve Typst compiler shared in the thread.
+
+    Compiler keeps resolved packages, and memoization of Typst survives between compiles.
+    Compilers are cached for each pair of font paths and root directory,
+    and fonts are shared by compilers that have same font paths.
+    Compiler cannot compile concurrently, so that each thread has own compilers.
+
+    :param font_paths: Directories where custom fonts are stored.
+    :param root: Root directory of Typst project.
+    """
+    return _get_compiler(font_paths, root, threading.get_ident())
+
+
+@functools.lru_cache(maxsize=32)
+def _get_compiler(font_paths: tuple[str, ...], root: str | None, thread: int):
+    import typst
+
+    return typst.Compiler(root=root, font_paths=get_fonts(font_paths))
+
+
+def clear_compilers():
+    """Discard compilers of all threads (for example, when fonts are changed)."""
+    _get_compiler.cache_clear()
+
+
+@dataclass(frozen=True)
+class CompileOptions:
+    """Options to compile Typst code into PDF.
+
+    They are picklable, so that code can be compiled in other process.
+    """
+
+    font_paths: tuple[str, ...] = ()
+    root: str | None = None
+    install_package: bool = True
+    force_install_package: bool = False
+
+
+def prepare_package(options: CompileOptions):
+    """Install local package when output imports it."""
+    if options.install_package:
+        install_package(package_dir, "rst2typst", force=options.force_install_package)
+
+
+def compile_pdf(code: str, options: CompileOptions) -> bytes:
+    """Compile Typst code into PDF by compiler shared in the process."""
+    compiler = get_compiler(options.font_paths, options.root)
+    return compiler.compile(input=code.encode(), format="pdf")
+
+
+class NodeTransforms(transforms.NodeTransforms):
+    """Transforms of rst2typst with preprocessing images for PDF."""
+
+    members: ClassVar[list[type[transforms.NodeTransform]]] = [
+        *transforms.NodeTransforms.members,
+        OptimizeImages,
+    ]
+
 
 class Writer(BaseWriter):
     format = "pdf"
 
+    supports_streaming = False
+
+    node_transforms = NodeTransforms
+
     settings_spec = BaseWriter.settings_spec + (
         "TypstPDF Writer Options",
         None,
@@ -37,18 +116,46 @@ class Writer(BaseWriter):
                     "validator": validate_comma_separated_list,
                 },
             ),
+            (
+                (
+                    "Downscale and recompress local raster images before compiling "
+                    "(requires Pillow)."
+                ),
+                ["--optimize-images"],
+                {
+                    "action": "store_true",
+                    "dest": "optimize_images",
+                    "default": False,
+                },
+            ),
+            (
+                f"Resolution of optimized images for rendered width (default: {DEFAULT_DPI}).",
+                ["--image-dpi"],
+                {
+                    "metavar": "<int>",
+                    "dest": "image_dpi",
+                    "default": DEFAULT_DPI,
+                    "validator": validate_nonnegative_int,
+                },
+            ),
+            (
+                (
+                    "Directory to store optimized images. It must be under current directory "
+                    f"(default: {DEFAULT_CACHE_DIR})."
+                ),
+                ["--image-cache-dir"],
+                {
+                    "metavar": "<dirpath>",
+                    "dest": "image_cache_dir",
+                    "default": DEFAULT_CACHE_DIR,
+                },
+            ),
         ),
     )
 
-    def translate(self):
-        super().translate()
-
-        install_package(
-            package_dir,
-            "rst2typst",
-            force=self.document.settings.force_install_package,
-        )
-        font_paths = self.document.settings.font_paths
+    def resolve_font_paths(self, settings) -> list[str]:
+        """Merge font paths from settings and ``TYPST_FONT_PATHS`` environment variable."""
+        font_paths = settings.font_paths
         if isinstance(font_paths, str):
             font_paths = [font_paths]
         else:
@@ -56,7 +163,63 @@ class Writer(BaseWriter):
         env_font_paths = os.environ.get("TYPST_FONT_PATHS")
         if env_font_paths:
             font_paths += env_font_paths.split(os.pathsep)
-        self.output = typst.compile(self.output.encode(), font_paths=font_paths)
+        return font_paths
+
+    def cache_key_items(self, settings) -> dict:
+        font_paths = self.resolve_font_paths(settings)
+        items = super().cache_key_items(settings) | {
+            "font_paths": font_paths,
+            "optimize_images": settings.optimize_images,
+            "image_dpi": settings.image_dpi,
+        }
+        if font_paths:
+            items["fonts"] = stamp_fonts(font_paths)
+        return items
+
+    def watch_paths(self, settings) -> list[str]:
+        return super().watch_paths(settings) + self.resolve_font_paths(settings)
+
+    def invalidate(self, changed: set[str]):
+        font_paths = tuple(self.resolve_font_paths(self.document.settings))
+        if font_paths and any(path.startswith(font_paths) for path in changed):
+            clear_compilers()
+            get_fonts.cache_clear()
+
+    def compile_options(self) -> CompileOptions:
+        """Collect options to compile output of document."""
+        settings = self.document.settings
+        return CompileOptions(
+            font_paths=tuple(self.resolve_font_paths(settings)),
+            root=os.getcwd(),
+            install_package=not settings.embed_package,
+            force_install_package=settings.force_install_package,
+        )
+
+    def translate(self):
+        super().translate()
+
+        settings = self.document.settings
+        options = self.compile_options()
+        if options.install_package:
+            with timings.phase(settings, "install_package"):
+                prepare_package(options)
+        with timings.phase(settings, "compile"):
+            self.output = compile_pdf(self.output, options)
+        self.store_timings()
 
     def display_warnings(self):
         pass
+
+
+class SourceWriter(Writer):
+    """PDF writer that outputs Typst code without compiling it.
+
+    Options to compile output are kept as ``options``,
+    so that applications can compile it in other thread or process by :func:`compile_pdf`.
+    """
+
+    options: CompileOptions
+
+    def translate(self):
+        BaseWriter.translate(self)
+        self.options = self.compile_options()
@@ -0,0 +1,150 @@
+"""Profiling of translator.
+
+:func:`profile_translator` creates subclass of translator class that measures
+``visit_*`` and ``depart_*`` methods through ``dispatch_visit`` and ``dispatch_departure``.
+It works for subclasses of :class:`~rst2typst.writer.TypstTranslator` too,
+so that methods of custom translators are reported.
+
+* Calls, cumulative time and self time for each method.
+  Self time is time of method itself (except nested dispatches).
+  Cumulative time of ``visit_*`` is inclusive time of node, from its visit to end of its departure
+  (nodes that are visited without departure by ``SkipDeparture`` are finished with their parents).
+  Like :mod:`cProfile`, nodes in other nodes of same type are not counted twice.
+  Cumulative time of ``depart_*`` is time of method with nested dispatches.
+* Bytes of texts (encoded as UTF-8) that are appended into body for each node type.
+  They are counted only when body is list (it is not counted on ``--stream-output``).
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from docutils import nodes
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+
+    from docutils.nodes import NodeVisitor
+
+
+@dataclass
+class MethodStat:
+    """Aggregated values of a method."""
+
+    calls: int = 0
+    cumulative: float = 0.0
+    self_time: float = 0.0
+
+
+class TranslatorProfile:
+    """Aggregated results of profiling."""
+
+    def __init__(self):
+        self.methods: dict[str, MethodStat] = defaultdict(MethodStat)
+        self.sizes: dict[str, int] = defaultdict(int)
+
+    def report(self, limit: int | None = None) -> str:
+        """Render results as text tables sorted by self time and bytes.
+
+        :param limit: Max count of rows for each table.
+        """
+        methods = sorted(
+            self.methods.items(), key=lambda m: m[1].self_time, reverse=True
+        )
+        lines = [f"{'method':<40} {'calls':>8} {'cum (ms)':>10} {'self (ms)':>10}"]
+        for name, stat in methods[:limit]:
+            lines.append(
+                f"{name:<40} {stat.calls:>8} {stat.cumulative * 1e3:>10.2f} {stat.self_time * 1e3:>10.2f}"
+            )
+        lines += ["", f"{'node type':<40} {'bytes':>10}"]
+        sizes = sorted(self.sizes.items(), key=lambda s: s[1], reverse=True)
+        for name, size in sizes[:limit]:
+            lines.append(f"{name:<40} {size:>10}")
+        return "\n".join(lines)
+
+
+class ProfilingMixin:
+    """Mixin for translator to measure dispatching of nodes."""
+
+    body: list[str]
+    profile: TranslatorProfile
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.profile = TranslatorProfile()
+        # Time of nested dispatches for each dispatch in progress.
+        self._nested_times: list[float] = []
+        # Nodes that are visited and not departed yet, with start time of their visits.
+        self._visiting: list[tuple[nodes.Node, float]] = []
+        self._visiting_names: dict[str, int] = defaultdict(int)
+
+    def _dispatch(self, prefix: str, dispatch: Callable, node: nodes.Node):
+        node_name = node.__class__.__name__
+        body = self.body
+        size = len(body) if isinstance(body, list) else None
+        self._nested_times.append(0.0)
+        start = time.perf_counter()
+        try:
+            return dispatch(node)
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self._nested_times.pop()
+            if self._nested_times:
+                self._nested_times[-1] += elapsed
+            stat = self.profile.methods[f"{prefix}_{node_name}"]
+            stat.calls += 1
+            stat.self_time += elapsed - nested
+            if prefix == "depart":
+                stat.cumulative += elapsed
+            if size is not None and self.body is body:
+                appended = sum(len(text.encode()) for text in body[size:])
+                self.profile.sizes[node_name] += appended
+
+    def _start(self, node: nodes.Node, start: float):
+        self._visiting.append((node, start))
+        self._visiting_names[node.__class__.__name__] += 1
+
+    def _finish(self, node: nodes.Node, start: float):
+        node_name = node.__class__.__name__
+        if self._visiting_names[node_name]:
+            return
+        stat = self.profile.methods[f"visit_{node_name}"]
+        stat.cumulative += time.perf_counter() - start
+
+    def dispatch_visit(self, node: nodes.Node):
+        start = time.perf_counter()
+        try:
+            result = self._dispatch("visit", super().dispatch_visit, node)  # type: ignore[unresolved-attribute]
+        except (nodes.SkipNode, nodes.SkipSiblings):
+            # Neither children nor departure of node are walked.
+            self._finish(node, start)
+            raise
+        except nodes.TreePruningException:
+            self._start(node, start)
+            raise
+        self._start(node, start)
+        return result
+
+    def dispatch_departure(self, node: nodes.Node):
+        result = self._dispatch("depart", super().dispatch_departure, node)  # type: ignore[unresolved-attribute]
+        while self._visiting:
+            visited, start = self._visiting.pop()
+            self._visiting_names[visited.__class__.__name__] -= 1
+            self._finish(visited, start)
+            if visited is node:
+                break
+        return result
+
+
+@functools.cache
+def profile_translator(translator_class: type[NodeVisitor]) -> type[NodeVisitor]:
+    """Create subclass of translator class to profile it."""
+    return type(
+        f"Profiling{translator_class.__name__}",
+        (ProfilingMixin, translator_class),
+        {"__module__": __name__},
+    )
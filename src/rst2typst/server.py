@@ -0,0 +1,429 @@
+"""Local conversion service (``rst2typst-serve``).
+
+Service accepts reStructuredText by HTTP (over TCP or Unix socket),
+and it returns Typst code or PDF.
+
+* Worker threads are warmed up before service accepts requests.
+  Modules are imported, local package is installed and fonts are loaded,
+  and each worker has converted and compiled a small document once.
+* Requests are put into bounded queue. When queue is full,
+  service responds ``503 Service Unavailable`` immediately instead of holding request.
+* Options of writer are parsed once on start, and they are used for all requests.
+  Directives that read files (``include`` and ``raw`` with ``:file:``) and ``raw``
+  are disabled unless ``--allow-file-insertion`` is set,
+  because sources are given by clients.
+
+Endpoints:
+
+* ``POST /typst``: Convert body into Typst code.
+* ``POST /pdf``: Convert body into PDF (it requires ``typst``).
+* ``GET /health``: Report state of service as JSON.
+"""
+
+from __future__ import annotations
+
+import argparse
+import copy
+import importlib.util
+import json
+import logging
+import os
+import queue
+import socketserver
+import stat
+import sys
+import threading
+from concurrent.futures import Future
+from dataclasses import dataclass, field, replace
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+from docutils import ApplicationError, io, utils
+from docutils.core import Publisher
+
+from . import writer
+from .batch import positive_int
+
+if TYPE_CHECKING:
+    from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 64
+
+MAX_BODY_SIZE = 16 * 1024 * 1024
+"""Limit of size of request body in bytes."""
+
+WARMUP_SOURCE = "Warm up\n=======\n\nText with *emphasis*.\n\n- Item\n"
+
+CONTENT_TYPES = {
+    "typst": "text/plain; charset=utf-8",
+    "pdf": "application/pdf",
+}
+
+
+class Busy(Exception):
+    """Request queue is full."""
+
+
+class ConversionError(Exception):
+    """Source cannot be converted (for example, syntax error or compile error)."""
+
+
+class WorkerError(Exception):
+    """Worker failed by unexpected error. Traceback is logged by worker."""
+
+
+class TypstWriter(writer.Writer):
+    """Writer for Typst code of responses.
+
+    Notice about import of local package is logged once on start
+    instead of printing it into stdout for each request.
+    """
+
+    def display_warnings(self):
+        pass
+
+
+@dataclass
+class Task:
+    """Request of conversion in queue."""
+
+    kind: str
+    source: str
+    future: Future = field(default_factory=Future)
+
+
+class ConversionService:
+    """Pool of worker threads that convert sources.
+
+    :param options: Command line options of writer.
+                    They are parsed by PDF writer when ``typst`` is installed.
+    :param workers: Count of worker threads.
+    :param queue_size: Count of requests that can wait for worker.
+    :param allow_file_insertion: Enable directives that read files and ``raw`` directive.
+    """
+
+    def __init__(
+        self,
+        options: list[str] | None = None,
+        workers: int | None = None,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        allow_file_insertion: bool = False,
+    ):
+        self.workers = workers or os.cpu_count() or 1
+        self.queue: queue.Queue[Task | None] = queue.Queue(maxsize=queue_size)
+        self._threads: list[threading.Thread] = []
+        self._failures: list[BaseException] = []
+        self._writers: dict[str, type[writer.Writer]] = {"typst": TypstWriter}
+        self.pdf = None
+        if importlib.util.find_spec("typst") is not None:
+            from . import pdf
+
+            self.pdf = pdf
+            self._writers["pdf"] = pdf.SourceWriter
+        self.settings = self._parse_options(options or [], allow_file_insertion)
+
+    @property
+    def kinds(self) -> list[str]:
+        """Kinds of output that service can return."""
+        return list(self._writers)
+
+    def _parse_options(self, options: list[str], allow_file_insertion: bool):
+        publisher = Publisher(writer=self._writers[self.kinds[-1]]())
+        publisher.set_components("standalone", "restructuredtext", "pseudoxml")
+        defaults = {
+            "file_insertion_enabled": allow_file_insertion,
+            "raw_enabled": allow_file_insertion,
+        }
+        publisher.process_command_line(options, **defaults)
+        # Publisher exits process on errors without this.
+        publisher.settings.traceback = True
+        return publisher.settings
+
+    def start(self):
+        """Install package, and start worker threads after they are warmed up.
+
+        Exception of warming up is raised when any worker is failed.
+        """
+        if not (self.settings.no_import_local_package or self.settings.embed_package):
+            logger.info(
+                'Typst code imports local package. Use "--embed-package" to make it standalone.'
+            )
+        if self.pdf and not self.settings.embed_package:
+            self.pdf.prepare_package(
+                self.pdf.CompileOptions(
+                    force_install_package=self.settings.force_install_package
+                )
+            )
+        barrier = threading.Barrier(self.workers + 1)
+        for idx in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, args=(barrier,), name=f"rst2typst-{idx}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            self._failures.append(WorkerError("Worker failed on warming up"))
+        if self._failures:
+            for thread in self._threads:
+                thread.join()
+            self._threads.clear()
+            raise self._failures[0]
+
+    def submit(self, kind: str, source: str) -> Future:
+        """Put request into queue.
+
+        :raises Busy: When queue is full.
+        """
+        task = Task(kind, source)
+        try:
+            self.queue.put_nowait(task)
+        except queue.Full:
+            raise Busy() from None
+        return task.future
+
+    def close(self):
+        """Stop worker threads after requests in queue are processed."""
+        for _ in self._threads:
+            self.queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads.clear()
+
+    def _work(self, barrier: threading.Barrier):
+        try:
+            for kind in self.kinds:
+                self.convert(kind, WARMUP_SOURCE)
+        except (ConversionError, OSError) as err:
+            self._failures.append(err)
+        except BaseException:
+            # Error is logged by thread, and other threads stop waiting for this.
+            barrier.abort()
+            raise
+        try:
+            barrier.wait()
+        except threading.BrokenBarrierError:
+            return
+        if self._failures:
+            return
+        while (task := self.queue.get()) is not None:
+            if not task.future.set_running_or_notify_cancel():
+                continue
+            try:
+                task.future.set_result(self.convert(task.kind, task.source))
+            except (ConversionError, OSError) as err:
+                task.future.set_exception(err)
+            except Exception:
+                logger.exception("Unexpected error on converting source.")
+                task.future.set_exception(WorkerError("Unexpected error"))
+
+    def convert(self, kind: str, source: str) -> bytes:
+        """Convert source in current thread.
+
+        :raises ConversionError: When source cannot be converted.
+        """
+        settings = copy.copy(self.settings)
+        settings.record_dependencies = utils.DependencyList()
+        publisher = Publisher(
+            writer=self._writers[kind](),
+            source_class=io.StringInput,
+            destination_class=io.StringOutput,
+            settings=settings,
+        )
+        publisher.set_components("standalone", "restructuredtext", "pseudoxml")
+        publisher.set_source(source)
+        publisher.set_destination()
+        try:
+            output = publisher.publish()
+        except (utils.SystemMessage, ApplicationError, NotImplementedError) as err:
+            # Translator raises NotImplementedError for unsupported nodes.
+            raise ConversionError(str(err)) from err
+        if kind != "pdf":
+            return output
+        import typst
+
+        # Package is installed on start.
+        assert self.pdf
+        options = replace(publisher.writer.options, install_package=False)
+        try:
+            return self.pdf.compile_pdf(publisher.writer.output, options)
+        except typst.TypstError as err:
+            raise ConversionError(str(err)) from err
+
+    def status(self) -> dict[str, Any]:
+        """Report state of service."""
+        return {
+            "workers": len(self._threads),
+            "queued": self.queue.qsize(),
+            "capacity": self.queue.maxsize,
+            "kinds": self.kinds,
+        }
+
+
+class RequestHandler(BaseHTTPRequestHandler):
+    """Handler that passes requests to service of server."""
+
+    server: ServerMixin  # type: ignore[assignment]
+
+    def address_string(self) -> str:
+        # Address of client is not tuple on Unix socket.
+        if isinstance(self.client_address, tuple):
+            return super().address_string()
+        return "unix"
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._respond(HTTPStatus.NOT_FOUND, b"Not found")
+        body = json.dumps(self.server.service.status()).encode()
+        self._respond(HTTPStatus.OK, body, "application/json")
+
+    def do_POST(self):
+        service = self.server.service
+        kind = self.path.strip("/")
+        if kind not in service.kinds:
+            return self._respond(HTTPStatus.NOT_FOUND, b"Not found")
+        if "Content-Length" not in self.headers:
+            return self._respond(HTTPStatus.LENGTH_REQUIRED, b"Length required")
+        try:
+            length = int(self.headers["Content-Length"])
+        except ValueError:
+            return self._respond(HTTPStatus.BAD_REQUEST, b"Invalid length")
+        if length > MAX_BODY_SIZE:
+            return self._respond(HTTPStatus.REQUEST_ENTITY_TOO_LARGE, b"Too large")
+        try:
+            source = self.rfile.read(length).decode()
+        except UnicodeDecodeError:
+            return self._respond(HTTPStatus.BAD_REQUEST, b"Source must be UTF-8")
+        try:
+            output = service.submit(kind, source).result()
+        except Busy:
+            return self._respond(
+                HTTPStatus.SERVICE_UNAVAILABLE, b"Busy", headers={"Retry-After": "1"}
+            )
+        except ConversionError as err:
+            return self._respond(HTTPStatus.UNPROCESSABLE_ENTITY, str(err).encode())
+        except (WorkerError, OSError) as err:
+            message = f"{type(err).__name__}: {err}"
+            return self._respond(HTTPStatus.INTERNAL_SERVER_ERROR, message.encode())
+        self._respond(HTTPStatus.OK, output, CONTENT_TYPES[kind])
+
+    def _respond(
+        self,
+        status: HTTPStatus,
+        body: bytes,
+        content_type: str = "text/plain; charset=utf-8",
+        headers: dict[str, str] | None = None,
+    ):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class ServerMixin:
+    service: ConversionService
+    daemon_threads = True
+
+
+class HTTPServer(ServerMixin, ThreadingHTTPServer):
+    """HTTP server over TCP."""
+
+
+if sys.platform != "win32":
+
+    class UnixHTTPServer(ServerMixin, socketserver.ThreadingUnixStreamServer):
+        """HTTP server over Unix socket."""
+
+
+def create_server(
+    service: ConversionService,
+    host: str = DEFAULT_HOST,
+    port: int = DEFAULT_PORT,
+    socket_path: str | Path | None = None,
+) -> HTTPServer | UnixHTTPServer:
+    """Create server that passes requests to service.
+
+    :param socket_path: Path of Unix socket. When it is set, ``host`` and ``port`` are ignored.
+    """
+    server: HTTPServer | UnixHTTPServer
+    if socket_path is None:
+        server = HTTPServer((host, port), RequestHandler)
+    else:
+        path = Path(socket_path)
+        # Socket file remains when previous process is killed.
+        if path.exists() and stat.S_ISSOCK(path.stat().st_mode):
+            path.unlink()
+        server = UnixHTTPServer(str(path), RequestHandler)
+    server.service = service
+    return server
+
+
+def build_parser(prog: str) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog=prog,
+        description="Run local service that converts reStructuredText into Typst or PDF.",
+        epilog="Options after '--' are passed to writer for each request.",
+    )
+    parser.add_argument("--host", default=DEFAULT_HOST, help="Host to listen.")
+    parser.add_argument(
+        "--port", type=int, default=DEFAULT_PORT, help="Port to listen."
+    )
+    parser.add_argument(
+        "--socket", help="Path of Unix socket to listen instead of TCP port."
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=positive_int,
+        default=os.cpu_count(),
+        help="Number of worker threads (default: number of CPUs).",
+    )
+    parser.add_argument(
+        "--queue-size",
+        type=int,
+        default=DEFAULT_QUEUE_SIZE,
+        help=f"Number of requests that can wait for worker (default: {DEFAULT_QUEUE_SIZE}).",
+    )
+    parser.add_argument(
+        "--allow-file-insertion",
+        action="store_true",
+        help="Enable directives that read files (include and raw) for requests.",
+    )
+    return parser
+
+
+def main(argv: list[str], prog: str = "rst2typst-serve") -> int:
+    """Entrypoint of service mode."""
+    options: list[str] = []
+    if "--" in argv:
+        idx = argv.index("--")
+        argv, options = argv[:idx], argv[idx + 1 :]
+    args = build_parser(prog).parse_args(argv)
+
+    service = ConversionService(
+        options, args.jobs, args.queue_size, args.allow_file_insertion
+    )
+    service.start()
+    server = create_server(service, args.host, args.port, args.socket)
+    address = args.socket or "http://{}:{}".format(*server.server_address[:2])
+    print(f"Serving {', '.join(service.kinds)} on {address}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+        if args.socket:
+            Path(args.socket).unlink(missing_ok=True)
+    return 0
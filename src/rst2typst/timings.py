@@ -0,0 +1,117 @@
+"""Instrumentation of phases of conversion.
+
+Timings are enabled by ``--timings`` (or ``timings_hook`` setting for embedding applications),
+and they are stored into settings of document while conversion.
+When they are disabled, :func:`phase` returns shared no-op context manager.
+
+Peak memory is measured only when :mod:`tracemalloc` is tracing
+(for example, by ``--timings-memory``).
+"""
+
+from __future__ import annotations
+
+import contextlib
+import functools
+import time
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from collections.abc import Callable
+    from contextlib import AbstractContextManager
+
+_NULL = contextlib.nullcontext()
+
+
+@dataclass(frozen=True)
+class Phase:
+    """Measured values of a phase."""
+
+    name: str
+    wall: float
+    """Wall time in seconds."""
+    cpu: float
+    """CPU time of process in seconds."""
+    peak: int | None = None
+    """Peak of allocated memory in bytes from start of phase."""
+
+
+class Timings(list[Phase]):
+    """Recorder of phases.
+
+    Phases are appended when they are finished, so nested phase is ahead of outer one.
+    """
+
+    def __init__(self, hook: Callable[[Phase], None] | None = None):
+        super().__init__()
+        self.hook = hook
+        # Base memory and running peak for each phase in progress (for nested phases).
+        self._memory: list[list[int]] = []
+
+    @contextlib.contextmanager
+    def phase(self, name: str):
+        import tracemalloc
+
+        tracing = tracemalloc.is_tracing()
+        if tracing:
+            current, peak = tracemalloc.get_traced_memory()
+            if self._memory:
+                self._memory[-1][1] = max(self._memory[-1][1], peak)
+            tracemalloc.reset_peak()
+            self._memory.append([current, current])
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+            peak = None
+            if tracing:
+                base, running = self._memory.pop()
+                top = max(running, tracemalloc.get_traced_memory()[1])
+                if self._memory:
+                    self._memory[-1][1] = max(self._memory[-1][1], top)
+                peak = top - base
+            result = Phase(name, wall, cpu, peak)
+            self.append(result)
+            if self.hook:
+                self.hook(result)
+
+    def as_dicts(self) -> list[dict]:
+        return [asdict(p) for p in self]
+
+    def summary(self) -> str:
+        """Render phases as text table."""
+        lines = [f"{'phase':<32} {'wall (ms)':>10} {'cpu (ms)':>10} {'peak (KiB)':>11}"]
+        for p in self:
+            peak = "-" if p.peak is None else f"{p.peak / 1024:.1f}"
+            lines.append(
+                f"{p.name:<32} {p.wall * 1e3:>10.2f} {p.cpu * 1e3:>10.2f} {peak:>11}"
+            )
+        return "\n".join(lines)
+
+
+def get_timings(settings) -> Timings | None:
+    """Retrieve recorder of conversion. It returns ``None`` when timings are disabled."""
+    timings = getattr(settings, "_timings", None)
+    if timings is None:
+        hook = getattr(settings, "timings_hook", None)
+        if getattr(settings, "timings", None) or hook:
+            timings = settings._timings = Timings(hook)
+    return timings
+
+
+def phase(settings, name: str) -> AbstractContextManager:
+    """Measure a phase when timings are enabled."""
+    timings = get_timings(settings)
+    return _NULL if timings is None else timings.phase(name)
+
+
+def timed_apply(func: Callable):
+    """Decorator for ``apply`` of transforms to measure it as ``transform:<class name>``."""
+
+    @functools.wraps(func)
+    def _apply(self, **kwargs):
+        with phase(self.document.settings, f"transform:{type(self).__name__}"):
+            return func(self, **kwargs)
+
+    return _apply
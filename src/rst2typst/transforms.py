@@ -1,15 +1,95 @@
+"""Transforms of rst2typst.
+
+Transforms of rst2typst are :class:`NodeTransform` that register handlers for node classes.
+:class:`NodeTransforms` runs handlers of all transforms in single traversal of document,
+so that cost of transforms grows with count of nodes, not with count of nodes multiplied by transforms.
+Each transform also works standalone by ``apply()``.
+Writers run transforms of same priority in single traversal (see :meth:`NodeTransforms.by_priority`),
+so that each transform keeps its order against transforms of docutils.
+
+Handlers must not change structure of tree, because traversal is in progress.
+Transforms collect nodes by handlers and change tree in :meth:`NodeTransform.finalize`.
+"""
+
 from __future__ import annotations
 
+import functools
+from typing import TYPE_CHECKING
+
 from docutils import nodes
 from docutils.transforms import Transform
 
+from .timings import timed_apply
 
-class RemapFootnotes(Transform):
-    default_priority = 700
+if TYPE_CHECKING:
+    from collections.abc import Callable, Sequence
+    from typing import ClassVar
+
+
+class NodeTransform(Transform):
+    """Transform that handles nodes by classes in traversal of document."""
+
+    handlers: ClassVar[dict[type[nodes.Node], str]] = {}
+    """Names of methods to handle nodes for each node class (including subclasses)."""
 
+    def finalize(self):
+        """Change tree after traversal."""
+
+    @timed_apply
     def apply(self, **kwargs):
+        run_handlers(self.document, [self])
+
+
+def run_handlers(document: nodes.document, members: Sequence[NodeTransform]):
+    """Traverse document once with calling handlers of transforms, and finalize them.
+
+    For each node, handlers are called by order of transforms.
+    After traversal, transforms are finalized by same order.
+    """
+    table: dict[type, list[Callable]] = {}
+    stack: list[nodes.Node] = [document]
+    while stack:
+        node = stack.pop()
+        cls = type(node)
+        handlers = table.get(cls)
+        if handlers is None:
+            handlers = table[cls] = [
+                getattr(member, name)
+                for member in members
+                for node_class, name in member.handlers.items()
+                if issubclass(cls, node_class)
+            ]
+        for handler in handlers:
+            handler(node)
+        if isinstance(node, nodes.Element):
+            stack.extend(reversed(node.children))
+    for member in members:
+        member.finalize()
+
+
+class RemapFootnotes(NodeTransform):
+    """Move footnotes to first reference of them, and replace text of references by labels."""
+
+    default_priority = 700
+    handlers: ClassVar[dict[type[nodes.Node], str]] = {
+        nodes.footnote: "collect_footnote",
+        nodes.footnote_reference: "collect_reference",
+    }
+
+    def __init__(self, document, startnode=None):
+        super().__init__(document, startnode)
+        self._footnotes: list[nodes.footnote] = []
+        self._references: list[nodes.footnote_reference] = []
+
+    def collect_footnote(self, node: nodes.footnote):
+        self._footnotes.append(node)
+
+    def collect_reference(self, node: nodes.footnote_reference):
+        self._references.append(node)
+
+    def finalize(self):
         footnotes = {}
-        for f in list(self.document.findall(nodes.footnote)):
+        for f in self._footnotes:
             f.parent.remove(f)
             for id in f.attributes.get("ids", []):
                 label_idx = f.first_child_matching_class(nodes.label)
@@ -20,7 +100,10 @@ class RemapFootnotes(Transform):
                     )
                     label.parent.remove(label)
                 footnotes[id] = f
-        for ref in self.document.findall(nodes.footnote_reference):
+        for ref in self._references:
+            # References in footnotes are kept, because footnotes are moved.
+            if _in_footnote(ref):
+                continue
             refid = ref["refid"]
             label_id = (
                 f"{'footnote-' if not refid.startswith('footnote-') else ''}{refid}"
@@ -33,10 +116,23 @@ class RemapFootnotes(Transform):
             ref.append(nodes.Text(label_id))
 
 
-class AssignLiteralLanguage(Transform):
+def _in_footnote(node: nodes.Node) -> bool:
+    parent = node.parent
+    while parent is not None:
+        if isinstance(parent, nodes.footnote):
+            return True
+        parent = parent.parent
+    return False
+
+
+class AssignLiteralLanguage(NodeTransform):
     """Transformer to inject 'language' attribute into all <literal> and <literal_block> nodes."""
 
     default_priority = 400
+    handlers: ClassVar[dict[type[nodes.Node], str]] = {
+        nodes.literal: "_assign_language",
+        nodes.literal_block: "_assign_language",
+    }
 
     def _assign_language(self, node: nodes.Element):
         if "language" in node:
@@ -49,8 +145,48 @@ class AssignLiteralLanguage(Transform):
             return
         node["language"] = node["classes"][-1]
 
+
+class NodeTransforms(Transform):
+    """Apply transforms of rst2typst in single traversal.
+
+    Applying it runs all members at once after them (by highest priority of them).
+    Writers use :meth:`by_priority` instead, so that members run at their own priorities.
+    """
+
+    members: ClassVar[list[type[NodeTransform]]] = [
+        AssignLiteralLanguage,
+        RemapFootnotes,
+    ]
+    default_priority = max(m.default_priority for m in members)
+
+    @classmethod
+    @functools.cache
+    def by_priority(cls) -> list[type[Transform]]:
+        """Split members into transforms for each priority of them.
+
+        Members that have same priority are applied in single traversal,
+        and member that is alone in its priority is applied by itself.
+        """
+        groups: dict[int, list[type[NodeTransform]]] = {}
+        for member in cls.members:
+            groups.setdefault(member.default_priority, []).append(member)
+        return [
+            group[0]
+            if len(group) == 1
+            else type(
+                cls.__name__,
+                (cls,),
+                {
+                    "members": group,
+                    "default_priority": priority,
+                    "__module__": cls.__module__,
+                },
+            )
+            for priority, group in sorted(groups.items())
+        ]
+
+    @timed_apply
     def apply(self, **kwargs):
-        for node in self.document.findall(nodes.literal):
-            self._assign_language(node)
-        for node in self.document.findall(nodes.literal_block):
-            self._assign_language(node)
+        run_handlers(
+            self.document, [m(self.document, self.startnode) for m in self.members]
+        )
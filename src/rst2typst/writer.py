@@ -3,24 +3,55 @@
 from __future__ import annotations
 
 import functools
-from importlib import metadata
+import hashlib
+import re
+import shutil
+import sys
+import tempfile
 from pathlib import Path
 from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
 
-from docutils import nodes
+from docutils import io, languages, nodes, utils
+from docutils.frontend import validate_nonnegative_int
 from docutils.writers import Writer as BaseWriter
 
-from . import transforms
+from . import timings, transforms
 from .frontend import validate_comma_separated_int
-from .package import PackageRegistry
+from .memo import Entry, section_cache, structural_hash
+from .package import PackageRegistry, build_embedded_code, get_version, package_dir
+from .parallel import prepare_sections
+from .profiling import ProfilingMixin, profile_translator
 
 if TYPE_CHECKING:
-    from typing import Callable, Literal
+    from typing import IO, Callable, Literal
 
 # Version of the @preview/mitex Typst package to transform LaTeX math syntax
 # to Typst.
 MITEX_VERSION = "0.2.7"
 
+# Max size of in-memory buffer for body on streaming mode.
+# Body is spooled into temporary file when it is over this size.
+STREAM_SPOOL_SIZE = 1024 * 1024
+
+# Placeholder to split template around ``{body}``.
+_BODY_PLACEHOLDER = "\x00rst2typst-body\x00"
+
+
+def _local_path(uri: str) -> str | None:
+    """Retrieve path of local file that is read for URI.
+
+    Typst compiles code with current directory as root, so that relative URIs are read
+    from current directory (as :class:`~rst2typst.images.OptimizeImages` does).
+    It returns ``None`` for URIs that have scheme (for example, ``https:`` and ``data:``).
+    """
+    scheme = urlsplit(uri).scheme
+    # Drive letter of Windows is parsed as scheme.
+    if len(scheme) > 1:
+        return None
+    return utils.relative_path(None, uri)
+
+
 class Writer(BaseWriter):
     supported = ("typst",)
 
@@ -52,18 +83,165 @@ class Writer(BaseWriter):
                     "default": False,
                 },
             ),
+            (
+                (
+                    "Embed definitions of local package that are used in document "
+                    'instead of appending "import" statement for it.'
+                ),
+                ["--embed-package"],
+                {
+                    "action": "store_true",
+                    "dest": "embed_package",
+                    "default": False,
+                },
+            ),
+            (
+                (
+                    "Convert LaTeX math into Typst math on translation. "
+                    "Math that converter does not support is rendered by mitex."
+                ),
+                ["--native-math"],
+                {
+                    "action": "store_true",
+                    "dest": "native_math",
+                    "default": False,
+                },
+            ),
+            (
+                (
+                    "Define each distinct math once as variable after imports, "
+                    "and refer it from each place of math."
+                ),
+                ["--dedupe-math"],
+                {
+                    "action": "store_true",
+                    "dest": "dedupe_math",
+                    "default": False,
+                },
+            ),
+            (
+                (
+                    "Write translated body into output chunk by chunk "
+                    "instead of building whole output in memory."
+                ),
+                ["--stream-output"],
+                {
+                    "action": "store_true",
+                    "dest": "stream_output",
+                    "default": False,
+                },
+            ),
+            (
+                (
+                    "Keep running, and convert again each time when source, "
+                    "included files or template are changed."
+                ),
+                ["--watch"],
+                {
+                    "action": "store_true",
+                    "dest": "watch",
+                    "default": False,
+                },
+            ),
+            (
+                (
+                    "Reuse translated code of top-level sections that are not changed "
+                    "in the process (useful with --watch)."
+                ),
+                ["--memoize-sections"],
+                {
+                    "action": "store_true",
+                    "dest": "memoize_sections",
+                    "default": False,
+                },
+            ),
+            (
+                (
+                    "Count of worker processes to translate top-level sections in parallel. "
+                    "Sections are translated in serial when it is 0 or 1."
+                ),
+                ["--parallel-sections"],
+                {
+                    "metavar": "<int>",
+                    "dest": "parallel_sections",
+                    "default": 0,
+                    "validator": validate_nonnegative_int,
+                },
+            ),
+            (
+                (
+                    'Record time and memory of each phase. "summary" prints table into stderr, '
+                    "and other value is path of JSON file to write."
+                ),
+                ["--timings"],
+                {
+                    "metavar": "<summary|filepath>",
+                    "dest": "timings",
+                    "default": None,
+                },
+            ),
+            (
+                "Trace allocated memory for --timings (it makes conversion slower).",
+                ["--timings-memory"],
+                {
+                    "action": "store_true",
+                    "dest": "timings_memory",
+                    "default": False,
+                },
+            ),
+            (
+                (
+                    "Measure visitors and departers of translator, "
+                    "and print report into stderr."
+                ),
+                ["--profile-translator"],
+                {
+                    "action": "store_true",
+                    "dest": "profile_translator",
+                    "default": False,
+                },
+            ),
+            (
+                (
+                    "Directory to store conversion cache. "
+                    "Cache is disabled when it is not set."
+                ),
+                ["--cache-dir"],
+                {
+                    "metavar": "<dirpath>",
+                    "dest": "cache_dir",
+                    "default": None,
+                },
+            ),
+            (
+                "Limit of total size of conversion cache in bytes.",
+                ["--cache-max-size"],
+                {
+                    "metavar": "<int>",
+                    "dest": "cache_max_size",
+                    "validator": validate_nonnegative_int,
+                },
+            ),
         ),
     )
 
     settings_defaults = {
         "page_break_level": [],
         "template": Path(__file__).parent / "template.txt",
+        # Callback to receive each phase when it is finished (see :mod:`rst2typst.timings`).
+        "timings_hook": None,
     }
 
     config_section = "typst writer"
 
     visitor_attributes = {"body", "packages"}
 
+    supports_streaming = True
+    """Flag to accept ``--stream-output``. Writers for binary output should disable it."""
+
+    node_transforms = transforms.NodeTransforms
+    """Transforms of rst2typst that are applied by traversal for each priority."""
+
     def __init__(self):
         super().__init__()
         self.translator_class = TypstTranslator
@@ -74,24 +252,150 @@ class Writer(BaseWriter):
             "epilogue": "",
         }
 
+    def cache_key_items(self, settings) -> dict:
+        """Collect values that affect output, as parts of cache key."""
+        return {
+            "writer": f"{type(self).__module__}.{type(self).__qualname__}",
+            "page_break_level": settings.page_break_level,
+            "template": Path(settings.template).read_text(),
+            "no_import_local_package": settings.no_import_local_package,
+            "embed_package": settings.embed_package,
+            "native_math": settings.native_math,
+            "dedupe_math": settings.dedupe_math,
+            "output_encoding": settings.output_encoding,
+        }
+
+    def watch_paths(self, settings) -> list[str]:
+        """Collect paths to watch on ``--watch`` except source and its dependencies."""
+        return [str(settings.template)]
+
+    def invalidate(self, changed: set[str]):
+        """Discard states that are kept in process, when watched paths are changed.
+
+        :param changed: Paths that are changed, added or removed.
+        """
+
     def get_transforms(self):
-        return super().get_transforms() + [
-            transforms.AssignLiteralLanguage,
-            transforms.RemapFootnotes,
-        ]
+        return super().get_transforms() + self.node_transforms.by_priority()
+
+    def build_translator(self) -> TypstTranslator:
+        """Create translator for document.
+
+        When ``--parallel-sections`` is more than 1,
+        top-level sections are translated in worker processes before it returns.
+        When ``--profile-translator`` is set, translator measures its methods.
+        """
+        translator_class = self.translator_class
+        if getattr(self.document.settings, "profile_translator", False):
+            translator_class = profile_translator(translator_class)
+        visitor: TypstTranslator = translator_class(self.document)
+        workers = getattr(self.document.settings, "parallel_sections", 0)
+        if workers and workers > 1:
+            visitor.prepared_sections = prepare_sections(visitor, workers)
+        return visitor
 
     def translate(self):
-        visitor: TypstTranslator = self.translator_class(self.document)
-        self.document.walkabout(visitor)  # type: ignore[possibly-missing-attribute]
-        self.parts["body"] = "".join(visitor.body)
-        self.parts["imports"] = visitor.packages.code
-        self.output = (
-            Path(self.document.settings.template).read_text().format(**self.parts)
-        )
+        settings = self.document.settings
+        with timings.phase(settings, "translate"):
+            visitor = self.build_translator()
+            self.document.walkabout(visitor)  # type: ignore[possibly-missing-attribute]
+        self.report_profile(visitor)
+        with timings.phase(settings, "render"):
+            self.parts["body"] = "".join(visitor.body)
+            self.parts["imports"] = self.render_imports(visitor)
+            self.output = Path(settings.template).read_text().format(**self.parts)
         self.display_warnings()
+        self.store_timings()
+
+    def report_profile(self, visitor: TypstTranslator):
+        """Print report of profiling translator into stderr."""
+        if isinstance(visitor, ProfilingMixin):
+            print(visitor.profile.report(), file=sys.stderr)
+
+    def store_timings(self):
+        """Store recorded phases into ``self.parts["timings"]`` when timings are enabled."""
+        recorded = timings.get_timings(self.document.settings)
+        if recorded is not None:
+            self.parts["timings"] = recorded.as_dicts()
+
+    def write(self, document, destination):
+        if not (
+            self.supports_streaming
+            and document.settings.stream_output
+            and isinstance(destination, io.FileOutput)
+        ):
+            return super().write(document, destination)
+        self.document = document
+        self.language = languages.get_language(
+            document.settings.language_code, document.reporter
+        )
+        self.destination = destination
+        if not destination.opened:
+            destination.open()
+        if io.check_encoding(destination.destination, destination.encoding) is False:
+            # Destination encodes output by itself (for example, STDOUT of other encoding).
+            return super().write(document, destination)
+        try:
+            self.translate_into(destination.destination)  # type: ignore[invalid-argument-type]
+        finally:
+            if destination.autoclose:
+                destination.close()
+        return ""
+
+    def translate_into(self, stream: IO[str]):
+        """Translate document and write rendered code into file-like object.
+
+        The translator appends body into a temporary file while it walks the document,
+        because imports are determined after walking.
+        After that, this writes chunks of template and body into ``stream`` in order.
+        ``self.output`` and ``self.parts["body"]`` are not set on this method.
+        """
+        with tempfile.SpooledTemporaryFile(
+            max_size=STREAM_SPOOL_SIZE, mode="w+", encoding="utf-8"
+        ) as spool:
+            settings = self.document.settings
+            with timings.phase(settings, "translate"):
+                visitor = self.build_translator()
+                visitor.body = StreamBody(spool)  # type: ignore[invalid-assignment]
+                self.document.walkabout(visitor)  # type: ignore[possibly-missing-attribute]
+            self.report_profile(visitor)
+            with timings.phase(settings, "render"):
+                self.parts["imports"] = self.render_imports(visitor)
+                head, tail = self.render_frame()
+                self.display_warnings()
+                stream.write(head)
+                spool.seek(0)
+                shutil.copyfileobj(spool, stream)
+                stream.write(tail)
+        self.store_timings()
+
+    def render_imports(self, visitor: TypstTranslator) -> str:
+        """Render import statements of packages that are used by translator.
+
+        On ``--embed-package``, definitions of local package are embedded instead of importing it.
+        On ``--dedupe-math``, variables of math are defined after them.
+        """
+        if not self.document.settings.embed_package:
+            chunks = [visitor.packages.code]
+        else:
+            packages = PackageRegistry(visitor.packages)
+            entrypoints = packages.pop(visitor.local_package_name, set())
+            chunks = [packages.code, build_embedded_code(package_dir, entrypoints)]
+        chunks += [
+            f"#let {name} = {value}" for name, value in visitor.math_variables.items()
+        ]
+        return "\n".join(c for c in chunks if c)
+
+    def render_frame(self) -> tuple[str, str]:
+        """Render template except body, and split it around position of body."""
+        parts = self.parts | {"body": _BODY_PLACEHOLDER}
+        rendered = Path(self.document.settings.template).read_text().format(**parts)
+        head, _, tail = rendered.partition(_BODY_PLACEHOLDER)
+        return head, tail
 
     def display_warnings(self):
-        if not self.document.settings.no_import_local_package:
+        settings = self.document.settings
+        if not (settings.no_import_local_package or settings.embed_package):
             print("NOTE:")
             print(
                 'The generated Typst code might fail to compile because it includes an "import" expression for a local package.'
@@ -101,63 +405,212 @@ class Writer(BaseWriter):
             )
 
 
+class StreamBody:
+    """Body of translator to write appended texts into file-like object immediately."""
+
+    def __init__(self, stream: IO[str]):
+        self.stream = stream
+
+    def append(self, text: str):
+        self.stream.write(text)
+
+
+@functools.cache
+def _spaces(width: int) -> str:
+    """Retrieve shared string of spaces for indent width."""
+    return " " * width
+
+
 class HanglingIndent(list[str]):
     """Controller for line prefixes.
 
     This class works to render Typst documents for correctly and human readability.
+
+    Prefix and indent of each level are computed on ``push`` and kept as stack,
+    so that ``prefix`` and ``indent`` are retrieved without any computing.
     """
 
     def __init__(self):
         super().__init__()
         self.append("")
+        self._levels: list[tuple[str, str]] = [("", "")]
 
     def push(self, text: str):
+        indent = self._levels[-1][1]
         self.append(text)
+        self._levels.append((f"{indent}{text}", _spaces(len(indent) + len(text))))
 
     def pop(self) -> str:  # type: ignore[invalid-method-override]]
+        self._levels.pop()
         return super().pop()
 
     @property
     def prefix(self) -> str:
         """Retrieve prefix with indent for first line of a block."""
-        space = " " * sum(len(s) for s in self[:-1])
-        return f"{space}{self[-1]}"
+        return self._levels[-1][0]
 
     @property
     def indent(self) -> str:
         """Retrieve hangling indent for subsequent lines of a block."""
-        return " " * sum(len(s) for s in self)
+        return self._levels[-1][1]
 
     def is_indent_only(self) -> bool:
         return self.prefix == self.indent
 
 
+# Characters to escape in any position of text.
+ANY_ESCAPE_TARGET = ["#", "$", "*", "<", ">", "\\", "_", "`", "~"]
+# Characters to escape only when they are at the head of line.
+HEAD_ESCAPE_TARGET = ["+", "-", "="]
+
+_ESCAPE_TABLE = str.maketrans({c: f"\\{c}" for c in ANY_ESCAPE_TARGET})
+_ANY_ESCAPE_CLASS = f"[{re.escape(''.join(ANY_ESCAPE_TARGET))}]"
+_HEAD_ESCAPE_CLASS = f"[{re.escape(''.join(HEAD_ESCAPE_TARGET))}]"
+_ESCAPE_NEEDED = re.compile(f"{_ANY_ESCAPE_CLASS}|^{_HEAD_ESCAPE_CLASS}", re.MULTILINE)
+_HEAD_ESCAPE = re.compile(f"^(?={_HEAD_ESCAPE_CLASS})", re.MULTILINE)
+
+
 def escape(text: str) -> str:
     """Escape special characters in Typst."""
-    ANY_ESCAPE_TARGET = ["#", "$", "*", "<", ">", "\\", "_", "`", "~"]
-    HEAD_ESCAPE_TARGET = ["+", "-", "="]
-    trans = str.maketrans({c: f"\\{c}" for c in ANY_ESCAPE_TARGET})
-    text = text.translate(trans)
+    text = text.translate(_ESCAPE_TABLE)
     if text and text[0] in HEAD_ESCAPE_TARGET:
         text = "\\" + text
     return text
 
 
+def escape_lines(text: str) -> str:
+    """Escape special characters in Typst for each line of text.
+
+    This returns ``text`` itself when it does not have any escape targets.
+    """
+    if not _ESCAPE_NEEDED.search(text):
+        return text
+    return _HEAD_ESCAPE.sub("\\\\", text.translate(_ESCAPE_TABLE))
+
+
+class _Handlers:
+    """Handlers of translator class for node class."""
+
+    __slots__ = (
+        "depart",
+        "depart_name",
+        "depart_structural",
+        "node_name",
+        "visit",
+        "visit_name",
+        "visit_structural",
+    )
+
+    def __init__(self, translator_class: type, node_class: type[nodes.Node]):
+        self.node_name = node_class.__name__
+        self.visit_name = f"visit_{self.node_name}"
+        self.depart_name = f"depart_{self.node_name}"
+        self.visit, self.visit_structural = self._unwrap(
+            getattr(translator_class, self.visit_name, None)
+        )
+        self.depart, self.depart_structural = self._unwrap(
+            getattr(translator_class, self.depart_name, None)
+        )
+
+    @staticmethod
+    def _unwrap(func: Callable | None) -> tuple[Callable | None, bool]:
+        if func is not None and getattr(func, "structural", False):
+            return func.__wrapped__, True  # type: ignore[attr-defined]
+        return func, False
+
+
 class TypstTranslator(nodes.NodeVisitor):
     def __init__(self, document: nodes.document):
         super().__init__(document)
         # Properties that are used by external object.
         self.packages = PackageRegistry()
         self.body = []
+        # Variables of math on ``--dedupe-math`` (name and Typst expression).
+        self.math_variables: dict[str, str] = {}
+        # Top-level sections that are translated before walking (see :mod:`rst2typst.parallel`).
+        self.prepared_sections: dict[nodes.section, Entry] = {}
 
         # Properties to handle content for translation.
         self._section_level = 0
+        self._literal_depth = 0
         self._hi = HanglingIndent()
+        # Outer states of sections that are being memoized.
+        self._memo_stack: list[
+            tuple[nodes.section, str, list, PackageRegistry, dict[str, str], int]
+        ] = []
+        # Properties for dispatching.
+        self._debug = bool(document.reporter.debug_flag)
 
     @functools.cached_property
     def local_package_name(self) -> str:
-        version = metadata.version("rst2typst")
-        return f"@local/rst2typst:{version}"
+        return f"@local/rst2typst:{get_version()}"
+
+    def memo_key_items(self) -> dict:
+        """Collect translator states and settings that affect code of top-level section.
+
+        Subclasses should extend it when they have additional states or settings.
+        """
+        settings = self.document.settings
+        return {
+            "translator": f"{type(self).__module__}.{type(self).__qualname__}",
+            "section_level": self._section_level,
+            "literal_depth": self._literal_depth,
+            "indent": self._hi._levels[-1],
+            "page_break_level": getattr(settings, "page_break_level", []),
+            "no_import_local_package": settings.no_import_local_package,
+            "native_math": getattr(settings, "native_math", False),
+            "dedupe_math": getattr(settings, "dedupe_math", False),
+        }
+
+    def _splice(self, entry: Entry):
+        """Append translated code of section instead of walking it."""
+        self.body.append(entry.code)
+        self.packages.merge(entry.packages)
+        self.math_variables.update(entry.math_variables)
+        self.document.settings.record_dependencies.add(*entry.dependencies)
+        raise nodes.SkipNode
+
+    def _enter_memo(self, node: nodes.section):
+        """Splice cached code of section, or start to record code of section."""
+        dependencies = self.document.settings.record_dependencies
+        key = structural_hash(node, self.memo_key_items())
+        entry = section_cache.get(key)
+        if entry is not None:
+            self._splice(entry)
+        self._memo_stack.append(
+            (
+                node,
+                key,
+                self.body,
+                self.packages,
+                self.math_variables,
+                len(dependencies.list),
+            )
+        )
+        self.body = []
+        self.packages = PackageRegistry()
+        self.math_variables = {}
+
+    def _leave_memo(self):
+        """Store recorded code of section, and restore outer body, packages and math."""
+        _, key, body, packages, math_variables, deps_count = self._memo_stack.pop()
+        code = "".join(self.body)
+        dependencies = self.document.settings.record_dependencies.list[deps_count:]
+        section_cache.put(
+            key,
+            Entry(
+                code,
+                PackageRegistry(self.packages),
+                tuple(dependencies),
+                tuple(self.math_variables.items()),
+            ),
+        )
+        body.append(code)
+        packages.merge(self.packages)
+        math_variables.update(self.math_variables)
+        self.body = body
+        self.packages = packages
+        self.math_variables = math_variables
 
     def block_on_structural(func: Callable):
         @functools.wraps(func)
@@ -167,34 +620,74 @@ class TypstTranslator(nodes.NodeVisitor):
 
             func(self, node)
 
+        # Dispatcher calls wrapped function directly (see ``_Handlers``).
+        _block_on_structural.structural = True  # type: ignore[attr-defined]
         return _block_on_structural
 
+    # ===========
+    # Dispatching
+    # ===========
+    #
+    # Dispatching of ``NodeVisitor`` looks up method by name for each visit and departure.
+    # Translator looks up handlers once for each node class and translator class instead.
+    # Handlers are methods of class when it is looked up first time,
+    # so that methods that are assigned into class after that are not used.
+    # Handlers assigned into instance are used only when class does not have them.
+
+    _handlers: dict[type[nodes.Node], _Handlers]
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._handlers = {}
+
+    def _lookup(self, node_class: type[nodes.Node]) -> _Handlers:
+        cls = type(self)
+        if "_handlers" not in cls.__dict__:
+            cls._handlers = {}
+        handlers = cls._handlers.get(node_class)
+        if handlers is None:
+            handlers = cls._handlers[node_class] = _Handlers(cls, node_class)
+        return handlers
+
+    def dispatch_visit(self, node: nodes.Node):
+        handlers = self._lookup(node.__class__)
+        if self._debug:
+            self.document.reporter.debug(
+                f"rst2typst.writer.TypstTranslator.dispatch_visit calling {handlers.visit_name} for {handlers.node_name}"
+            )
+        if handlers.visit is None:
+            visit = getattr(self, handlers.visit_name, None)
+            return self.unknown_visit(node) if visit is None else visit(node)
+        if handlers.visit_structural and isinstance(node.parent, nodes.Structural):
+            self.body.append("\n")
+        return handlers.visit(self, node)
+
+    def dispatch_departure(self, node: nodes.Node):
+        handlers = self._lookup(node.__class__)
+        if self._debug:
+            self.document.reporter.debug(
+                f"rst2typst.writer.TypstTranslator.dispatch_departure calling {handlers.depart_name} for {handlers.node_name}"
+            )
+        if handlers.depart is None:
+            depart = getattr(self, handlers.depart_name, None)
+            return self.unknown_departure(node) if depart is None else depart(node)
+        if handlers.depart_structural and isinstance(node.parent, nodes.Structural):
+            self.body.append("\n")
+        return handlers.depart(self, node)
+
     # =========================================
     # The visitors and departers for plain text
     # =========================================
 
     def visit_Text(self, node: nodes.Text):
-        LITERAL_NODES = (
-            nodes.doctest_block,
-            nodes.literal,
-            nodes.literal_block,
-            nodes.math,
-            nodes.math_block,
-        )
-
-        def _in_literal(node: nodes.Text) -> bool:
-            n_ = node
-            while n_.parent is not None:
-                if isinstance(n_.parent, LITERAL_NODES):
-                    return True
-                n_ = n_.parent
-            return False
-
-        lines = [
-            escape(line) if not _in_literal(node) else line
-            for line in node.astext().split("\n")
-        ]
-        self.body.append(f"\n{self._hi.indent}".join(lines))
+        # NOTE: Visitors of literal nodes (literal, literal_block, doctest_block, math and math_block)
+        # count up ``_literal_depth`` to keep texts in them as it is.
+        text = node.astext()
+        if not self._literal_depth:
+            text = escape_lines(text)
+        if "\n" in text:
+            text = text.replace("\n", f"\n{self._hi.indent}")
+        self.body.append(text)
 
     def depart_Text(self, node: nodes.Text):
         pass
@@ -220,6 +713,11 @@ class TypstTranslator(nodes.NodeVisitor):
         pass
 
     def visit_section(self, node: nodes.section):
+        if isinstance(node.parent, nodes.document):
+            if node in self.prepared_sections:
+                self._splice(self.prepared_sections.pop(node))
+            if getattr(self.document.settings, "memoize_sections", False):
+                self._enter_memo(node)
         self._section_level += 1
         if (
             hasattr(self.document.settings, "page_break_level")
@@ -229,9 +727,14 @@ class TypstTranslator(nodes.NodeVisitor):
 
     def depart_section(self, node: nodes.section):
         self._section_level -= 1
+        if self._memo_stack and self._memo_stack[-1][0] is node:
+            self._leave_memo()
 
     # Refs: https://typst.app/docs/reference/model/title/
     def visit_title(self, node: nodes.title):
+        # NOTE: Titles of them are rendered as arguments by visitors of parents.
+        if isinstance(node.parent, (nodes.table, nodes.Admonition)):
+            raise nodes.SkipNode
         if isinstance(node.parent, nodes.document):
             self.body.append("#title([")
         else:
@@ -411,7 +914,9 @@ class TypstTranslator(nodes.NodeVisitor):
         self._visit_bibliographic(node)
         self.body.append(
             " \\ ".join(
-                escape(author.astext()) for author in node.findall(nodes.author)
+                escape(author.astext())
+                for author in node.children
+                if isinstance(author, nodes.author)
             )
         )
         self._depart_bibliographic(node)
@@ -433,7 +938,13 @@ class TypstTranslator(nodes.NodeVisitor):
         self.body.append("\n")
 
     def visit_option_group(self, node: nodes.option_group):
-        text = ", ".join([option.astext() for option in node.findall(nodes.option)])
+        text = ", ".join(
+            [
+                option.astext()
+                for option in node.children
+                if isinstance(option, nodes.option)
+            ]
+        )
         self.body.append(f"{text}: \\\n")
         raise nodes.SkipNode
 
@@ -461,6 +972,7 @@ class TypstTranslator(nodes.NodeVisitor):
     # --------------
     # Refs: https://typst.app/docs/reference/text/raw/
     def visit_literal_block(self, node: nodes.literal_block):
+        self._literal_depth += 1
         # NOTE: It finds the highlighting language using the "language" attribute set by transforms.
         lang = node.get("language", None)
         if lang:
@@ -469,18 +981,48 @@ class TypstTranslator(nodes.NodeVisitor):
         self.body.append("```\n")
 
     def depart_literal_block(self, node: nodes.literal_block):
+        self._literal_depth -= 1
         self.body.append("\n```\n\n")
 
     # Math
     # ----
+    def _convert_math(self, node: nodes.math | nodes.math_block) -> str | None:
+        """Convert math into Typst math when ``--native-math`` is set."""
+        if not getattr(self.document.settings, "native_math", False):
+            return None
+        from .math import latex_to_typst
+
+        return latex_to_typst(node.astext())
+
+    def _refer_math(self, value: str) -> str:
+        """Define Typst expression of math as variable once, and return name of it."""
+        name = f"m_{hashlib.blake2b(value.encode(), digest_size=6).hexdigest()}"
+        self.math_variables.setdefault(name, value)
+        return name
+
     @block_on_structural
     def visit_math_block(self, node: nodes.math):
+        code = self._convert_math(node)
+        if getattr(self.document.settings, "dedupe_math", False):
+            if code is not None:
+                value = f"$ {code} $"
+            else:
+                self.packages.add(f"@preview/mitex:{MITEX_VERSION}")
+                text = node.astext().replace("\n", "\n  ")
+                value = f"mitex(`\n  {text}\n`)"
+            self.body.append(f"{self._hi.indent}#{self._refer_math(value)}\n")
+            raise nodes.SkipNode
+        if code is not None:
+            self.body.append(f"{self._hi.indent}$ {code} $\n")
+            raise nodes.SkipNode
+        self._literal_depth += 1
         self.packages.add(f"@preview/mitex:{MITEX_VERSION}")
         self.body.append(f"{self._hi.indent}#mitex(`\n")
         self._hi.push("  ")
         self.body.append(self._hi.indent)
 
     def depart_math_block(self, node: nodes.math):
+        self._literal_depth -= 1
         self._hi.pop()
         self.body.append(f"\n{self._hi.indent}`)\n")
 
@@ -495,11 +1037,9 @@ class TypstTranslator(nodes.NodeVisitor):
     def visit_block_quote(self, node: nodes.block_quote):
         self._hi.push("  ")
         args = []
-        attrs = list(node.findall(nodes.attribution))
-        if attrs:
-            args.append(f"attribution: [{attrs[0].astext()}]")
-            for a in attrs:
-                node.remove(a)
+        attr_idx = node.first_child_matching_class(nodes.attribution)
+        if attr_idx is not None:
+            args.append(f"attribution: [{node.children[attr_idx].astext()}]")
         self.body.append(f"#quote({' '.join(args)})[\n")
         self.body.append(self._hi.prefix)
 
@@ -507,12 +1047,18 @@ class TypstTranslator(nodes.NodeVisitor):
         self._hi.pop()
         self.body.append("\n]\n")
 
+    def visit_attribution(self, node: nodes.attribution):
+        # NOTE: It is rendered as argument by ``visit_block_quote``.
+        raise nodes.SkipNode
+
     # Doctest Blocks
     # --------------
     def visit_doctest_block(self, node: nodes.doctest_block):
+        self._literal_depth += 1
         self.body.append("```python\n")
 
     def depart_doctest_block(self, node: nodes.doctest_block):
+        self._literal_depth -= 1
         self.body.append("\n```\n\n")
 
     # Tables
@@ -521,8 +1067,8 @@ class TypstTranslator(nodes.NodeVisitor):
     def visit_table(self, node: nodes.table):
         figure_opts = {}
         if isinstance(node.children[0], nodes.title):
+            # NOTE: Title is skipped by ``visit_title``.
             figure_opts["caption"] = node.children[0].astext()
-            node.remove(node.children[0])
         if figure_opts:
             node["figure_opts"] = figure_opts
             self.body.append("#figure([\n")
@@ -549,7 +1095,9 @@ class TypstTranslator(nodes.NodeVisitor):
         if colwidths_given:
             # Use explicit fractional widths when the author specified them.
             cols = [
-                f"{colspec['colwidth']}fr" for colspec in node.findall(nodes.colspec)
+                f"{colspec['colwidth']}fr"
+                for colspec in node.children
+                if isinstance(colspec, nodes.colspec)
             ]
             self.body.append(f"{self._hi.indent}columns: ({', '.join(cols)}),\n")
         else:
@@ -639,6 +1187,7 @@ class TypstTranslator(nodes.NodeVisitor):
 
     def _enclose_literal(walk: Literal["visit", "depart"]):
         def _enclose(self, node: nodes.literal):
+            self._literal_depth += 1 if walk == "visit" else -1
             closure = "`"
             # NOTE: It finds the highlighting language using the "language" attribute set by transforms.
             if "language" not in node:
@@ -656,10 +1205,25 @@ class TypstTranslator(nodes.NodeVisitor):
     depart_literal = _enclose_literal("depart")
 
     def visit_math(self, node: nodes.math):
+        code = self._convert_math(node)
+        if getattr(self.document.settings, "dedupe_math", False):
+            if code is not None:
+                value = f"${code}$"
+            else:
+                self.packages.add(f"@preview/mitex:{MITEX_VERSION}")
+                value = f"mi(`{node.astext()}`)"
+            # NOTE: Semicolon ends expression before following text.
+            self.body.append(f"#{self._refer_math(value)};")
+            raise nodes.SkipNode
+        if code is not None:
+            self.body.append(f"${code}$")
+            raise nodes.SkipNode
+        self._literal_depth += 1
         self.packages.add(f"@preview/mitex:{MITEX_VERSION}")
         self.body.append("#mi(`")
 
     def depart_math(self, node: nodes.math):
+        self._literal_depth -= 1
         self.body.append("`)")
 
     def visit_reference(self, node: nodes.reference):
@@ -708,8 +1272,8 @@ class TypstTranslator(nodes.NodeVisitor):
 
             title_idx = node.first_child_matching_class(nodes.title)
             if title_idx is not None:
+                # NOTE: Title is skipped by ``visit_title``.
                 title = node.children[title_idx].astext()
-                node.remove(node.children[title_idx])
 
             self.body.append(f"{self._hi.indent}#admonition(\n")
             self._hi.push("  ")
@@ -746,6 +1310,10 @@ class TypstTranslator(nodes.NodeVisitor):
         elif isinstance(node.parent, nodes.reference):
             prefix = f"\n{prefix}"
             suffix = "]"
+        # NOTE: URI is replaced by derivative on ``--optimize-images`` of PDF writer.
+        path = _local_path(node.get("original_uri", node["uri"]))
+        if path:
+            self.document.settings.record_dependencies.add(path)
         self.body.append(f"{prefix}#image(\n")
         self._hi.push("  ")
         self.body.append(f'{self._hi.indent}"{node["uri"]}",\n')
@@ -788,9 +1356,9 @@ class TypstTranslator(nodes.NodeVisitor):
         if "contents" in node["classes"]:
             self.body.append(f"{self._hi.indent}#outline(\n")
             self._hi.push("  ")
-            titles = list(node.findall(nodes.title))
-            if titles:
-                title = titles[0]
+            title_idx = node.first_child_matching_class(nodes.title)
+            if title_idx is not None:
+                title = node.children[title_idx]
                 self.body.append(f"{self._hi.indent}title: [{title.astext()}],\n")
             self._hi.pop()
             self.body.append(f"{self._hi.indent})\n\n")
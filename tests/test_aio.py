@@ -0,0 +1,100 @@
+import asyncio
+import threading
+from unittest.mock import patch
+
+import pytest
+
+from rst2typst import aio as t
+
+SOURCE = "Title\n=====\n\nHello *world*.\n"
+
+
+def test_convert_to_typst():
+    async def main():
+        async with t.Converter() as converter:
+            return await t.convert_to_typst(
+                SOURCE,
+                settings_overrides={"no_import_local_package": True},
+                converter=converter,
+            )
+
+    output = asyncio.run(main())
+    assert "#title([Title])" in output
+    assert "_world_" in output
+
+
+def test_convert_to_pdf():
+    from rst2typst import pdf
+
+    pdf.clear_compilers()
+
+    async def main():
+        async with t.Converter() as converter:
+            return await converter.to_pdf(
+                SOURCE, settings_overrides={"embed_package": True}
+            )
+
+    with patch("typst.Compiler") as compiler:
+        compiler.return_value.compile.return_value = b"%PDF"
+        assert asyncio.run(main()) == b"%PDF"
+    pdf.clear_compilers()
+    code = compiler.return_value.compile.call_args.kwargs["input"].decode()
+    assert "#title([Title])" in code
+
+
+def test_max_concurrency(monkeypatch: pytest.MonkeyPatch):
+    running, peak = 0, 0
+    lock = threading.Lock()
+    translate = t.translate_typst
+
+    def slow_translate(*args):
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        threading.Event().wait(0.05)
+        with lock:
+            running -= 1
+        return translate(*args)
+
+    monkeypatch.setattr(t, "translate_typst", slow_translate)
+
+    async def main():
+        async with t.Converter(max_concurrency=2) as converter:
+            return await asyncio.gather(*(converter.to_typst(SOURCE) for _ in range(6)))
+
+    assert len(asyncio.run(main())) == 6
+    assert peak == 2
+
+
+def test_cancel_pending(monkeypatch: pytest.MonkeyPatch):
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def blocking_translate(source, *args):
+        calls.append(source)
+        started.set()
+        release.wait(5)
+        return source
+
+    monkeypatch.setattr(t, "translate_typst", blocking_translate)
+
+    async def main():
+        async with t.Converter(max_concurrency=1) as converter:
+            first = asyncio.create_task(converter.to_typst("first"))
+            second = asyncio.create_task(converter.to_typst("second"))
+            await asyncio.get_running_loop().run_in_executor(None, started.wait, 5)
+            second.cancel()
+            release.set()
+            assert await first == "first"
+            with pytest.raises(asyncio.CancelledError):
+                await second
+
+    asyncio.run(main())
+    assert calls == ["first"]
+
+
+def test_invalid_concurrency():
+    with pytest.raises(ValueError):
+        t.Converter(max_concurrency=0)
@@ -0,0 +1,174 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+
+from rst2typst import batch as t
+
+
+@pytest.fixture
+def sources(tmp_path: Path) -> Path:
+    src = tmp_path / "src"
+    (src / "sub").mkdir(parents=True)
+    (src / "index.rst").write_text("Hello\n=====\n\nWorld\n")
+    (src / "sub" / "page.rst").write_text("Page\n====\n\n- Item\n")
+    (src / "note.txt").write_text("Not source")
+    return src
+
+
+class Test_collect_jobs:
+    def test_directory(self, sources: Path, tmp_path: Path):
+        jobs = t.collect_jobs([str(sources)], tmp_path / "out", ".typ")
+        assert [j.destination for j in jobs] == [
+            tmp_path / "out" / "index.typ",
+            tmp_path / "out" / "sub" / "page.typ",
+        ]
+
+    def test_glob(self, sources: Path, tmp_path: Path):
+        jobs = t.collect_jobs([f"{sources}/**/page.rst"], tmp_path / "out", ".typ")
+        assert [j.destination for j in jobs] == [tmp_path / "out" / "sub" / "page.typ"]
+
+    def test_file(self, sources: Path, tmp_path: Path):
+        jobs = t.collect_jobs(
+            [str(sources / "sub" / "page.rst")], tmp_path / "out", ".pdf"
+        )
+        assert [j.destination for j in jobs] == [tmp_path / "out" / "page.pdf"]
+
+    def test_unique(self, sources: Path, tmp_path: Path):
+        jobs = t.collect_jobs(
+            [str(sources), str(sources / "index.rst")], tmp_path / "out", ".typ"
+        )
+        assert len(jobs) == 2
+
+
+def test_main(sources: Path, tmp_path: Path, capsys: pytest.CaptureFixture):
+    out = tmp_path / "out"
+    argv = [str(sources), "-o", str(out), "-j", "1", "--", "--no-import-local-package"]
+    assert t.main(argv, "typst") == 0
+    assert "#title([Hello])" in (out / "index.typ").read_text()
+    assert "- Item" in (out / "sub" / "page.typ").read_text()
+    assert "2 converted, 0 skipped, 0 failed" in capsys.readouterr().err
+
+    # Outputs from current inputs are skipped.
+    assert t.main(argv, "typst") == 0
+    assert "0 converted, 2 skipped, 0 failed" in capsys.readouterr().err
+
+    source = sources / "index.rst"
+    stat = (out / "index.typ").stat()
+    os.utime(source, (stat.st_atime + 10, stat.st_mtime + 10))
+    assert t.main(argv, "typst") == 0
+    assert "1 converted, 1 skipped, 0 failed" in capsys.readouterr().err
+
+
+def test_main_with_changed_inputs(
+    sources: Path, tmp_path: Path, capsys: pytest.CaptureFixture
+):
+    (sources / "index.rst").write_text("Hello\n=====\n\n.. include:: part.txt\n")
+    (sources / "part.txt").write_text("First\n")
+    out = tmp_path / "out"
+    argv = [str(sources), "-o", str(out), "-j", "1", "--"]
+    argv += ["--no-import-local-package"]
+    assert t.main(argv, "typst") == 0
+    assert "2 converted, 0 skipped, 0 failed" in capsys.readouterr().err
+
+    # Included file is changed, even if output is newer than source.
+    (sources / "part.txt").write_text("Second\n")
+    assert t.main(argv, "typst") == 0
+    assert "1 converted, 1 skipped, 0 failed" in capsys.readouterr().err
+    assert "Second" in (out / "index.typ").read_text()
+
+    # Options of writer are changed.
+    assert t.main([*argv, "--page-break-level=1"], "typst") == 0
+    assert "2 converted, 0 skipped, 0 failed" in capsys.readouterr().err
+
+    # Template is changed.
+    template = tmp_path / "template.txt"
+    template.write_text("{imports}\n{body}\n")
+    argv.append(f"--template={template}")
+    assert t.main(argv, "typst") == 0
+    assert "2 converted, 0 skipped, 0 failed" in capsys.readouterr().err
+    template.write_text("// Custom\n{imports}\n{body}\n")
+    assert t.main(argv, "typst") == 0
+    assert "2 converted, 0 skipped, 0 failed" in capsys.readouterr().err
+    assert "// Custom" in (out / "index.typ").read_text()
+
+
+def test_main_with_failure(
+    sources: Path, tmp_path: Path, capsys: pytest.CaptureFixture
+):
+    (sources / "broken.rst").write_text(".. unknown-directive::\n")
+    argv = [str(sources), "-o", str(tmp_path / "out"), "-j", "1"]
+    assert t.main(argv, "typst") == 1
+    err = capsys.readouterr().err
+    assert f"FAILED: {sources / 'broken.rst'}" in err
+    assert "2 converted, 0 skipped, 1 failed" in err
+
+
+def test_main_with_unexpected_error(
+    sources: Path, tmp_path: Path, capsys: pytest.CaptureFixture
+):
+    from rst2typst.writer import Writer
+
+    translate = Writer.translate
+
+    def broken_translate(self):
+        if self.document["source"].endswith("page.rst"):
+            raise KeyError("broken")
+        translate(self)
+
+    argv = [str(sources), "-o", str(tmp_path / "out"), "-j", "1"]
+    argv += ["--executor", "threads"]
+    with patch.object(Writer, "translate", broken_translate):
+        assert t.main(argv, "typst") == 1
+    err = capsys.readouterr().err
+    failure = err.split(f"FAILED: {sources / 'sub' / 'page.rst'}\n")[1]
+    assert failure.startswith("Traceback (most recent call last):")
+    assert "KeyError: 'broken'" in failure
+    assert "1 converted, 0 skipped, 1 failed" in err
+
+
+@pytest.mark.parametrize("jobs", ["0", "-1", "x"])
+def test_main_with_invalid_jobs(
+    sources: Path, tmp_path: Path, capsys: pytest.CaptureFixture, jobs: str
+):
+    with pytest.raises(SystemExit) as exc_info:
+        t.main([str(sources), "-o", str(tmp_path / "out"), "-j", jobs], "typst")
+    assert exc_info.value.code == 2
+    assert "--jobs" in capsys.readouterr().err
+
+
+def test_main_with_threads(
+    sources: Path, tmp_path: Path, capsys: pytest.CaptureFixture
+):
+    (sources / "broken.rst").write_text(".. unknown-directive::\n")
+    out = tmp_path / "out"
+    argv = [str(sources), "-o", str(out), "-j", "2", "--executor", "threads"]
+    assert t.main(argv, "typst") == 1
+    err = capsys.readouterr().err
+    assert f"OK: {sources / 'index.rst'} -> {out / 'index.typ'}" in err
+    # Messages are captured for each document.
+    failure = err.split(f"FAILED: {sources / 'broken.rst'}\n")[1]
+    assert failure.startswith(f"{sources / 'broken.rst'}:1: (ERROR/3)")
+    assert "2 converted, 0 skipped, 1 failed" in err
+
+
+def test_pdf_with_threads(sources: Path, tmp_path: Path, capsys: pytest.CaptureFixture):
+    from rst2typst import fonts, pdf
+
+    pdf.clear_compilers()
+    fonts.get_fonts.cache_clear()
+    out = tmp_path / "out"
+    argv = [str(sources), "-o", str(out), "-j", "2", "--", "--embed-package"]
+    with (
+        patch("typst.Compiler") as compiler,
+        patch("typst.Fonts") as fonts_class,
+    ):
+        compiler.return_value.compile.return_value = b"%PDF"
+        assert t.main(argv, "pdf") == 0
+    pdf.clear_compilers()
+    fonts.get_fonts.cache_clear()
+    assert (out / "sub" / "page.pdf").read_bytes() == b"%PDF"
+    # Fonts are loaded once, and they are shared by compilers of threads.
+    fonts_class.assert_called_once()
+    assert "2 converted, 0 skipped, 0 failed" in capsys.readouterr().err
@@ -0,0 +1,126 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
+from rst2typst import cache as t
+from rst2typst.core import publish_cmdline
+from rst2typst.writer import Writer
+
+
+def test_build_key():
+    key = t.build_key(b"source", {"page_break_level": [1]})
+    assert key == t.build_key(b"source", {"page_break_level": [1]})
+    assert key != t.build_key(b"source", {"page_break_level": [2]})
+    assert key != t.build_key(b"changed", {"page_break_level": [1]})
+
+
+class Test_ConversionCache:
+    def test_get_and_put(self, tmp_path: Path):
+        store = t.ConversionCache(tmp_path / "cache")
+        assert store.get("abcdef") is None
+        store.put("abcdef", b"output\n")
+        assert store.get("abcdef") == (b"output\n", [])
+        assert not list(tmp_path.glob("**/.tmp-*"))
+
+    def test_changed_dependencies(self, tmp_path: Path):
+        included = tmp_path / "included.rst"
+        included.write_text("included")
+        store = t.ConversionCache(tmp_path / "cache")
+        store.put("abcdef", b"output", [str(included)])
+        assert store.get("abcdef") == (b"output", [str(included)])
+        included.write_text("changed")
+        assert store.get("abcdef") is None
+        included.unlink()
+        assert store.get("abcdef") is None
+
+    def test_evict_least_recently_used(self, tmp_path: Path):
+        store = t.ConversionCache(tmp_path, max_size=60, evict_interval=1)
+        store.put("aa01", b"12345")
+        store.put("bb02", b"12345")
+        for idx, key in enumerate(["aa01", "bb02"]):
+            path = store._entry_path(key)
+            os.utime(path, (1000 + idx, 1000 + idx))
+        # Touch older entry, so that other one is evicted.
+        assert store.get("aa01")
+        store.put("cc03", b"12345")
+        assert store.get("aa01")
+        assert store.get("bb02") is None
+        assert store.get("cc03")
+
+    def test_evict_on_sampled_writes(self, tmp_path: Path):
+        store = t.ConversionCache(tmp_path, max_size=0, evict_interval=1000)
+        with patch.object(store, "evict") as evict:
+            for idx in range(10):
+                store.put(f"aa{idx:02}", b"12345")
+        assert evict.call_count < 10
+
+
+def test_publish_cmdline_with_cache(tmp_path: Path):
+    source = tmp_path / "index.rst"
+    source.write_text("Hello\n=====\n")
+    cache_dir = tmp_path / "cache"
+    argv = ["--no-import-local-package", "--cache-dir", str(cache_dir), str(source)]
+
+    publish_cmdline(Writer(), argv=[*argv, str(tmp_path / "first.typ")])
+    expected = (tmp_path / "first.typ").read_text()
+    entries = list(cache_dir.glob("*/*"))
+    assert len(entries) == 1
+    assert entries[0].read_text().split("\n", 1)[1] == expected
+
+    # Output is retrieved from cache entry without translation.
+    meta = entries[0].read_bytes().split(b"\n", 1)[0]
+    entries[0].write_bytes(meta + b"\ncached")
+    publish_cmdline(Writer(), argv=[*argv, str(tmp_path / "second.typ")])
+    assert (tmp_path / "second.typ").read_text() == "cached"
+
+    # Changing settings makes other key.
+    publish_cmdline(
+        Writer(), argv=["--page-break-level=1", *argv, str(tmp_path / "third.typ")]
+    )
+    assert (tmp_path / "third.typ").read_text() == expected
+    assert len(list(cache_dir.glob("*/*"))) == 2
+
+    # Changing docutils settings makes other key too.
+    publish_cmdline(
+        Writer(), argv=["--language=ja", *argv, str(tmp_path / "fourth.typ")]
+    )
+    assert len(list(cache_dir.glob("*/*"))) == 3
+
+
+def test_publish_cmdline_with_cache_and_include(tmp_path: Path):
+    source = tmp_path / "index.rst"
+    source.write_text("Hello\n=====\n\n.. include:: included.rst\n")
+    included = tmp_path / "included.rst"
+    included.write_text("First text.\n")
+    output = tmp_path / "index.typ"
+    argv = ["--no-import-local-package", "--cache-dir", str(tmp_path / "cache")]
+
+    publish_cmdline(Writer(), argv=[*argv, str(source), str(output)])
+    assert "First text." in output.read_text()
+    included.write_text("Second text.\n")
+    publish_cmdline(Writer(), argv=[*argv, str(source), str(output)])
+    assert "Second text." in output.read_text()
+
+
+def test_publish_cmdline_with_cache_and_image(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "docs").mkdir()
+    source = tmp_path / "docs" / "index.rst"
+    source.write_text("Hello\n=====\n\n.. image:: figure.png\n")
+    image = tmp_path / "figure.png"
+    image.write_bytes(b"first")
+    cache_dir = tmp_path / "cache"
+    argv = ["--no-import-local-package", "--cache-dir", str(cache_dir)]
+
+    publish_cmdline(Writer(), argv=[*argv, str(source), "first.typ"])
+    expected = (tmp_path / "first.typ").read_text()
+    (entry,) = cache_dir.glob("*/*")
+    meta = entry.read_bytes().split(b"\n", 1)[0]
+    entry.write_bytes(meta + b"\ncached")
+    publish_cmdline(Writer(), argv=[*argv, str(source), "second.typ"])
+    assert (tmp_path / "second.typ").read_text() == "cached"
+
+    # Image that Typst reads is changed, so that document is converted again.
+    image.write_bytes(b"second image")
+    publish_cmdline(Writer(), argv=[*argv, str(source), "third.typ"])
+    assert (tmp_path / "third.typ").read_text() == expected
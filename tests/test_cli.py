@@ -0,0 +1,61 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+HEAVY_MODULES = {
+    "importlib.metadata",
+    "platformdirs",
+    "typst",
+    "multiprocessing",
+    "concurrent.futures",
+    "tracemalloc",
+    "PIL",
+    "rst2typst.math",
+    "rst2typst.pdf",
+}
+"""Modules that must be imported only when features need them."""
+
+
+def _imported_modules(module: str) -> set[str]:
+    """Import module in new interpreter, and retrieve names of imported modules."""
+    proc = subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            f"import sys, {module}; print(*sys.modules, sep='\\n')",
+        ],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return set(proc.stdout.splitlines())
+
+
+@pytest.mark.parametrize(
+    "module,required",
+    [
+        ("rst2typst.cli.rst2typst", set()),
+        ("rst2typst.cli.rst2typstpdf", {"rst2typst.pdf"}),
+    ],
+)
+def test_lazy_imports(module: str, required: set[str]):
+    modules = _imported_modules(module)
+    assert module in modules
+    assert not (HEAVY_MODULES - required) & modules
+
+
+@pytest.mark.parametrize("name", ["batch", "serve"])
+def test_source_named_as_command(
+    name: str, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+):
+    from rst2typst.cli import rst2typst
+
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / name).write_text("Title\n=====\n")
+    monkeypatch.setattr(
+        sys, "argv", ["rst2typst", name, "out.typ", "--no-import-local-package"]
+    )
+    rst2typst.main()
+    assert "#title([Title])" in (tmp_path / "out.typ").read_text()
@@ -0,0 +1,53 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+from rst2typst import core as t
+from rst2typst.writer import Writer
+
+
+def _wait_for(predicate, timeout: float = 10):
+    end = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < end, "Timeout"
+        time.sleep(0.01)
+
+
+def test_snapshot(tmp_path: Path):
+    (tmp_path / "dir").mkdir()
+    (tmp_path / "dir" / "file.txt").write_text("")
+    mtimes = t.snapshot([tmp_path / "dir", tmp_path / "missing.txt"])
+    assert str(tmp_path / "dir" / "file.txt") in mtimes
+    assert mtimes[str(tmp_path / "missing.txt")] == -1
+    # Too long name cannot be read, but it does not stop watching.
+    assert t.snapshot(["x" * 1000]) == {"x" * 1000: -1}
+
+
+def test_watch(tmp_path: Path):
+    source = tmp_path / "index.rst"
+    source.write_text("Hello\n=====\n\n.. include:: part.rst\n")
+    part = tmp_path / "part.rst"
+    part.write_text("First\n")
+    dest = tmp_path / "index.typ"
+    argv = ["--no-import-local-package", "--watch", str(source), str(dest)]
+
+    thread = threading.Thread(
+        target=t.watch,
+        kwargs={"writer": Writer(), "argv": argv, "interval": 0.01, "max_builds": 2},
+        daemon=True,
+    )
+    thread.start()
+    # Output may be being written.
+    _wait_for(lambda: dest.exists() and "First" in dest.read_text())
+
+    # Included file is watched too.
+    # It is touched until rebuild, because watcher may take snapshot after first touching.
+    part.write_text("Second\n")
+    for step in range(1, 1000):
+        os.utime(part, ns=(0, part.stat().st_mtime_ns + step))
+        thread.join(timeout=0.01)
+        if not thread.is_alive():
+            break
+    assert not thread.is_alive()
+    assert "Second" in dest.read_text()
@@ -0,0 +1,22 @@
+import os
+from pathlib import Path
+
+from rst2typst import fonts as t
+
+
+def test_stamp_fonts(tmp_path: Path):
+    font_dir = tmp_path / "fonts"
+    (font_dir / "sub").mkdir(parents=True)
+    (font_dir / "sub" / "font.ttf").write_bytes(b"font")
+    (font_dir / "readme.txt").write_text("not font")
+    stamp = t.stamp_fonts([str(font_dir)])
+    assert t.stamp_fonts([str(font_dir)]) == stamp
+    # Files that are not font are ignored.
+    (font_dir / "readme.txt").write_text("changed")
+    assert t.stamp_fonts([str(font_dir)]) == stamp
+    os.utime(font_dir / "sub" / "font.ttf", (1000, 1000))
+    assert t.stamp_fonts([str(font_dir)]) != stamp
+    stamp = t.stamp_fonts([str(font_dir)])
+    (font_dir / "other.otf").write_bytes(b"font")
+    assert t.stamp_fonts([str(font_dir)]) != stamp
+    assert t.stamp_fonts([]) != stamp
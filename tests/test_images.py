@@ -0,0 +1,116 @@
+from pathlib import Path
+from unittest.mock import patch
+
+import pytest
+from docutils.core import publish_string
+
+from rst2typst import images as t
+
+Image = pytest.importorskip("PIL.Image")
+
+
+@pytest.mark.parametrize(
+    "width,expected",
+    [
+        (None, t.TEXT_WIDTH),
+        ("50%", t.TEXT_WIDTH / 2),
+        ("100pt", 100.0),
+        ("200px", 150.0),
+        ("1in", 72.0),
+        ("2em", 22.0),
+        ("auto", t.TEXT_WIDTH),
+    ],
+)
+def test_width_in_points(width: str | None, expected: float):
+    assert t.width_in_points(width) == pytest.approx(expected)
+
+
+class Test_ImageCache:
+    def test_downscale(self, tmp_path: Path):
+        source = tmp_path / "photo.jpg"
+        Image.new("RGB", (3000, 2000), "red").save(source, quality=95)
+        cache = t.ImageCache(tmp_path / "cache", dpi=72)
+        derivative = cache.prepare(source, "300pt")
+        assert derivative is not None
+        assert derivative.suffix == ".jpg"
+        with Image.open(derivative) as image:
+            assert image.size == (300, 200)
+
+    def test_keep_natural_size(self, tmp_path: Path):
+        source = tmp_path / "image.png"
+        Image.new("RGB", (3000, 1000)).save(source, dpi=(300, 300))
+        derivative = t.ImageCache(tmp_path / "cache", dpi=72).prepare(source, "300pt")
+        assert derivative is not None
+        with Image.open(derivative) as image:
+            assert image.size == (300, 100)
+            assert image.info["dpi"] == pytest.approx((30, 30), rel=0.01)
+
+    def test_keep_natural_size_without_dpi(self, tmp_path: Path):
+        source = tmp_path / "image.png"
+        Image.new("RGB", (3000, 1000)).save(source)
+        derivative = t.ImageCache(tmp_path / "cache", dpi=72).prepare(source, "600pt")
+        assert derivative is not None
+        with Image.open(derivative) as image:
+            assert image.info["dpi"] == pytest.approx((14.4, 14.4), rel=0.01)
+
+    def test_reuse(self, tmp_path: Path):
+        source = tmp_path / "image.png"
+        Image.new("RGBA", (2000, 1000)).save(source)
+        cache = t.ImageCache(tmp_path / "cache")
+        derivative = cache.prepare(source)
+        with (
+            patch.object(cache, "_create") as create,
+            patch.object(t.hashlib, "sha256", wraps=t.hashlib.sha256) as sha256,
+            patch.object(Path, "read_bytes") as read_bytes,
+        ):
+            assert cache.prepare(source) == derivative
+            create.assert_not_called()
+            # Original is not read, because it is not changed.
+            read_bytes.assert_not_called()
+            assert sha256.call_count == 1
+
+    def test_changed_image(self, tmp_path: Path):
+        source = tmp_path / "image.png"
+        Image.new("RGBA", (2000, 1000), "red").save(source)
+        cache = t.ImageCache(tmp_path / "cache")
+        derivative = cache.prepare(source)
+        Image.new("RGBA", (2000, 1000), "blue").save(source)
+        assert cache.prepare(source) != derivative
+
+    def test_keep_small_image(self, tmp_path: Path):
+        source = tmp_path / "small.png"
+        Image.new("L", (10, 10)).save(source)
+        derivative = t.ImageCache(tmp_path / "cache").prepare(source)
+        assert derivative is not None
+        assert derivative.read_bytes() == source.read_bytes()
+
+    def test_skip_other_formats(self, tmp_path: Path):
+        source = tmp_path / "image.gif"
+        Image.new("P", (2000, 10)).save(source)
+        cache = t.ImageCache(tmp_path / "cache")
+        assert cache.prepare(source) is None
+        with patch.object(cache, "_create") as create:
+            assert cache.prepare(source) is None
+            create.assert_not_called()
+
+
+def test_optimize_images(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    from rst2typst import pdf
+
+    monkeypatch.chdir(tmp_path)
+    Image.new("RGB", (4000, 3000), "blue").save("photo.jpg")
+    source = ".. image:: photo.jpg\n   :width: 50%\n\n.. image:: missing.png\n"
+    with patch("typst.Compiler") as compiler:
+        publish_string(
+            source,
+            writer=pdf.Writer(),
+            settings_overrides={
+                "optimize_images": True,
+                "embed_package": True,
+                "report_level": 4,
+            },
+        )
+    code = compiler.return_value.compile.call_args.kwargs["input"].decode()
+    assert '"photo.jpg"' not in code
+    assert f'"{t.DEFAULT_CACHE_DIR}/' in code
+    assert '"missing.png"' in code
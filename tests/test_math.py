@@ -0,0 +1,112 @@
+import pytest
+from docutils.core import publish_string
+
+from rst2typst import math as t
+from rst2typst.writer import Writer
+
+
+@pytest.mark.parametrize(
+    "source,expected",
+    [
+        (r"A_\text{c} = (\pi/4) d^2", 'A_("c") = ( pi slash 4 ) d^(2)'),
+        (
+            r"x = \frac{-b \pm \sqrt{b^2 - 4ac}}{2a}",
+            "x = frac(- b plus.minus sqrt(b^(2) - 4 a c), 2 a)",
+        ),
+        (r"\sum_{i=0}^{n} i", "sum_(i = 0)^(n) i"),
+        (r"\sqrt[3]{x}", "root(3, x)"),
+        (r"f'(x) \leq \infty", "f' ( x ) lt.eq infinity"),
+        (r"\mathbb{R} \to \mathbf{v}", "bb(R) arrow.r bold(v)"),
+        (r"\operatorname{rank} A", 'op("rank") A'),
+        ('\\text{say "hi"}', '"say \\"hi\\""'),
+        (r"\text{a \b}", None),
+        (r"\frac{a,b}{c}", "frac(a \\, b, c)"),
+        (r"\left( x \right.", "( x"),
+        (r"\{ x \}", "\\{ x \\}"),
+        (r"\frac12 x", "frac(1, 2) x"),
+        (r"x^23", "x^(2) 3"),
+        (r"x_2.5", "x_(2) . 5"),
+        (r"{x}^2", "x^(2)"),
+        (r"{a+b} c", "a + b c"),
+    ],
+)
+def test_latex_to_typst(source: str, expected: str | None):
+    assert t.latex_to_typst(source) == expected
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        r"\begin{matrix} a \end{matrix}",
+        r"a \\ b",
+        r"a & b",
+        r"\frac{(a}{b)}",
+        r"{x",
+        r"x}",
+        r"^2",
+        r"{a+b}^2",
+        r"\unknown x",
+    ],
+)
+def test_unsupported(source: str):
+    assert t.latex_to_typst(source) is None
+
+
+def _publish(source: str, **overrides) -> str:
+    return publish_string(
+        source,
+        writer=Writer(),
+        settings_overrides={"no_import_local_package": True} | overrides,
+    ).decode()
+
+
+def test_native_math():
+    output = _publish(
+        "Inline :math:`x^2` text.\n\n.. math::\n\n   y = \\frac{1}{2}\n",
+        native_math=True,
+    )
+    assert "Inline $x^(2)$ text." in output
+    assert "$ y = frac(1, 2) $\n" in output
+    assert "mitex" not in output
+
+
+def test_native_math_fallback():
+    output = _publish(
+        "Inline :math:`x^2` and :math:`a \\\\ b` text *after*.\n",
+        native_math=True,
+    )
+    assert "$x^(2)$" in output
+    assert "#mi(`a \\\\ b`)" in output
+    assert "@preview/mitex" in output
+    # Texts after fallback are escaped as usual.
+    assert "_after_" in output
+
+
+def test_disabled_by_default():
+    output = _publish("Inline :math:`x^2` text.\n")
+    assert "#mi(`x^2`)" in output
+
+
+class Test_DedupeMath:
+    SOURCE = (
+        "Inline :math:`x^2` and :math:`x^2`\\ (again).\n\n"
+        ".. math::\n\n   y = 1\n\n"
+        ".. note::\n\n   .. math::\n\n      y = 1\n"
+    )
+
+    def test_mitex(self):
+        output = _publish(self.SOURCE, dedupe_math=True)
+        imports, _, body = output.partition("\n\n")
+        assert imports.startswith('#import "@preview/mitex:')
+        assert imports.count("#let m_") == 2
+        assert "= mi(`x^2`)" in imports
+        assert "= mitex(`\n  y = 1\n`)" in imports
+        name = imports.split("#let ")[1].split(" ")[0]
+        assert body.count(f"#{name};") == 2
+        assert f"#{name};(again)" in body
+
+    def test_native_math(self):
+        output = _publish(self.SOURCE, dedupe_math=True, native_math=True)
+        assert "mitex" not in output
+        assert output.count("= $x^(2)$") == 1
+        assert output.count("= $ y = 1 $") == 1
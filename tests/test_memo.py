@@ -0,0 +1,89 @@
+import pytest
+from docutils import nodes
+from docutils.core import publish_string
+
+from rst2typst import memo as t
+from rst2typst.writer import Writer
+
+SOURCE = """\
+First
+=====
+
+.. note:: Hello
+
+Second
+======
+
+.. image:: images/figure.png
+"""
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    t.section_cache.clear()
+    yield
+    t.section_cache.clear()
+
+
+def _section(text: str, **attributes) -> nodes.section:
+    return nodes.section("", nodes.paragraph("", text), **attributes)
+
+
+def test_structural_hash():
+    key = t.structural_hash(_section("text"))
+    assert key == t.structural_hash(_section("text"))
+    assert key != t.structural_hash(_section("changed"))
+    assert key != t.structural_hash(_section("text", ids=["id"]))
+    assert key != t.structural_hash(_section("text"), {"section_level": 1})
+
+
+def test_section_cache_evicts_least_recently_used():
+    cache = t.SectionCache(max_entries=2)
+    cache.put("a", t.Entry("a", {}))  # type: ignore[invalid-argument-type]
+    cache.put("b", t.Entry("b", {}))  # type: ignore[invalid-argument-type]
+    assert cache.get("a") is not None
+    cache.put("c", t.Entry("c", {}))  # type: ignore[invalid-argument-type]
+    assert cache.get("b") is None
+    assert len(cache) == 2
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_memoize_sections():
+    expected = publish_string(SOURCE, writer=Writer())
+    settings = {"memoize_sections": True}
+    assert (
+        publish_string(SOURCE, writer=Writer(), settings_overrides=settings) == expected
+    )
+    assert t.section_cache.misses == 2
+    # Cached sections are spliced with packages they need.
+    assert (
+        publish_string(SOURCE, writer=Writer(), settings_overrides=settings) == expected
+    )
+    assert t.section_cache.hits == 2
+    assert b'#import "@local/rst2typst:' in expected
+
+
+def test_memoize_sections_with_different_state():
+    settings = {"memoize_sections": True}
+    publish_string(SOURCE, writer=Writer(), settings_overrides=settings)
+    output = publish_string(
+        SOURCE, writer=Writer(), settings_overrides=settings | {"page_break_level": [1]}
+    )
+    assert t.section_cache.hits == 0
+    assert output.count(b"#pagebreak()") == 2
+
+
+def test_memoize_sections_with_math_variables():
+    source = "First\n=====\n\n:math:`x`\n\nSecond\n======\n\n:math:`x`\n"
+    settings = {"memoize_sections": True, "dedupe_math": True}
+    expected = publish_string(
+        source, writer=Writer(), settings_overrides={"dedupe_math": True}
+    )
+    assert (
+        publish_string(source, writer=Writer(), settings_overrides=settings) == expected
+    )
+    assert (
+        publish_string(source, writer=Writer(), settings_overrides=settings) == expected
+    )
+    assert t.section_cache.hits == 2
+    assert expected.count(b"#let m_") == 1
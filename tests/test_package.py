@@ -1,3 +1,7 @@
+import os
+from pathlib import Path
+from unittest.mock import patch
+
 import pytest
 
 from rst2typst import package as t
@@ -26,3 +30,158 @@ class Test_PackageRegistry:
         entrypoint = list(reg["test"])[0]
         assert entrypoint.name == name
         assert entrypoint.alias == alias
+
+
+class Test_install_package:
+    @pytest.fixture
+    def source(self, tmp_path):
+        source = tmp_path / "source"
+        (source / "sub").mkdir(parents=True)
+        (source / "lib.typ").write_text("lib")
+        (source / "sub" / "mod.typ").write_text("mod")
+        return source
+
+    @pytest.fixture
+    def dest(self, tmp_path, monkeypatch):
+        dest = tmp_path / "packages" / "local" / "test" / "0.0.0"
+        monkeypatch.setattr(t, "build_install_path", lambda name, version=None: dest)
+        self._clear_caches()
+        yield dest
+        self._clear_caches()
+
+    def _clear_caches(self):
+        t.build_manifest.cache_clear()
+        t.hash_package.cache_clear()
+        t.stamp_package.cache_clear()
+
+    def test_fresh(self, source, dest):
+        t.install_package(source, "test")
+        assert (dest / "lib.typ").read_text() == "lib"
+        assert (dest / "sub" / "mod.typ").read_text() == "mod"
+        manifest = t.read_manifest(dest)
+        assert manifest["digest"] == t.hash_package(source)
+        assert set(manifest["files"]) == {"lib.typ", "sub/mod.typ"}
+        assert dest.is_symlink()
+        assert len(list(dest.parent.iterdir())) == 2
+
+    def test_up_to_date(self, source, dest):
+        t.install_package(source, "test")
+        inode = (dest / "lib.typ").stat().st_ino
+        t.install_package(source, "test")
+        assert (dest / "lib.typ").stat().st_ino == inode
+
+    def test_up_to_date_without_hashing(self, source, dest):
+        t.install_package(source, "test")
+        t.hash_package.cache_clear()
+        with (
+            patch.object(t, "hash_package") as hash_package,
+            patch.object(Path, "rglob") as rglob,
+        ):
+            t.install_package(source, "test")
+        hash_package.assert_not_called()
+        # Source directory is walked once in process.
+        rglob.assert_not_called()
+
+    def test_touched(self, source, dest):
+        t.install_package(source, "test")
+        target = os.readlink(dest)
+        os.utime(source / "lib.typ", ns=(0, 0))
+        self._clear_caches()
+        t.install_package(source, "test")
+        assert os.readlink(dest) == target
+        assert t.read_manifest(dest)["stamp"] == t.stamp_package(source)
+
+    def test_update_changed_files(self, source, dest):
+        t.install_package(source, "test")
+        first = os.readlink(dest)
+        (source / "lib.typ").write_text("changed")
+        (source / "sub" / "mod.typ").unlink()
+        self._clear_caches()
+        t.install_package(source, "test")
+        assert (dest / "lib.typ").read_text() == "changed"
+        assert not (dest / "sub" / "mod.typ").exists()
+        # Previous directory is kept for readers until next install.
+        assert (dest.parent / first / "lib.typ").read_text() == "lib"
+        (source / "lib.typ").write_text("changed again")
+        self._clear_caches()
+        t.install_package(source, "test")
+        assert (dest / "lib.typ").read_text() == "changed again"
+        assert not (dest.parent / first).exists()
+        assert len(list(dest.parent.iterdir())) == 3
+
+    def test_remove_orphans(self, source, dest):
+        t.install_package(source, "test")
+        # Staging of other process that lost concurrent install.
+        orphan = dest.parent / ".0.0.0-orphan"
+        orphan.mkdir()
+        (orphan / t.MANIFEST_NAME).write_text('{"digest": "other"}')
+        # Stagings that are in progress.
+        staging = dest.parent / ".0.0.0-staging"
+        staging.mkdir()
+        swapping = dest.parent / ".0.0.0-swapping"
+        swapping.mkdir()
+        (swapping / t.MANIFEST_NAME).write_text('{"digest": "other"}')
+        os.symlink(swapping.name, dest.parent / ".0.0.0-swapping.link")
+        (source / "lib.typ").write_text("changed")
+        self._clear_caches()
+        t.install_package(source, "test")
+        assert not orphan.exists()
+        assert staging.exists()
+        assert swapping.exists()
+
+    def test_without_symlink(self, source, dest, monkeypatch):
+        def symlink(*args, **kwargs):
+            raise OSError("not permitted")
+
+        monkeypatch.setattr(t.os, "symlink", symlink)
+        t.install_package(source, "test")
+        (source / "lib.typ").write_text("changed")
+        self._clear_caches()
+        t.install_package(source, "test")
+        assert not dest.is_symlink()
+        assert (dest / "lib.typ").read_text() == "changed"
+        assert [p.name for p in dest.parent.iterdir()] == ["0.0.0"]
+
+    def test_force(self, source, dest):
+        t.install_package(source, "test")
+        (dest / "lib.typ").write_text("broken")
+        t.install_package(source, "test")
+        assert (dest / "lib.typ").read_text() == "broken"
+        t.install_package(source, "test", force=True)
+        assert (dest / "lib.typ").read_text() == "lib"
+
+    def test_without_manifest(self, source, dest):
+        dest.mkdir(parents=True)
+        (dest / "lib.typ").write_text("old")
+        t.install_package(source, "test")
+        assert (dest / "lib.typ").read_text() == "lib"
+        assert t.read_manifest(dest)
+        assert dest.is_symlink()
+
+
+def test_resolve_definitions():
+    assert t.resolve_definitions(t.package_dir, ["admonition"]) == [
+        "admonition-themes",
+        "admonition-callout",
+        "admonition",
+    ]
+    assert t.resolve_definitions(t.package_dir, ["docinfo"]) == [
+        "docinfo-callout",
+        "docinfo",
+    ]
+    with pytest.raises(ValueError):
+        t.resolve_definitions(t.package_dir, ["unknown"])
+
+
+def test_build_embedded_code():
+    code = t.build_embedded_code(t.package_dir, [t.Entrypoint("docinfo", "info")])
+    assert code.startswith("#let docinfo-callout(content) = {\n")
+    assert code.endswith("#let docinfo = docinfo-callout\n#let info = docinfo")
+    assert "admonition" not in code
+    assert "#import" not in code
+
+
+def test_get_version():
+    from importlib import metadata
+
+    assert t.get_version() == metadata.version("rst2typst")
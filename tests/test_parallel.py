@@ -0,0 +1,101 @@
+import multiprocessing
+import threading
+from unittest.mock import patch
+
+import pytest
+from docutils.core import publish_string
+
+from rst2typst import memo
+from rst2typst.writer import Writer
+
+SOURCE = """\
+Title
+=====
+
+:Author: me
+
+Preface with footnote [#first]_.
+
+First
+-----
+
+.. note:: Hello
+
+Nested
+^^^^^^
+
+- Item with footnote [#second]_
+
+Second
+------
+
+.. image:: images/figure.png
+
+.. [#first] First footnote.
+.. [#second] Second footnote.
+
+Third
+-----
+
+.. tip:: Bye
+"""
+
+SETTINGS = {"page_break_level": [2], "warning_stream": False}
+
+
+@pytest.fixture(autouse=True)
+def _clear_cache():
+    memo.section_cache.clear()
+    yield
+    memo.section_cache.clear()
+
+
+def _publish(**settings) -> bytes:
+    return publish_string(
+        SOURCE, writer=Writer(), settings_overrides=SETTINGS | settings
+    )
+
+
+def test_same_as_serial():
+    assert _publish(parallel_sections=2) == _publish()
+
+
+def test_same_as_serial_without_fork(monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.setattr("multiprocessing.get_all_start_methods", lambda: ["spawn"])
+    assert _publish(parallel_sections=2) == _publish()
+
+
+def test_same_as_serial_in_thread():
+    expected = _publish()
+    results = []
+    # Forking process that has other threads is unsafe.
+    with patch(
+        "multiprocessing.get_context", wraps=multiprocessing.get_context
+    ) as get_context:
+        thread = threading.Thread(
+            target=lambda: results.append(_publish(parallel_sections=2))
+        )
+        thread.start()
+        thread.join()
+    assert results == [expected]
+    assert "fork" not in [call.args[0] for call in get_context.call_args_list]
+
+
+def test_with_dedupe_math():
+    source = SOURCE + "\n:math:`x` :math:`y`\n\nFourth\n------\n\n:math:`y` :math:`z`\n"
+    settings = SETTINGS | {"dedupe_math": True}
+    expected = publish_string(source, writer=Writer(), settings_overrides=settings)
+    output = publish_string(
+        source, writer=Writer(), settings_overrides=settings | {"parallel_sections": 2}
+    )
+    assert output == expected
+    assert expected.count(b"#let m_") == 3
+
+
+def test_with_memoize_sections():
+    expected = _publish()
+    assert _publish(parallel_sections=2, memoize_sections=True) == expected
+    assert memo.section_cache.misses == 3
+    assert len(memo.section_cache) == 3
+    assert _publish(parallel_sections=2, memoize_sections=True) == expected
+    assert memo.section_cache.hits == 3
@@ -4,7 +4,7 @@ from unittest.mock import patch, MagicMock
 import pytest
 from docutils.core import publish_string
 
-from rst2typst import pdf
+from rst2typst import fonts, pdf
 
 
 @pytest.fixture(autouse=True)
@@ -12,8 +12,18 @@ def _clear_font_paths_env(monkeypatch: pytest.MonkeyPatch):
     monkeypatch.delenv("TYPST_FONT_PATHS", raising=False)
 
 
+@pytest.fixture(autouse=True)
+def _clear_compilers():
+    pdf.clear_compilers()
+    fonts.get_fonts.cache_clear()
+    yield
+    pdf.clear_compilers()
+    fonts.get_fonts.cache_clear()
+
+
 def _publish(**settings_overrides) -> MagicMock:
-    with patch.object(pdf.typst, "compile") as mock:
+    """Publish PDF, and return mock of ``typst.Fonts``."""
+    with patch("typst.Compiler"), patch("typst.Fonts") as mock:
         publish_string(
             "",
             writer=pdf.Writer(),
@@ -55,3 +65,39 @@ def test_font_paths_from_args_and_env(monkeypatch: pytest.MonkeyPatch):
         "/tmp/fonts",
         "/opt/fonts",
     ]
+
+
+def test_share_fonts_between_compilers():
+    with patch("typst.Compiler") as mock:
+        pdf.get_compiler((), "/tmp/a")
+        pdf.get_compiler((), "/tmp/b")
+    assert mock.call_count == 2
+    assert mock.call_args_list[0].kwargs["font_paths"] is fonts.get_fonts(())
+    assert mock.call_args_list[1].kwargs["font_paths"] is fonts.get_fonts(())
+
+
+def test_compiler_for_each_thread():
+    from concurrent.futures import ThreadPoolExecutor
+
+    with patch("typst.Compiler", side_effect=lambda **_: object()):
+        main = pdf.get_compiler((), "/tmp/a")
+        with ThreadPoolExecutor(1) as executor:
+            other = executor.submit(pdf.get_compiler, (), "/tmp/a").result()
+        assert pdf.get_compiler((), "/tmp/a") is main
+    assert other is not main
+
+
+def test_reuse_compiler():
+    with patch("typst.Compiler") as mock:
+        for _ in range(2):
+            publish_string("", writer=pdf.Writer())
+    assert mock.call_count == 1
+    assert mock.return_value.compile.call_count == 2
+
+
+def test_embed_package_skips_install():
+    with patch.object(pdf, "install_package") as mock:
+        _publish(embed_package=True)
+        assert mock.call_count == 0
+        _publish()
+        assert mock.call_count == 1
@@ -0,0 +1,83 @@
+from docutils import nodes
+from docutils.core import publish_doctree, publish_string
+
+from rst2typst import profiling as t
+from rst2typst.writer import TypstTranslator, Writer
+
+SOURCE = "Title\n=====\n\nHello *world*.\n\n.. note:: Note\n"
+
+SECTIONS = """
+First
+=====
+
+- Item *1*
+- Item *2*
+
+Second
+======
+
+Text
+"""
+
+
+class CustomTranslator(TypstTranslator):
+    def visit_emphasis(self, node: nodes.emphasis):
+        self.body.append("#emph[")
+
+
+def _walk(translator_class, source: str = SOURCE) -> t.ProfilingMixin:
+    document = publish_doctree(source, settings_spec=Writer())
+    visitor = t.profile_translator(translator_class)(document)
+    document.walkabout(visitor)
+    return visitor
+
+
+def test_profile_translator():
+    cls = t.profile_translator(TypstTranslator)
+    assert issubclass(cls, TypstTranslator)
+    assert t.profile_translator(TypstTranslator) is cls
+
+    visitor = _walk(TypstTranslator)
+    methods = visitor.profile.methods
+    assert methods["visit_paragraph"].calls == 2
+    assert methods["visit_Text"].calls == methods["depart_Text"].calls
+    # Bytes appended by each node type are summed to whole body.
+    assert sum(visitor.profile.sizes.values()) == len("".join(visitor.body).encode())
+
+
+def test_cumulative_time():
+    methods = _walk(TypstTranslator, SECTIONS).profile.methods
+    # Cumulative time of visit includes children and departure of node.
+    for name in ["section", "bullet_list"]:
+        visit = methods[f"visit_{name}"]
+        assert visit.cumulative > visit.self_time + methods[f"depart_{name}"].self_time
+    section = methods["visit_section"].cumulative
+    assert section > methods["visit_bullet_list"].cumulative
+    # Nested sections are not counted twice.
+    nested = _walk(TypstTranslator, f"Text\n\nTop\n###\n{SECTIONS}").profile.methods
+    assert nested["visit_section"].cumulative < nested["visit_document"].cumulative
+    assert methods["visit_Text"].cumulative >= methods["visit_Text"].self_time
+
+
+def test_profile_subclass():
+    visitor = _walk(CustomTranslator)
+    assert "".join(visitor.body).count("#emph[") == 1
+    assert visitor.profile.methods["visit_emphasis"].calls == 1
+    assert visitor.profile.sizes["emphasis"] == len("#emph[]")
+
+    # Header, 3 methods, blank line, header and 3 node types.
+    assert len(visitor.profile.report(limit=3).splitlines()) == 9
+
+
+def test_writer_prints_report(capsys):
+    publish_string(
+        SOURCE,
+        writer=Writer(),
+        settings_overrides={
+            "profile_translator": True,
+            "no_import_local_package": True,
+        },
+    )
+    err = capsys.readouterr().err
+    assert err.startswith("method")
+    assert "visit_Text" in err
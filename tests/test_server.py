@@ -0,0 +1,177 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+from unittest.mock import patch
+
+import pytest
+
+from rst2typst import pdf
+from rst2typst import server as t
+
+SOURCE = "Title\n=====\n\nHello *world*.\n"
+
+
+@pytest.fixture
+def compiler():
+    pdf.clear_compilers()
+    with patch("typst.Compiler") as mock:
+        mock.return_value.compile.return_value = b"%PDF"
+        yield mock
+    pdf.clear_compilers()
+
+
+@pytest.fixture
+def service(compiler):
+    service = t.ConversionService(["--embed-package"], workers=2, queue_size=4)
+    service.start()
+    yield service
+    service.close()
+
+
+@pytest.fixture
+def url(service: t.ConversionService):
+    server = t.create_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield "http://{}:{}".format(*server.server_address)
+    server.shutdown()
+    server.server_close()
+
+
+def _request(url: str, body: str | None = None) -> tuple[int, bytes]:
+    data = None if body is None else body.encode()
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data)) as res:
+            return res.status, res.read()
+    except urllib.error.HTTPError as err:
+        return err.code, err.read()
+
+
+def test_warm_up(service: t.ConversionService, compiler):
+    # Each worker compiled document by own compiler before serving.
+    assert compiler.call_count == 2
+    assert service.status()["workers"] == 2
+
+
+def test_typst(url: str):
+    status, body = _request(f"{url}/typst", SOURCE)
+    assert status == 200
+    assert "#title([Title])" in body.decode()
+
+
+def test_typst_without_notice(compiler, capsys):
+    service = t.ConversionService([], workers=1)
+    service.start()
+    try:
+        assert b"#title" in service.submit("typst", SOURCE).result()
+    finally:
+        service.close()
+    assert "NOTE" not in capsys.readouterr().out
+
+
+def test_pdf(url: str, compiler):
+    status, body = _request(f"{url}/pdf", SOURCE)
+    assert status == 200
+    assert body == b"%PDF"
+    code = compiler.return_value.compile.call_args.kwargs["input"].decode()
+    assert "_world_" in code
+
+
+def test_conversion_error(url: str):
+    status, body = _request(f"{url}/typst", "Title\n==\n\n.. unknown::\n")
+    assert status == 422
+    assert b"unknown" in body
+
+
+def test_file_insertion_disabled(compiler, tmp_path):
+    (tmp_path / "secret.txt").write_text("secret")
+    source = f"Title\n=====\n\n.. include:: {tmp_path / 'secret.txt'}\n"
+    service = t.ConversionService(["--embed-package"], workers=1)
+    with pytest.raises(t.ConversionError):
+        service.convert("typst", source)
+    with pytest.raises(t.ConversionError):
+        service.convert("typst", ".. raw:: typst\n\n   #raw\n")
+
+    service = t.ConversionService(
+        ["--embed-package"], workers=1, allow_file_insertion=True
+    )
+    assert b"secret" in service.convert("typst", source)
+
+
+def test_unexpected_error(url: str, service: t.ConversionService):
+    with patch.object(service, "convert", side_effect=KeyError("broken")):
+        status, body = _request(f"{url}/typst", SOURCE)
+    assert status == 500
+    assert body == b"WorkerError: Unexpected error"
+
+
+def test_not_found(url: str):
+    assert _request(f"{url}/html", SOURCE)[0] == 404
+    assert _request(f"{url}/missing")[0] == 404
+
+
+def test_health(url: str):
+    status, body = _request(f"{url}/health")
+    assert status == 200
+    assert json.loads(body)["kinds"] == ["typst", "pdf"]
+
+
+def test_busy(compiler):
+    # Workers are not started, so that requests stay in queue.
+    service = t.ConversionService(["--embed-package"], workers=1, queue_size=1)
+    service.submit("typst", SOURCE)
+    with pytest.raises(t.Busy):
+        service.submit("typst", SOURCE)
+    server = t.create_server(service, port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        url = "http://{}:{}".format(*server.server_address)
+        assert _request(f"{url}/typst", SOURCE)[0] == 503
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_warm_up_failure(compiler):
+    compiler.return_value.compile.side_effect = OSError("broken")
+    service = t.ConversionService(["--embed-package"], workers=2)
+    with pytest.raises(OSError):
+        service.start()
+    assert service.status()["workers"] == 0
+
+
+@pytest.mark.filterwarnings("ignore::pytest.PytestUnhandledThreadExceptionWarning")
+def test_warm_up_unexpected_failure(compiler):
+    compiler.return_value.compile.side_effect = KeyError("broken")
+    service = t.ConversionService(["--embed-package"], workers=2)
+    with pytest.raises(t.WorkerError):
+        service.start()
+    assert service.status()["workers"] == 0
+
+
+@pytest.mark.parametrize("jobs", ["0", "-1"])
+def test_main_with_invalid_jobs(capsys, jobs: str):
+    with pytest.raises(SystemExit) as exc_info:
+        t.main(["--jobs", jobs])
+    assert exc_info.value.code == 2
+    assert "--jobs" in capsys.readouterr().err
+
+
+def test_unix_socket(service: t.ConversionService, tmp_path):
+    import socket
+
+    path = tmp_path / "rst2typst.sock"
+    server = t.create_server(service, socket_path=path)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        with socket.socket(socket.AF_UNIX) as client:
+            client.connect(str(path))
+            client.sendall(b"GET /health HTTP/1.0\r\n\r\n")
+            response = client.makefile("rb").read()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert response.startswith(b"HTTP/1.0 200")
@@ -0,0 +1,75 @@
+import json
+import tracemalloc
+from pathlib import Path
+from types import SimpleNamespace
+
+from docutils.core import publish_parts
+
+from rst2typst import timings as t
+from rst2typst.core import publish_cmdline
+from rst2typst.writer import Writer
+
+
+def test_disabled():
+    settings = SimpleNamespace(timings=None)
+    assert t.get_timings(settings) is None
+    assert t.phase(settings, "parse") is t.phase(settings, "translate")
+
+
+def test_nested_phases_with_memory():
+    recorded = t.Timings()
+    tracemalloc.start()
+    try:
+        with recorded.phase("outer"):
+            with recorded.phase("inner"):
+                data = bytearray(1024 * 1024)
+            del data
+    finally:
+        tracemalloc.stop()
+    inner, outer = recorded
+    assert (inner.name, outer.name) == ("inner", "outer")
+    assert inner.peak >= 1024 * 1024
+    assert outer.peak >= inner.peak
+    assert outer.wall >= inner.wall
+
+
+def test_parts_and_hook():
+    received = []
+    parts = publish_parts(
+        "Title\n=====\n\nText [#]_\n\n.. [#] Note\n",
+        writer=Writer(),
+        settings_overrides={
+            "timings_hook": received.append,
+            "no_import_local_package": True,
+        },
+    )
+    names = [p["name"] for p in parts["timings"]]
+    assert names == [
+        "transform:AssignLiteralLanguage",
+        "transform:RemapFootnotes",
+        "translate",
+        "render",
+    ]
+    assert [p.name for p in received] == names
+
+
+def test_publish_cmdline_writes_json(tmp_path: Path):
+    source = tmp_path / "index.rst"
+    source.write_text("Hello\n=====\n")
+    output = tmp_path / "timings.json"
+    publish_cmdline(
+        Writer(),
+        argv=[
+            "--no-import-local-package",
+            "--timings",
+            str(output),
+            str(source),
+            str(tmp_path / "index.typ"),
+        ],
+    )
+    data = json.loads(output.read_text())
+    assert data["source"] == str(source)
+    names = [p["name"] for p in data["phases"]]
+    assert names[0] == "parse"
+    assert {"transforms", "translate", "render"} <= set(names)
+    assert all(p["peak"] is None for p in data["phases"])
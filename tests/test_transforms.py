@@ -1,4 +1,5 @@
 import textwrap
+from typing import ClassVar
 
 from docutils import nodes
 from docutils.core import publish_doctree
@@ -47,3 +48,92 @@ class Test_AssignLiteralLanguage:
         transform.apply()
         node = next(transform.document.findall(nodes.literal_block))
         assert "language" not in node
+
+
+class Test_RemapFootnotes:
+    def test_move_footnote(self):
+        source = """
+        Text [#note]_ and [#note]_.
+
+        .. [#note] Note
+        """
+        doctree = publish_doctree(textwrap.dedent(source).strip())
+        t.RemapFootnotes(doctree).apply()
+        paragraph = doctree.children[0]
+        assert isinstance(paragraph, nodes.paragraph)
+        footnote = paragraph.next_node(nodes.footnote)
+        assert footnote is not None
+        assert footnote["label"] == "footnote-note"
+        assert not list(footnote.findall(nodes.label))
+        refs = list(paragraph.findall(nodes.footnote_reference))
+        assert [r.astext() for r in refs] == ["footnote-note", "footnote-note"]
+        assert footnote.parent.index(footnote) + 1 == footnote.parent.index(refs[0])
+
+
+class Test_NodeTransforms:
+    def test_single_traversal(self, monkeypatch):
+        source = """
+        Text ``code`` [#]_.
+
+        .. code:: python
+
+           print("hello")
+
+        .. [#] Note
+        """
+        doctree = publish_doctree(textwrap.dedent(source).strip())
+        calls = []
+        original = t.run_handlers
+
+        def _run_handlers(document, members):
+            calls.append([type(m) for m in members])
+            return original(document, members)
+
+        monkeypatch.setattr(t, "run_handlers", _run_handlers)
+        t.NodeTransforms(doctree).apply()
+        assert calls == [t.NodeTransforms.members]
+        block = next(doctree.findall(nodes.literal_block))
+        assert block["language"] == "python"
+        assert doctree.next_node(nodes.footnote)["label"].startswith("footnote-")
+
+    def test_by_priority(self):
+        assert t.NodeTransforms.by_priority() == [
+            t.AssignLiteralLanguage,
+            t.RemapFootnotes,
+        ]
+        assert t.AssignLiteralLanguage.default_priority == 400
+
+    def test_by_priority_with_same_priority(self):
+        class Noop(t.NodeTransform):
+            default_priority = t.RemapFootnotes.default_priority
+
+        class Fused(t.NodeTransforms):
+            members: ClassVar[list[type[t.NodeTransform]]] = [
+                *t.NodeTransforms.members,
+                Noop,
+            ]
+
+        first, second = Fused.by_priority()
+        assert first is t.AssignLiteralLanguage
+        assert issubclass(second, Fused)
+        assert second.__name__ == "Fused"
+        assert second.members == [t.RemapFootnotes, Noop]
+        assert second.default_priority == t.RemapFootnotes.default_priority
+
+    def test_handlers_by_subclass(self):
+        class CollectTextElements(t.NodeTransform):
+            handlers: ClassVar[dict[type[nodes.Node], str]] = {
+                nodes.TextElement: "collect"
+            }
+
+            def __init__(self, document, startnode=None):
+                super().__init__(document, startnode)
+                self.found = []
+
+            def collect(self, node):
+                self.found.append(node.tagname)
+
+        doctree = publish_doctree("Text ``code``.")
+        transform = CollectTextElements(doctree)
+        transform.apply()
+        assert transform.found == ["paragraph", "literal"]
@@ -0,0 +1,247 @@
+from io import BytesIO, TextIOWrapper
+from pathlib import Path
+
+import pytest
+from docutils.core import Publisher, publish_doctree, publish_file, publish_string
+
+from rst2typst import writer as t
+
+
+@pytest.mark.parametrize(
+    "text,expected",
+    [
+        ("hello world", "hello world"),
+        ("#hash and $dollar", "\\#hash and \\$dollar"),
+        ("- head", "\\- head"),
+        ("a - b", "a - b"),
+        ("first\n+ second\n= third", "first\n\\+ second\n\\= third"),
+        ("first\nsecond", "first\nsecond"),
+    ],
+)
+def test_escape_lines(text: str, expected: str):
+    assert t.escape_lines(text) == expected
+
+
+def test_escape_lines_same_as_escape_for_each_line():
+    text = "+ plus\n*strong*\n-minus\n`raw`\n= eq"
+    expected = "\n".join(t.escape(line) for line in text.split("\n"))
+    assert t.escape_lines(text) == expected
+
+
+class Test_HanglingIndent:
+    def test_default(self):
+        hi = t.HanglingIndent()
+        assert hi.prefix == ""
+        assert hi.indent == ""
+
+    def test_push_and_pop(self):
+        hi = t.HanglingIndent()
+        hi.push("- ")
+        hi.push("+ ")
+        assert hi.prefix == "  + "
+        assert hi.indent == "    "
+        assert hi.pop() == "+ "
+        assert hi.prefix == "- "
+        assert hi.indent == "  "
+
+    def test_reuse_indent_string(self):
+        hi = t.HanglingIndent()
+        hi.push("/ ")
+        indent = hi.indent
+        hi.pop()
+        hi.push("  ")
+        assert hi.indent is indent
+
+
+def test_stream_output(tmp_path: Path):
+    source = tmp_path / "index.rst"
+    source.write_text("Title\n=====\n\n- Item with $ and #\n- :math:`x^2`\n")
+    template = tmp_path / "template.txt"
+    template.write_text("// head\n{imports}\n{body}\n// tail {{braces}}\n")
+    settings = {"template": template, "no_import_local_package": True}
+
+    publish_file(
+        source_path=str(source),
+        destination_path=str(tmp_path / "memory.typ"),
+        writer=t.Writer(),
+        settings_overrides=settings,
+    )
+    publish_file(
+        source_path=str(source),
+        destination_path=str(tmp_path / "stream.typ"),
+        writer=t.Writer(),
+        settings_overrides=settings | {"stream_output": True},
+    )
+    expected = (tmp_path / "memory.typ").read_text()
+    assert (tmp_path / "stream.typ").read_text() == expected
+    assert expected.endswith("// tail {braces}\n")
+
+
+def test_stream_output_with_encoding(tmp_path: Path):
+    source = tmp_path / "index.rst"
+    source.write_text("Title\n=====\n\nCafé ☕\n")
+    settings = {
+        "no_import_local_package": True,
+        "stream_output": True,
+        "output_encoding": "latin-1",
+        "output_encoding_error_handler": "xmlcharrefreplace",
+    }
+    publish_file(
+        source_path=str(source),
+        destination_path=str(tmp_path / "stream.typ"),
+        writer=t.Writer(),
+        settings_overrides=settings,
+    )
+    assert "Café &#9749;".encode("latin-1") in (tmp_path / "stream.typ").read_bytes()
+
+    # Stream of other encoding (for example, STDOUT) is encoded by destination.
+    class Buffer(BytesIO):
+        def close(self):
+            self.value = self.getvalue()
+            super().close()
+
+    buffer = Buffer()
+    publish_file(
+        source_path=str(source),
+        destination=TextIOWrapper(buffer, encoding="ascii"),
+        writer=t.Writer(),
+        settings_overrides=settings | {"output_encoding": "utf-8"},
+    )
+    assert "Café ☕".encode() in buffer.value
+
+
+def test_embed_package():
+    source = "Title\n=====\n\n:Author: me\n\n.. note:: Hello\n"
+    output = publish_string(
+        source, writer=t.Writer(), settings_overrides={"embed_package": True}
+    ).decode()
+    assert "@local/rst2typst" not in output
+    assert "#let admonition(" in output
+    assert "#let docinfo = docinfo-callout" in output
+    assert output.index("#let admonition-themes") < output.index("#let admonition(")
+
+
+def test_image_dependencies(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "docs").mkdir()
+    source = tmp_path / "docs" / "index.rst"
+    source.write_text(
+        ".. image:: figure.png\n\n"
+        ".. image:: https://example.com/remote.png\n\n"
+        ".. image:: data:image/png;base64,AAAA\n"
+    )
+    publisher = Publisher(writer=t.Writer())
+    publisher.set_components("standalone", "restructuredtext", "pseudoxml")
+    publisher.process_command_line(
+        ["--no-import-local-package", "--report=4", str(source), "index.typ"]
+    )
+    publisher.set_io()
+    publisher.publish()
+    # Typst reads relative path from current directory, not from directory of source.
+    assert publisher.settings.record_dependencies.list == ["figure.png"]
+
+
+class Test_Dispatching:
+    def _translate(self, source: str, translator_class: type) -> str:
+        writer = t.Writer()
+        writer.translator_class = translator_class
+        return publish_string(
+            source,
+            writer=writer,
+            settings_overrides={"no_import_local_package": True},
+        ).decode()
+
+    def test_handlers_of_subclass(self):
+        class Translator(t.TypstTranslator):
+            def visit_emphasis(self, node):
+                self.body.append("<")
+
+            def depart_emphasis(self, node):
+                self.body.append(">")
+
+        output = self._translate("*text*", Translator)
+        assert "<text>" in output
+        assert "_text_" in self._translate("*text*", t.TypstTranslator)
+        handlers = Translator._handlers[t.nodes.emphasis]
+        assert handlers.visit is Translator.visit_emphasis
+        assert t.TypstTranslator._handlers[t.nodes.emphasis].visit is not None
+
+    def test_skip_structural(self):
+        class Translator(t.TypstTranslator):
+            @t.TypstTranslator.block_on_structural
+            def visit_paragraph(self, node):
+                if node.astext() == "skip":
+                    raise t.nodes.SkipNode
+
+        source = "Title\n=====\n\nskip\n\nSub\n---\n\nText\n"
+        output = self._translate(source, Translator)
+        assert "skip" not in output
+        assert output.endswith("\n= Sub\n\n\nText\n\n")
+
+    def test_skip_siblings_structural(self):
+        class Translator(t.TypstTranslator):
+            @t.TypstTranslator.block_on_structural
+            def visit_paragraph(self, node):
+                if node.astext() == "skip":
+                    raise t.nodes.SkipSiblings
+
+            @t.TypstTranslator.block_on_structural
+            def depart_bullet_list(self, node):
+                super().depart_bullet_list(node)
+
+        output = self._translate("Para\n\n- Item\n\n  skip\n\n  Hidden\n", Translator)
+        assert "Hidden" not in output
+        # Paragraph that skipped siblings does not affect departure of list.
+        assert output == self._translate("Para\n\n- Item\n", Translator)
+
+    def test_handlers_of_instance(self):
+        class custom(t.nodes.Element):
+            pass
+
+        document = publish_doctree("Text")
+        document[0].append(custom())
+        visitor = t.TypstTranslator(document)
+        # Handlers of node that class does not have.
+        visitor.visit_custom = lambda node: visitor.body.append("<custom>")
+        visitor.depart_custom = lambda node: visitor.body.append("</custom>")
+        document.walkabout(visitor)
+        assert "Text<custom></custom>" in "".join(visitor.body)
+
+    def test_unknown_node(self):
+        class Translator(t.TypstTranslator):
+            visit_emphasis = None  # type: ignore[assignment]
+
+        with pytest.raises(NotImplementedError, match="unknown node type: emphasis"):
+            self._translate("*text*", Translator)
+
+
+class Test_DirectChildren:
+    def test_nested_block_quote_attribution(self):
+        source = (
+            "Para\n\n   Outer\n\n      Inner\n\n      -- Inner author\n\n"
+            "   -- Outer author\n"
+        )
+        output = publish_string(
+            source,
+            writer=t.Writer(),
+            settings_overrides={"no_import_local_package": True},
+        ).decode()
+        assert "#quote(attribution: [Outer author])[" in output
+        assert "#quote(attribution: [Inner author])[" in output
+        assert output.count("author") == 2
+
+    def test_keep_document(self):
+        from docutils.core import publish_doctree
+
+        source = ".. table:: Caption\n\n   ===  ===\n   a    b\n   ===  ===\n\n.. admonition:: Head\n\n   Body\n"
+        doctree = publish_doctree(
+            source, settings_overrides={"no_import_local_package": True}
+        )
+        visitor = t.TypstTranslator(doctree)
+        doctree.walkabout(visitor)
+        output = "".join(visitor.body)
+        assert "caption: [Caption]" in output
+        assert '"admonition", "Head"' in output
+        assert output.count("Caption") == 1
+        # Titles are skipped instead of removed from document.
+        assert len(list(doctree.findall(t.nodes.title))) == 2